@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+聲母類化與連讀變調（正向）
+Forward Initial Assimilation and Tone Sandhi Engine
+
+由詞的本音（輸入式，如 "sing1 gu1"）推出實際讀音（如 "sing1 ngu1"）。
+規則與 convert_dict_v3.AssimilationReverser 的反推規則互為逆運算：
+
+- 前字鼻音韻 (ng)：b/p/m → m；d/t/n/l/c/ch/s → n；g/k/h/ng/零聲母 → ng
+- 前字入聲韻 (h)：聲母不變
+- 前字陰聲韻或鼻化韻：b/p/g/k/h → 零聲母；d/t/c/ch/s → l；m/n/ng 不變
+- 前字陰聲韻、後字鼻化韻：b/p → m；d/t → n
+- 前字鼻化韻、後字非鼻化韻（nasal_spread=True 時）：b/p → m；d/t/l/c/ch/s → n
+
+類化後聲母為 m/n/ng 時，鼻化韻的 nn 省略（如 b + ann → ma）；
+結果不是合法音節時保留本音。
+
+連讀變調以 {(本調, 後字本調): 變調} 表提供，作用於詞的非末字；
+預設不變調。
+
+所有規則預先展開為「前字類別 × 音節編號」的查找陣列，
+整批詞典只需數次陣列索引（安裝 numpy 時向量化，否則退回純 Python）。
+"""
+
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from syllable_arrays import (CodeArray, SyllableArrays, FINAL_OPEN, FINAL_NASAL_NG,
+                             FINAL_NASAL_NN, FINAL_STOP, final_type_code, np)
+
+
+# 前字類別：前四個與韻尾類型代碼相同，另加「詞首」
+WORD_START = 4
+
+# 聲母類化規則（輸入式聲母）：{前字韻尾類型: {本音聲母: 類化聲母}}
+ASSIMILATION_RULES: Dict[int, Dict[str, str]] = {
+    FINAL_NASAL_NG: {
+        "b": "m", "p": "m",
+        "d": "n", "t": "n", "l": "n", "c": "n", "ch": "n", "s": "n",
+        "g": "ng", "k": "ng", "h": "ng", "": "ng",
+    },
+    FINAL_STOP: {},
+    FINAL_OPEN: {
+        "b": "", "p": "", "g": "", "k": "", "h": "",
+        "d": "l", "t": "l", "c": "l", "ch": "l", "s": "l",
+    },
+    FINAL_NASAL_NN: {
+        "b": "", "p": "", "g": "", "k": "", "h": "",
+        "d": "l", "t": "l", "c": "l", "ch": "l", "s": "l",
+    },
+}
+
+# 前字陰聲韻、後字鼻化韻
+NASAL_FINAL_RULES: Dict[str, str] = {"b": "m", "p": "m", "d": "n", "t": "n"}
+
+# 前字鼻化韻、後字非鼻化韻（鼻化延展）
+NASAL_SPREAD_RULES: Dict[str, str] = {
+    "b": "m", "p": "m",
+    "d": "n", "t": "n", "l": "n", "c": "n", "ch": "n", "s": "n",
+}
+
+NASAL_INITIALS = ("m", "n", "ng")
+
+
+class AssimilationEngine:
+    """正向聲母類化與連讀變調"""
+
+    def __init__(self, tone_sandhi: Optional[Dict[Tuple[str, str], str]] = None,
+                 nasal_spread: bool = False, arrays: Optional[SyllableArrays] = None):
+        """
+        Args:
+            tone_sandhi: 連讀變調表 {(本調, 後字本調): 變調}（None 表示不變調）
+            nasal_spread: 前字鼻化韻時是否使用鼻化延展規則（否則同陰聲韻）
+            arrays: 音節編號查找陣列（預設新建）
+        """
+        self.tone_sandhi = dict(tone_sandhi or {})
+        self.nasal_spread = nasal_spread
+        self.arrays = arrays if arrays is not None else SyllableArrays()
+        self.table = self.arrays.table
+        self._size = -1
+        self.refresh()
+
+    # ========== 規則 ==========
+
+    def assimilate(self, syllable: str, prev_type: int) -> str:
+        """
+        單個輸入式音節的聲母類化
+
+        Args:
+            syllable: 本音（如 "gu1"）
+            prev_type: 前字韻尾類型代碼，詞首為 WORD_START
+
+        Returns:
+            類化後的音節；不類化或結果不合法時返回原音節
+        """
+        if prev_type == WORD_START:
+            return syllable
+        initial, final, tone = self.table.split_input(syllable)
+        nasal_final = final.endswith("nn")
+
+        if prev_type == FINAL_OPEN and nasal_final and initial in NASAL_FINAL_RULES:
+            new_initial = NASAL_FINAL_RULES[initial]
+        elif (prev_type == FINAL_NASAL_NN and self.nasal_spread and not nasal_final
+              and initial in NASAL_SPREAD_RULES):
+            new_initial = NASAL_SPREAD_RULES[initial]
+        else:
+            new_initial = ASSIMILATION_RULES[prev_type].get(initial, initial)
+
+        if new_initial == initial:
+            return syllable
+        if new_initial in NASAL_INITIALS and nasal_final:
+            final = final[:-2]
+
+        surface = new_initial + final + tone
+        surface_id = self.table.lookup(surface)
+        if surface_id is None or surface_id >= self.table.static_size:
+            return syllable
+        return surface
+
+    def apply_sandhi(self, syllable: str, next_tone: str) -> str:
+        """單個輸入式音節的連讀變調（next_tone 為後字本調，詞末為空字串）"""
+        initial, final, tone = self.table.split_input(syllable)
+        new_tone = self.tone_sandhi.get((tone, next_tone)) if next_tone else None
+        if not new_tone or new_tone == tone:
+            return syllable
+        surface = initial + final + new_tone
+        return surface if self.table.lookup(surface) is not None else syllable
+
+    # ========== 查找陣列 ==========
+
+    def refresh(self):
+        """展開規則為查找陣列（編號表追加動態編號後呼叫）"""
+        table = self.table
+        if len(table) == self._size:
+            return
+        self.arrays.refresh()
+        size = len(table)
+        forms = table.forms["input"]
+        intern = table.intern
+
+        def surface_id(syllable_id: int, syllable: Optional[str]) -> int:
+            return intern(syllable) if syllable is not None else syllable_id
+
+        # assimilation[前字類別][編號] -> 類化後編號
+        assimilation = []
+        for prev_type in (FINAL_OPEN, FINAL_NASAL_NG, FINAL_NASAL_NN, FINAL_STOP, WORD_START):
+            assimilation.append([
+                surface_id(i, self.assimilate(forms[i], prev_type) if forms[i] else None)
+                for i in range(size)])
+
+        # sandhi[後字本調][編號] -> 變調後編號（0 表示詞末）
+        sandhi = []
+        for next_tone in range(8):
+            tone_str = str(next_tone) if next_tone else ""
+            sandhi.append([
+                surface_id(i, self.apply_sandhi(forms[i], tone_str) if forms[i] else None)
+                for i in range(size)])
+
+        # 建表時只查合法音節，不會再追加編號
+        assert len(table) == size
+        if self.arrays.use_numpy:
+            self.assimilation = np.array(assimilation, dtype=np.intp)
+            self.sandhi = np.array(sandhi, dtype=np.intp)
+        else:
+            self.assimilation = [array('I', row) for row in assimilation]
+            self.sandhi = [array('I', row) for row in sandhi]
+        self._size = size
+
+    # ========== 整批轉換 ==========
+
+    def surface_ids(self, codes: CodeArray):
+        """
+        整批詞的實際讀音編號
+
+        Args:
+            codes: SyllableArrays.encode_codes() 的結果（本音）
+
+        Returns:
+            與 codes.ids 等長的編號陣列
+        """
+        self.refresh()
+        ids, offsets = codes.ids, codes.offsets
+        arrays = self.arrays
+
+        if arrays.use_numpy:
+            n = len(ids)
+            if n == 0:
+                return ids
+            prev_type = np.full(n, WORD_START, dtype=np.intp)
+            prev_type[1:] = arrays.final_types(ids[:-1])
+            starts = offsets[:-1][offsets[:-1] < n]
+            prev_type[starts] = WORD_START
+
+            next_tone = np.zeros(n, dtype=np.intp)
+            next_tone[:-1] = arrays.tone_numbers(ids[1:])
+            ends = offsets[1:][offsets[1:] > offsets[:-1]] - 1
+            next_tone[ends] = 0
+
+            assimilated = self.assimilation[prev_type, ids]
+            return self.sandhi[next_tone, assimilated]
+
+        final_types = arrays.final_types(ids)
+        tones = arrays.tone_numbers(ids)
+        result = array('I', ids)
+        for start, end in zip(offsets, offsets[1:]):
+            for i in range(start, end):
+                prev_type = final_types[i - 1] if i > start else WORD_START
+                next_tone = tones[i + 1] if i + 1 < end else 0
+                result[i] = self.sandhi[next_tone][self.assimilation[prev_type][ids[i]]]
+        return result
+
+    def surface_codes(self, codes: Iterable[str]) -> List[Optional[str]]:
+        """
+        整批將本音詞編碼轉為實際讀音
+
+        Args:
+            codes: 輸入式詞編碼（空格分隔的音節）
+
+        Returns:
+            每個詞的實際讀音編碼（含無法解析音節的詞為 None）
+        """
+        encoded = self.arrays.encode_codes(codes, "input")
+        return self.arrays.translate(CodeArray(self.surface_ids(encoded), encoded.offsets),
+                                     "input")
+
+    def surface(self, code: str) -> Optional[str]:
+        """單個詞的實際讀音"""
+        return self.surface_codes([code])[0]
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    from rime_dict import iter_entries
+
+    # 以漢字版平話字詞庫測試整批類化速度
+    dict_file = Path(__file__).parent.parent / "bannuaci" / "borhlang_bannuaci_han.dict.yaml"
+    codes = [entry.code for entry in iter_entries(dict_file)]
+
+    engine = AssimilationEngine()
+    for sample in ["sing1 gu1", "po2 cheng2", "pah6 bo2", "ang1 bann1", "hing1 hua4"]:
+        print(f"{sample} -> {engine.surface(sample)}")
+
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    batch = codes * repeat
+    print(f"\n詞條數：{len(batch)}（numpy：{'有' if np is not None else '無'}）")
+
+    # 逐字套用規則（不經查找陣列）作為對照
+    start = time.perf_counter()
+    expected = []
+    for code in batch:
+        syllables = code.split()
+        surface = []
+        for i, syllable in enumerate(syllables):
+            prev = syllables[i - 1] if i else None
+            prev_type = final_type_code(engine.table.split_input(prev)[1]) if prev else WORD_START
+            next_tone = engine.table.split_input(syllables[i + 1])[2] if i + 1 < len(syllables) else ""
+            surface.append(engine.apply_sandhi(engine.assimilate(syllable, prev_type), next_tone))
+        expected.append(" ".join(surface))
+    print(f"逐字類化：{time.perf_counter() - start:.3f} 秒")
+
+    for use_numpy in ([True, False] if np is not None else [False]):
+        batch_engine = AssimilationEngine(arrays=SyllableArrays(use_numpy=use_numpy))
+        start = time.perf_counter()
+        results = batch_engine.surface_codes(batch)
+        elapsed = time.perf_counter() - start
+        label = "numpy" if use_numpy else "純 Python"
+        print(f"整批類化（{label}）：{elapsed:.3f} 秒，結果{'一致' if results == expected else '不一致'}")
+
+    changed = sum(1 for code, surface in zip(codes, results[:len(codes)])
+                  if surface is not None and surface != code)
+    print(f"詞庫中讀音有變化的詞：{changed} / {len(codes)}")
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+欄式二進位詞庫
+Compact Columnar Binary Lexicon
+
+與 .dict.yaml 並存的緊湊二進位格式（.lexicon.bin）。詞條不存成個別物件，
+而是幾個平行的陣列：
+
+    漢字       字串池（去重後的 UTF-8）＋ 每個詞條的字串編號
+    編碼       檔內音節表 ＋ 攤平的音節編號陣列（u16）＋ 每個詞條的起訖位移
+    權重       i32 陣列
+    旗標       u16 陣列：第 0-13 位為來源（見 sources），另有百分比權重、無權重欄兩位
+
+編碼中的音節以單一空格重新連接（原檔多餘的空白不保留）。
+載入時只做一次 read()，各欄以 memoryview 直接對應到檔案內容，
+只有檔內音節表（數千個音節）會解碼成字串；個別詞條在存取時才解碼。
+
+檔案格式（little-endian，每段對齊 4 位元組）：
+    標頭       magic "RLEX"、版本 u16、保留 u16、
+               詞條數、字串數、字串池位元組數、音節數、音節池位元組數、
+               音節編號總數、中繼資料位元組數（皆為 u32）
+    字串位移   u32 × (字串數 + 1)
+    字串池     bytes
+    音節位移   u32 × (音節數 + 1)
+    音節池     bytes
+    字串編號   u32 × 詞條數
+    編碼位移   u32 × (詞條數 + 1)
+    權重       i32 × 詞條數
+    旗標       u16 × 詞條數
+    音節編號   u16 × 音節編號總數
+    中繼資料   JSON（拼音系統、詞庫名稱、來源名稱）
+"""
+
+import json
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from output_files import write_file_if_changed
+from rime_dict import DEFAULT_WEIGHT, DictEntry, iter_entries, parse_weight
+from syllable_arrays import CodeArray, SyllableArrays, np
+
+PathLike = Union[str, Path]
+
+LEXICON_MAGIC = b"RLEX"
+LEXICON_VERSION = 1
+LEXICON_SUFFIX = ".lexicon.bin"
+
+_HEADER = struct.Struct("<4sHHIIIIIII")
+
+# 旗標位元（來源最多 14 個，佔第 0-13 位）
+MAX_SOURCES = 14
+FLAG_PERCENT = 1 << 14     # 權重為百分比（如 "90%"）
+FLAG_NO_WEIGHT = 1 << 15   # 原詞條沒有權重欄
+SOURCE_MASK = (1 << MAX_SOURCES) - 1
+
+
+def lexicon_path(dict_file: PathLike) -> Path:
+    """詞庫對應的二進位詞庫路徑（如 borhlang_pouleng.dict.yaml -> borhlang_pouleng.lexicon.bin）"""
+    dict_file = Path(dict_file)
+    name = dict_file.name
+    if name.endswith(".dict.yaml"):
+        name = name[:-len(".dict.yaml")]
+    return dict_file.with_name(name + LEXICON_SUFFIX)
+
+
+def _write_section(f, section: Union[array, bytes, bytearray]):
+    """寫入一段（陣列一律寫成 little-endian）並補齊到 4 位元組邊界"""
+    if isinstance(section, array):
+        if sys.byteorder != 'little':
+            section = array(section.typecode, section)
+            section.byteswap()
+        section.tofile(f)
+    else:
+        f.write(section)
+    f.write(b"\0" * (-f.tell() % 4))
+
+
+def write_binary_lexicon(output_file: PathLike, entries: Iterable[Sequence], system: str,
+                         name: str = "", sources: Sequence[str] = ()) -> bool:
+    """
+    寫出二進位詞庫
+
+    Args:
+        output_file: 輸出路徑
+        entries: (漢字, 編碼, 權重[, 來源位元]) 序列；權重可為整數、"90%" 形式的字串或 None，
+                 來源位元的第 k 位表示詞條出現在 sources[k]
+        system: 編碼所屬的拼音系統（"psp"、"input"、"buc"）
+        name: 詞庫名稱
+        sources: 來源名稱（最多 MAX_SOURCES 個）
+
+    Returns:
+        檔案是否被更新（內容與現有檔案相同時不改寫）
+
+    Raises:
+        ValueError: 來源過多或檔內音節超過 65536 個
+    """
+    if len(sources) > MAX_SOURCES:
+        raise ValueError(f"來源最多 {MAX_SOURCES} 個：{sources}")
+
+    text_index: Dict[str, int] = {}
+    text_pool = bytearray()
+    text_offsets = array('I', [0])
+    syllable_index: Dict[str, int] = {}
+    syllable_pool = bytearray()
+    syllable_offsets = array('I', [0])
+    text_ids = array('I')
+    code_offsets = array('I', [0])
+    code_ids = array('H')
+    weights = array('i')
+    flags = array('H')
+
+    for entry in entries:
+        text, code, weight = entry[0], entry[1], entry[2]
+        source_bits = entry[3] if len(entry) > 3 else 0
+
+        text_id = text_index.get(text)
+        if text_id is None:
+            text_id = text_index[text] = len(text_offsets) - 1
+            text_pool.extend(text.encode('utf-8'))
+            text_offsets.append(len(text_pool))
+        text_ids.append(text_id)
+
+        for syllable in code.split():
+            syllable_id = syllable_index.get(syllable)
+            if syllable_id is None:
+                syllable_id = syllable_index[syllable] = len(syllable_offsets) - 1
+                if syllable_id > 0xFFFF:
+                    raise ValueError("檔內音節超過 65536 個，無法以 u16 編號")
+                syllable_pool.extend(syllable.encode('utf-8'))
+                syllable_offsets.append(len(syllable_pool))
+            code_ids.append(syllable_id)
+        code_offsets.append(len(code_ids))
+
+        flag = source_bits & SOURCE_MASK
+        if weight is None or weight == '':
+            flag |= FLAG_NO_WEIGHT
+            weights.append(DEFAULT_WEIGHT)
+        elif isinstance(weight, int):
+            weights.append(weight)
+        else:
+            if weight.strip().endswith('%'):
+                flag |= FLAG_PERCENT
+            weights.append(parse_weight(weight))
+        flags.append(flag)
+
+    meta = json.dumps({"system": system, "name": name, "sources": list(sources)},
+                      ensure_ascii=False).encode('utf-8')
+
+    # 各段直接寫到暫存檔，不另外在記憶體中拼出整個檔案
+    def write(f):
+        f.write(_HEADER.pack(
+            LEXICON_MAGIC, LEXICON_VERSION, 0, len(text_ids), len(text_offsets) - 1,
+            len(text_pool), len(syllable_offsets) - 1, len(syllable_pool), len(code_ids),
+            len(meta)))
+        for section in (text_offsets, text_pool, syllable_offsets, syllable_pool,
+                        text_ids, code_offsets, weights, flags, code_ids, meta):
+            _write_section(f, section)
+
+    return write_file_if_changed(output_file, write)
+
+
+def convert_dict_file(dict_file: PathLike, system: str,
+                      output_file: Optional[PathLike] = None) -> bool:
+    """
+    由 .dict.yaml 產生二進位詞庫（沒有來源資訊）
+
+    Args:
+        dict_file: 詞庫路徑
+        system: 編碼所屬的拼音系統
+        output_file: 輸出路徑（預設 lexicon_path(dict_file)）
+
+    Returns:
+        檔案是否被更新
+    """
+    output_file = Path(output_file) if output_file is not None else lexicon_path(dict_file)
+    name = Path(dict_file).name.split('.')[0]
+    return write_binary_lexicon(output_file, ((entry.text, entry.code, entry.weight)
+                                              for entry in iter_entries(dict_file)),
+                                system, name)
+
+
+class BinaryLexicon:
+    """
+    載入的二進位詞庫
+
+    公開的欄位皆為陣列視圖（memoryview，或大端序機器上的 array）：
+        text_ids      每個詞條的漢字字串編號
+        code_offsets  第 i 個詞條的音節編號為 code_ids[code_offsets[i]:code_offsets[i + 1]]
+        code_ids      檔內音節編號（對應 syllables）
+        weights       整數權重
+        flags         來源與權重格式旗標
+    """
+
+    def __init__(self, data: bytes):
+        """
+        Args:
+            data: 整個檔案的內容
+
+        Raises:
+            ValueError: 格式或版本不符
+        """
+        (magic, version, _, count, text_count, text_bytes, syllable_count,
+         syllable_bytes, code_count, meta_bytes) = _HEADER.unpack_from(data)
+        if magic != LEXICON_MAGIC or version != LEXICON_VERSION:
+            raise ValueError("二進位詞庫格式或版本不符")
+
+        self._data = data
+        view = memoryview(data)
+        position = _HEADER.size
+
+        def take(size: int, typecode: Optional[str] = None):
+            nonlocal position
+            section = view[position:position + size]
+            position += size + (-size % 4)
+            if typecode is None:
+                return section
+            if sys.byteorder == 'little':
+                return section.cast(typecode)
+            values = array(typecode)
+            values.frombytes(section)
+            values.byteswap()
+            return values
+
+        self.count = count
+        self._text_offsets = take(4 * (text_count + 1), 'I')
+        self._text_pool = take(text_bytes)
+        syllable_offsets = take(4 * (syllable_count + 1), 'I')
+        syllable_pool = bytes(take(syllable_bytes))
+        self.text_ids = take(4 * count, 'I')
+        self.code_offsets = take(4 * (count + 1), 'I')
+        self.weights = take(4 * count, 'i')
+        self.flags = take(2 * count, 'H')
+        self.code_ids = take(2 * code_count, 'H')
+        meta = json.loads(bytes(take(meta_bytes)).decode('utf-8'))
+
+        # 檔內音節表（數量只有數千，直接解碼）
+        self.syllables: List[str] = [
+            syllable_pool[syllable_offsets[i]:syllable_offsets[i + 1]].decode('utf-8')
+            for i in range(syllable_count)]
+        self.system: str = meta["system"]
+        self.name: str = meta["name"]
+        self.sources: List[str] = meta["sources"]
+
+    @classmethod
+    def load(cls, lexicon_file: PathLike) -> "BinaryLexicon":
+        """以一次 read() 載入二進位詞庫"""
+        with open(lexicon_file, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        """載入後佔用的資料大小（即檔案大小）"""
+        return len(self._data)
+
+    # ========== 單一詞條 ==========
+
+    def text(self, i: int) -> str:
+        text_id = self.text_ids[i]
+        return bytes(self._text_pool[self._text_offsets[text_id]:
+                                     self._text_offsets[text_id + 1]]).decode('utf-8')
+
+    def syllable_ids(self, i: int) -> Sequence[int]:
+        """第 i 個詞條的檔內音節編號"""
+        return self.code_ids[self.code_offsets[i]:self.code_offsets[i + 1]]
+
+    def code(self, i: int) -> str:
+        syllables = self.syllables
+        return " ".join(syllables[syllable_id] for syllable_id in self.syllable_ids(i))
+
+    def weight(self, i: int) -> Optional[str]:
+        """權重欄原文（無權重欄為 None；百分比加上 "%"）"""
+        flag = self.flags[i]
+        if flag & FLAG_NO_WEIGHT:
+            return None
+        return f"{self.weights[i]}%" if flag & FLAG_PERCENT else str(self.weights[i])
+
+    def entry_sources(self, i: int) -> List[str]:
+        """第 i 個詞條出現的來源"""
+        flag = self.flags[i]
+        return [source for bit, source in enumerate(self.sources) if flag & (1 << bit)]
+
+    def entry(self, i: int) -> DictEntry:
+        return DictEntry(self.text(i), self.code(i), self.weight(i))
+
+    def __iter__(self) -> Iterator[DictEntry]:
+        for i in range(self.count):
+            yield self.entry(i)
+
+    # ========== 整批 ==========
+
+    def source_mask(self, source: str) -> int:
+        """來源對應的旗標位元"""
+        return 1 << self.sources.index(source)
+
+    def to_code_array(self, arrays: SyllableArrays) -> CodeArray:
+        """
+        將全部編碼轉為 SyllableTable 編號的 CodeArray（供 syllable_arrays / assimilation 整批處理）
+
+        只需把檔內音節表逐一編號一次，再以查找陣列對應整個音節編號陣列。
+        """
+        table = arrays.table
+        mapping = array('I', (table.intern(syllable, self.system) for syllable in self.syllables))
+        arrays.refresh()
+        if arrays.use_numpy:
+            lookup = np.frombuffer(mapping, dtype=np.uint32).astype(np.intp)
+            ids = lookup[np.frombuffer(self.code_ids, dtype=np.uint16)]
+            offsets = np.frombuffer(self.code_offsets, dtype=np.uint32).astype(np.intp)
+            return CodeArray(ids, offsets)
+        return CodeArray(array('I', (mapping[i] for i in self.code_ids)),
+                         array('I', self.code_offsets))
+
+
+if __name__ == "__main__":
+    import tracemalloc
+
+    from rime_dict import load_entries
+
+    # 與「整個詞庫讀成 {(漢字, 編碼): 權重}」比較大小與載入時間
+    base_dir = Path(__file__).parent.parent
+    targets = [
+        (base_dir / "pouseng_pinging" / "borhlang_pouleng.dict.yaml", "psp"),
+        (base_dir / "bannuaci" / "borhlang_bannuaci_han.dict.yaml", "input"),
+        (base_dir / "bannuaci" / "borhlang_bannuaci.dict.yaml", "input"),
+    ]
+
+    def measure(func):
+        """返回 (結果, 秒數, 峰值記憶體)"""
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, elapsed, peak
+
+    for dict_file, system in targets:
+        output = lexicon_path(dict_file)
+        if not output.exists():
+            convert_dict_file(dict_file, system)
+
+        entries, dict_time, dict_peak = measure(
+            lambda: {(e.text, e.code): e.weight_value()
+                     for e in load_entries(dict_file, use_cache=False)})
+        lexicon, load_time, load_peak = measure(lambda: BinaryLexicon.load(output))
+
+        # 編碼中的音節以單一空格重新連接，比較時同樣正規化
+        same = all((e.text, " ".join(e.code.split()), e.weight) == (f.text, f.code, f.weight)
+                   for e, f in zip(iter_entries(dict_file), lexicon))
+        print(f"{dict_file.name}：{len(lexicon)} 條，二進位檔 {lexicon.nbytes / 1024:.0f} KB"
+              f"（{lexicon.nbytes / len(lexicon):.0f} 位元組/條），內容{'一致' if same else '不一致'}")
+        print(f"  字典：{dict_time * 1000:6.1f} ms，{dict_peak / 1024:7,.0f} KB"
+              f"（{dict_peak / len(entries):.0f} 位元組/條）")
+        print(f"  二進位：{load_time * 1000:5.2f} ms，{load_peak / 1024:7,.0f} KB"
+              f"（{load_peak / len(lexicon):.0f} 位元組/條）")
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+建置工作相依圖
+In-Process Build Graph
+
+把建置步驟描述成有相依關係的工作，在同一個行程中依拓撲順序執行：
+每個工作收到其相依工作的返回值（解析好的詞條等），不必再從檔案重新解析，
+也省去每個步驟重新啟動直譯器、重新匯入模組與載入轉換表的時間。
+
+- 工作以 TaskFailed 或其他例外表示失敗
+- 選用（optional）工作失敗時，相依它的工作照常執行，收到的值為 None；
+  必要工作失敗時，相依它的工作一律略過
+- 每個工作的輸出（stdout、stderr）另行收集，工作結束後整段印出，
+  最後以 BuildReport.summary() 彙整所有工作的狀態與耗時
+- 有工作相依的返回值在這些工作都執行完後即釋放（報告中為 None），
+  大量詞條不會一直留到建置結束
+
+平行建置（run(jobs=N)，N > 1）：
+標為 process 的工作（只讀寫檔案、不需要相依工作的返回值）一就緒就交給行程池，
+與本行程中依序執行的工作同時進行。各工作的輸出仍依拓撲順序整段印出，
+日誌與循序建置時的順序相同。
+
+增量建置（指定 manifest_file 時）：
+工作列出輸入檔（資料與程式碼）與輸出檔，建置紀錄（manifest）記下每個工作
+上次成功時輸入檔內容的指紋與輸出檔的 SHA-1。輸入內容都沒變、輸出檔也沒被改動時，
+工作標為「最新」直接略過，返回值為 None（相依它的工作須改從輸出檔讀取）。
+上游工作重新執行但輸出內容相同時，下游工作同樣會被略過。
+程式碼輸入只需列出工作直接使用的模組，module_closure() 會補上它們遞移匯入的本地模組。
+必要輸入檔（requires）不存在時工作不執行，標為略過（沿用現有的輸出檔）。
+
+用法：
+    graph = BuildGraph()
+    graph.add("merge", lambda inputs: merge(), description="合併詞彙")
+    graph.add("convert", lambda inputs: convert(inputs["merge"]), deps=["merge"])
+    report = graph.run()
+    print(report.summary())
+"""
+
+import ast
+import contextlib
+import hashlib
+import io
+import json
+import sys
+import time
+import traceback
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from output_files import write_text_if_changed
+from parse_cache import file_digest
+
+PathLike = Union[str, Path]
+
+# 建置紀錄的格式版本（改變指紋的計算方式時遞增）
+MANIFEST_VERSION = 1
+
+# 工作狀態
+OK = "ok"
+FRESH = "fresh"         # 輸入沒變，未重新執行
+FAILED = "failed"
+SKIPPED = "skipped"
+
+_STATUS_LABELS = {OK: "完成", FRESH: "最新", FAILED: "失敗", SKIPPED: "略過"}
+_DONE = (OK, FRESH)
+
+# 不存在的檔案的指紋
+_MISSING = "missing"
+
+
+class TaskFailed(Exception):
+    """工作失敗（訊息即失敗原因，不印出 traceback）"""
+
+
+class BuildTask(NamedTuple):
+    """建置工作"""
+    name: str
+    run: Callable[[Dict[str, Any]], Any]    # 參數為 {相依工作名稱: 返回值}
+    deps: tuple = ()
+    description: str = ""
+    optional: bool = False                  # 失敗時不影響相依的工作
+    inputs: tuple = ()                      # 輸入檔（含程式碼）；空則每次都執行
+    outputs: tuple = ()                     # 輸出檔
+    process: bool = False                   # 可交給子行程執行（見 BuildGraph.add）
+    requires: tuple = ()                    # 必要的輸入檔（不存在時略過工作）
+
+
+class TaskResult(NamedTuple):
+    """工作執行結果"""
+    task: BuildTask
+    status: str                 # OK、FAILED 或 SKIPPED
+    seconds: float
+    value: Any = None           # 工作的返回值
+    log: str = ""               # 工作的輸出
+    error: str = ""             # 失敗或略過的原因
+
+
+class BuildReport:
+    """整次建置的結果"""
+
+    def __init__(self, results: List[TaskResult], seconds: float):
+        self.results = results
+        self.seconds = seconds
+
+    def __getitem__(self, name: str) -> TaskResult:
+        for result in self.results:
+            if result.task.name == name:
+                return result
+        raise KeyError(name)
+
+    @property
+    def ok(self) -> bool:
+        """所有必要工作是否都完成"""
+        return all(result.status in _DONE or result.task.optional for result in self.results)
+
+    def summary(self) -> str:
+        """各工作的狀態與耗時"""
+        width = max((_display_width(result.task.description or result.task.name)
+                     for result in self.results), default=0)
+        lines = ["建置摘要："]
+        for result in self.results:
+            task = result.task
+            label = _STATUS_LABELS[result.status]
+            if result.status not in _DONE and task.optional:
+                label += "（選用）"
+            line = (f"  {_ljust(task.description or task.name, width)}  {_ljust(label, 12)}"
+                    f"{result.seconds:7.2f} 秒")
+            if result.error:
+                line += f"  {result.error}"
+            lines.append(line)
+        lines.append(f"  共 {self.seconds:.2f} 秒")
+        return "\n".join(lines)
+
+
+def _display_width(text: str) -> int:
+    """終端機顯示寬度（全形字元算兩格）"""
+    return sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in text)
+
+
+def _ljust(text: str, width: int) -> str:
+    """依顯示寬度靠左補空白"""
+    return text + " " * (width - _display_width(text))
+
+
+class BuildGraph:
+    """建置工作的相依圖"""
+
+    def __init__(self, manifest_file: Optional[PathLike] = None, force: bool = False):
+        """
+        Args:
+            manifest_file: 建置紀錄路徑（None 則不做增量建置，每次執行所有工作）
+            force: 忽略建置紀錄，重新執行所有工作（執行後仍更新紀錄）
+        """
+        self.tasks: Dict[str, BuildTask] = {}
+        self.manifest_file = Path(manifest_file) if manifest_file is not None else None
+        self.force = force
+
+    def add(self, name: str, run: Callable[[Dict[str, Any]], Any],
+            deps: Iterable[str] = (), description: str = "", optional: bool = False,
+            inputs: Iterable[PathLike] = (), outputs: Iterable[PathLike] = (),
+            process: bool = False, requires: Iterable[PathLike] = ()):
+        """
+        加入工作
+
+        Args:
+            name: 工作名稱
+            run: 執行函數，參數為 {相依工作名稱: 返回值}
+            deps: 相依的工作名稱
+            description: 顯示用的說明
+            optional: 失敗時是否仍執行相依的工作
+            inputs: 輸入檔，含會影響結果的程式碼（增量建置用）
+            outputs: 輸出檔（增量建置用）
+            process: 平行建置時可交給子行程執行。run 須可 pickle（模組層級的函數或其
+                     functools.partial），返回值也須可 pickle；子行程中的工作收不到相依工作的
+                     返回值（參數為空 dict），須從相依工作的輸出檔讀取
+            requires: 必要的輸入檔（也會加入 inputs）；有任何一個不存在時不執行工作，
+                      標為略過，輸出檔保持不動
+
+        Raises:
+            ValueError: 名稱重複
+        """
+        if name in self.tasks:
+            raise ValueError(f"工作名稱重複：{name}")
+        requires = tuple(Path(path).resolve() for path in requires)
+        inputs = tuple(Path(path).resolve() for path in inputs)
+        self.tasks[name] = BuildTask(name, run, tuple(deps), description, optional,
+                                     requires + tuple(path for path in inputs if path not in requires),
+                                     tuple(Path(path).resolve() for path in outputs), process,
+                                     requires)
+
+    def order(self) -> List[BuildTask]:
+        """
+        拓撲排序（每次取加入順序最前、相依工作都已排入的工作）
+
+        Raises:
+            ValueError: 相依未定義的工作或有循環相依
+        """
+        for task in self.tasks.values():
+            for dep in task.deps:
+                if dep not in self.tasks:
+                    raise ValueError(f"工作 {task.name} 相依未定義的工作 {dep}")
+        ordered: List[BuildTask] = []
+        done = set()
+        pending = list(self.tasks.values())
+        while pending:
+            task = next((task for task in pending if all(dep in done for dep in task.deps)), None)
+            if task is None:
+                raise ValueError(f"循環相依：{', '.join(task.name for task in pending)}")
+            ordered.append(task)
+            done.add(task.name)
+            pending.remove(task)
+        return ordered
+
+    def run_task(self, task: BuildTask, results: Dict[str, TaskResult]) -> TaskResult:
+        """在本行程執行單一工作（相依工作的結果須已在 results 中）"""
+        blocked = self._blocked(task, results)
+        if blocked:
+            return TaskResult(task, SKIPPED, 0.0, error=f"相依的工作未完成：{', '.join(blocked)}")
+        inputs = {dep: results[dep].value for dep in task.deps}
+        return TaskResult(task, *_run_captured(task.run, inputs))
+
+    def run(self, echo: bool = True, jobs: int = 1) -> BuildReport:
+        """
+        執行所有工作
+
+        jobs > 1 時，標為 process 的工作一就緒就交給行程池，與本行程中的工作同時執行；
+        其餘工作依拓撲順序在本行程逐一執行。輸出一律依拓撲順序印出，與循序執行時相同。
+
+        Args:
+            echo: 每個工作結束後印出其輸出
+            jobs: 同時執行的子行程數（1 為全部在本行程循序執行）
+
+        Returns:
+            BuildReport
+        """
+        start = time.perf_counter()
+        ordered = self.order()
+        manifest = self.load_manifest()
+        digests: Dict[Path, str] = {}   # 本次建置中已計算的檔案指紋
+        waiting = {task.name: 0 for task in ordered}    # 尚未執行的相依工作數
+        for task in ordered:
+            for dep in task.deps:
+                waiting[dep] += 1
+
+        results: Dict[str, TaskResult] = {}
+        keys: Dict[str, Optional[str]] = {}
+        running: Dict[Future, BuildTask] = {}
+        printed = 0
+
+        def finish(task: BuildTask, result: TaskResult):
+            if result.status != FRESH:
+                for output in task.outputs:
+                    digests.pop(output, None)
+                if keys[task.name] is not None and result.status == OK:
+                    manifest[task.name] = {
+                        "key": keys[task.name],
+                        "outputs": {str(output): self._digest(output, digests)
+                                    for output in task.outputs},
+                    }
+                else:
+                    manifest.pop(task.name, None)
+            results[task.name] = result
+            for dep in task.deps:
+                waiting[dep] -= 1
+                if waiting[dep] == 0:
+                    results[dep] = results[dep]._replace(value=None)
+
+        def collect(futures):
+            for future in futures:
+                task = running.pop(future)
+                try:
+                    finish(task, TaskResult(task, *future.result()))
+                except Exception as e:     # 子行程異常結束等
+                    finish(task, TaskResult(task, FAILED, 0.0, error=f"{type(e).__name__}: {e}"))
+
+        use_pool = jobs > 1 and any(task.process for task in ordered)
+        with (ProcessPoolExecutor(jobs) if use_pool else contextlib.nullcontext()) as pool:
+            pending = list(ordered)
+            while pending or running:
+                collect([future for future in running if future.done()])
+                ready = [task for task in pending if all(dep in results for dep in task.deps)]
+                local = None
+                for task in ready:
+                    keys[task.name] = None
+                    missing = [path.name for path in task.requires if not path.is_file()]
+                    if missing:
+                        finish(task, TaskResult(task, SKIPPED, 0.0,
+                                                error=f"缺少輸入檔：{', '.join(missing)}"))
+                        pending.remove(task)
+                        continue
+                    if self._incremental(task) and not self._blocked(task, results):
+                        keys[task.name] = self._task_key(task, digests)
+                    if self._is_fresh(task, keys[task.name], manifest, digests):
+                        finish(task, TaskResult(task, FRESH, 0.0))
+                    elif pool is not None and task.process and not self._blocked(task, results):
+                        running[pool.submit(_run_captured, task.run, {})] = task
+                    elif local is None:
+                        local = task
+                        continue
+                    else:
+                        continue
+                    pending.remove(task)
+
+                if local is not None:
+                    pending.remove(local)
+                    finish(local, self.run_task(local, results))
+                elif running and len(ready) == 0:
+                    collect(wait(running, return_when=FIRST_COMPLETED).done)
+
+                while echo and printed < len(ordered) and ordered[printed].name in results:
+                    print_result(results[ordered[printed].name])
+                    printed += 1
+
+        self.save_manifest(manifest)
+        return BuildReport([results[task.name] for task in ordered], time.perf_counter() - start)
+
+    def _is_fresh(self, task: BuildTask, key: Optional[str], manifest: Dict[str, dict],
+                  digests: Dict[Path, str]) -> bool:
+        """工作的輸入與輸出是否都與建置紀錄相同"""
+        record = manifest.get(task.name)
+        return (key is not None and not self.force and record is not None
+                and record.get("key") == key
+                and self._outputs_match(task, record.get("outputs", {}), digests))
+
+    @staticmethod
+    def _blocked(task: BuildTask, results: Dict[str, TaskResult]) -> List[str]:
+        """未完成的必要相依工作"""
+        return [dep for dep in task.deps
+                if results[dep].status not in _DONE and not results[dep].task.optional]
+
+    def _incremental(self, task: BuildTask) -> bool:
+        return self.manifest_file is not None and bool(task.inputs)
+
+    @staticmethod
+    def _digest(path: Path, digests: Dict[Path, str]) -> str:
+        """檔案內容的指紋（同一次建置中只計算一次）"""
+        if path not in digests:
+            digests[path] = file_digest(path) if path.is_file() else _MISSING
+        return digests[path]
+
+    def _task_key(self, task: BuildTask, digests: Dict[Path, str]) -> str:
+        """工作的指紋：所有輸入檔的內容與輸出檔的路徑"""
+        hasher = hashlib.sha1(f"{MANIFEST_VERSION}\0{task.name}\n".encode())
+        for path in task.inputs:
+            hasher.update(f"in\0{path}\0{self._digest(path, digests)}\n".encode())
+        for path in task.outputs:
+            hasher.update(f"out\0{path}\n".encode())
+        return hasher.hexdigest()
+
+    def _outputs_match(self, task: BuildTask, recorded: Dict[str, str],
+                       digests: Dict[Path, str]) -> bool:
+        """輸出檔是否都還在，且與上次建置寫出的內容相同（沒被手動修改或刪除）"""
+        for path in task.outputs:
+            digest = self._digest(path, digests)
+            if digest == _MISSING or recorded.get(str(path)) != digest:
+                return False
+        return True
+
+    def load_manifest(self) -> Dict[str, dict]:
+        """讀取建置紀錄 {工作名稱: {"key": 指紋, "outputs": {路徑: SHA-1}}}（不存在或損壞時為空）"""
+        if self.manifest_file is None:
+            return {}
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("tasks", {})
+
+    def save_manifest(self, manifest: Dict[str, dict]):
+        """寫入建置紀錄"""
+        if self.manifest_file is None:
+            return
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        write_text_if_changed(self.manifest_file, json.dumps(
+            {"version": MANIFEST_VERSION, "tasks": manifest},
+            ensure_ascii=False, indent=2, sort_keys=True) + "\n")
+
+
+def module_closure(files: Iterable[PathLike], search_dirs: Iterable[PathLike]) -> List[Path]:
+    """
+    程式檔及其遞移匯入的本地模組（用於列出工作的程式碼輸入）
+
+    以 ast 靜態分析 import 敘述（含函數內的匯入，不含 if __name__ == "__main__" 區塊），
+    只收入在 search_dirs 中找得到 .py 檔的模組；標準函式庫與第三方套件不列入。
+
+    Args:
+        files: 程式檔
+        search_dirs: 本地模組所在的目錄（依序尋找）
+
+    Returns:
+        依路徑排序的程式檔（含 files 本身）
+    """
+    search_dirs = [Path(directory).resolve() for directory in search_dirs]
+    found: Set[Path] = set()
+    pending = [Path(path).resolve() for path in files]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.add(path)
+        for module in _imported_modules(path):
+            for directory in search_dirs:
+                candidate = directory / f"{module.split('.')[0]}.py"
+                if candidate.is_file():
+                    pending.append(candidate)
+                    break
+    return sorted(found)
+
+
+def _imported_modules(source_file: Path) -> Iterator[str]:
+    """程式檔匯入的模組名稱"""
+    def visit(node: ast.AST) -> Iterator[str]:
+        for child in ast.iter_child_nodes(node):
+            if (isinstance(child, ast.If) and isinstance(child.test, ast.Compare)
+                    and isinstance(child.test.left, ast.Name) and child.test.left.id == "__name__"):
+                continue
+            if isinstance(child, ast.Import):
+                yield from (alias.name for alias in child.names)
+            elif isinstance(child, ast.ImportFrom):
+                if child.level == 0 and child.module:
+                    yield child.module
+            else:
+                yield from visit(child)
+
+    return visit(ast.parse(source_file.read_bytes(), filename=str(source_file)))
+
+
+def _run_captured(run: Callable[[Dict[str, Any]], Any],
+                  inputs: Dict[str, Any]) -> Tuple[str, float, Any, str, str]:
+    """
+    執行工作函數並收集其輸出（也在子行程中執行）
+
+    Returns:
+        TaskResult 除 task 外的欄位：(狀態, 秒數, 返回值, 輸出, 失敗原因)
+    """
+    buffer = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+            value = run(inputs)
+    except TaskFailed as e:
+        return FAILED, time.perf_counter() - start, None, buffer.getvalue(), str(e)
+    except Exception as e:
+        buffer.write(traceback.format_exc())
+        return (FAILED, time.perf_counter() - start, None, buffer.getvalue(),
+                f"{type(e).__name__}: {e}")
+    return OK, time.perf_counter() - start, value, buffer.getvalue(), ""
+
+
+def print_result(result: TaskResult, file=None):
+    """印出工作的標題與輸出"""
+    file = file if file is not None else sys.stdout
+    task = result.task
+    print("\n" + "=" * 70, file=file)
+    print(f">>> {task.description or task.name}", file=file)
+    print("=" * 70, file=file)
+    if result.status == FRESH:
+        print("[OK] 輸入檔沒有變更，沿用上次的輸出", file=file)
+    if result.log:
+        print(result.log.rstrip("\n"), file=file)
+    if result.status == FAILED:
+        print(f"[ERROR] {task.description or task.name}失敗：{result.error}", file=file)
+    elif result.status == SKIPPED:
+        print(f"[WARNING] 略過：{result.error}", file=file)
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+詞庫隨機查詢索引
+Memory-Mapped Dictionary Index
+
+在每個 .dict.yaml 旁寫出 .dict.yaml.idx：兩張排序好的行首位移表，
+分別以漢字與編碼（UTF-8 位元組順序）排序。查詢時以 mmap 開啟詞庫，
+在位移表上二分搜尋，只讀取比較到的幾行，不必把整個詞庫載入記憶體。
+
+索引檔格式（little-endian）：
+    標頭   magic "RDIX"、格式版本 u16、保留 u16、詞條數 u32、
+           詞庫大小 u64、詞庫修改時間 i64（ns）
+    漢字表 詞條數 × u32（行首位移，依漢字排序，同鍵依檔案順序）
+    編碼表 詞條數 × u32（依編碼排序）
+
+詞庫大小或修改時間與標頭不符時視為過期，DictIndex.open() 會自動重建。
+
+用法：
+    with DictIndex.open(dict_file) as index:
+        index.lookup_text("莆田")       # -> [DictEntry, ...]
+        index.lookup_code("po2 cheng2")
+        index.code_prefix("po2 ")
+"""
+
+import mmap
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+from output_files import write_file_if_changed
+from rime_dict import DictEntry
+
+PathLike = Union[str, Path]
+
+INDEX_MAGIC = b"RDIX"
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx"
+
+_HEADER = struct.Struct("<4sHHIQq")
+
+# 位移表中各欄的編號
+TEXT_FIELD = 0
+CODE_FIELD = 1
+
+
+def index_path(dict_file: PathLike) -> Path:
+    """詞庫對應的索引檔路徑"""
+    dict_file = Path(dict_file)
+    return dict_file.with_name(dict_file.name + INDEX_SUFFIX)
+
+
+def _source_stamp(dict_file: Path):
+    stat = dict_file.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def build_index(dict_file: PathLike) -> Path:
+    """
+    建立詞庫索引
+
+    詞條的判定與 rime_dict.iter_entries() 相同（跳過標頭、空行、註解與不足兩欄的行）。
+
+    Args:
+        dict_file: 詞庫路徑
+
+    Returns:
+        索引檔路徑
+    """
+    dict_file = Path(dict_file)
+    size, mtime_ns = _source_stamp(dict_file)
+    if size >= 1 << 32:
+        raise ValueError(f"詞庫超過 4 GB，無法以 u32 位移建立索引：{dict_file}")
+
+    text_keys = []
+    code_keys = []
+    with open(dict_file, 'rb') as f:
+        offset = 0
+        in_header = True
+        for raw in f:
+            line_offset = offset
+            offset += len(raw)
+            line = raw.strip()
+            if in_header:
+                if line == b'...':
+                    in_header = False
+                continue
+            if not line or line.startswith(b'#'):
+                continue
+            parts = line.split(b'\t', 2)
+            if len(parts) < 2:
+                continue
+            text_keys.append((parts[0], line_offset))
+            code_keys.append((parts[1], line_offset))
+
+    text_keys.sort()
+    code_keys.sort()
+    text_offsets = array('I', (line_offset for _, line_offset in text_keys))
+    code_offsets = array('I', (line_offset for _, line_offset in code_keys))
+    if sys.byteorder != 'little':
+        text_offsets.byteswap()
+        code_offsets.byteswap()
+
+    def write(f):
+        f.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, len(text_offsets), size, mtime_ns))
+        text_offsets.tofile(f)
+        code_offsets.tofile(f)
+
+    output = index_path(dict_file)
+    write_file_if_changed(output, write)
+    return output
+
+
+def is_fresh(dict_file: PathLike) -> bool:
+    """索引檔是否存在且與詞庫目前的內容相符"""
+    dict_file = Path(dict_file)
+    try:
+        with open(index_path(dict_file), 'rb') as f:
+            header = f.read(_HEADER.size)
+    except OSError:
+        return False
+    if len(header) != _HEADER.size:
+        return False
+    magic, version, _, _, size, mtime_ns = _HEADER.unpack(header)
+    return (magic == INDEX_MAGIC and version == INDEX_VERSION
+            and (size, mtime_ns) == _source_stamp(dict_file))
+
+
+class DictIndex:
+    """以 mmap 開啟的詞庫與其索引"""
+
+    def __init__(self, dict_file: PathLike):
+        """
+        Args:
+            dict_file: 詞庫路徑（索引檔須已存在且未過期，否則改用 DictIndex.open()）
+
+        Raises:
+            ValueError: 索引檔格式不符或已過期
+        """
+        self.dict_file = Path(dict_file)
+        with open(index_path(self.dict_file), 'rb') as f:
+            self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, size, mtime_ns = _HEADER.unpack_from(self._index_map)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self._index_map.close()
+            raise ValueError(f"索引檔格式不符：{index_path(self.dict_file)}")
+        if (size, mtime_ns) != _source_stamp(self.dict_file):
+            self._index_map.close()
+            raise ValueError(f"索引檔已過期：{index_path(self.dict_file)}")
+
+        self.count = count
+        table_bytes = count * 4
+        start = _HEADER.size
+        tables = memoryview(self._index_map)
+        if sys.byteorder == 'little':
+            self._tables = (tables[start:start + table_bytes].cast('I'),
+                            tables[start + table_bytes:start + 2 * table_bytes].cast('I'))
+        else:
+            self._tables = tuple(self._swapped(tables[begin:begin + table_bytes])
+                                 for begin in (start, start + table_bytes))
+        tables.release()
+
+        with open(self.dict_file, 'rb') as f:
+            self._dict_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @staticmethod
+    def _swapped(data) -> array:
+        offsets = array('I')
+        offsets.frombytes(data)
+        offsets.byteswap()
+        return offsets
+
+    @classmethod
+    def open(cls, dict_file: PathLike, rebuild: bool = True) -> "DictIndex":
+        """
+        開啟詞庫索引；索引不存在或過期時（rebuild=True）先重建
+
+        Raises:
+            ValueError: 索引不可用且 rebuild=False
+        """
+        if rebuild and not is_fresh(dict_file):
+            build_index(dict_file)
+        return cls(dict_file)
+
+    def close(self):
+        """釋放 mmap（之後不能再查詢）"""
+        for table in self._tables:
+            if isinstance(table, memoryview):
+                table.release()
+        self._index_map.close()
+        if isinstance(self._dict_map, mmap.mmap):
+            self._dict_map.close()
+
+    def __enter__(self) -> "DictIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    # ========== 讀取 ==========
+
+    def _line(self, offset: int) -> bytes:
+        end = self._dict_map.find(b'\n', offset)
+        return self._dict_map[offset:end if end != -1 else len(self._dict_map)].strip()
+
+    def _key(self, field: int, position: int) -> bytes:
+        return self._line(self._tables[field][position]).split(b'\t', 2)[field]
+
+    def _entry(self, offset: int) -> DictEntry:
+        parts = self._line(offset).decode('utf-8').split('\t')
+        return DictEntry(parts[0], parts[1], parts[2] if len(parts) > 2 else None)
+
+    def _lower_bound(self, field: int, key: bytes) -> int:
+        """第一個鍵 >= key 的位置"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(field, mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _scan(self, field: int, key: bytes, prefix: bool) -> Iterator[DictEntry]:
+        table = self._tables[field]
+        for position in range(self._lower_bound(field, key), self.count):
+            found = self._key(field, position)
+            if found != key and not (prefix and found.startswith(key)):
+                break
+            yield self._entry(table[position])
+
+    # ========== 查詢 ==========
+
+    def lookup_text(self, text: str) -> List[DictEntry]:
+        """以漢字查詢詞條（依檔案順序；line_number 為 0）"""
+        return list(self._scan(TEXT_FIELD, text.encode('utf-8'), False))
+
+    def lookup_code(self, code: str) -> List[DictEntry]:
+        """以完整編碼查詢詞條（依檔案順序）"""
+        return list(self._scan(CODE_FIELD, code.encode('utf-8'), False))
+
+    def code_prefix(self, prefix: str, limit: Optional[int] = None) -> List[DictEntry]:
+        """
+        編碼以 prefix 開頭的詞條（依編碼排序）
+
+        Args:
+            prefix: 編碼前綴（如 "po2 " 查所有以 po2 開頭的多音節詞）
+            limit: 最多返回幾條
+        """
+        results = []
+        for entry in self._scan(CODE_FIELD, prefix.encode('utf-8'), True):
+            if limit is not None and len(results) >= limit:
+                break
+            results.append(entry)
+        return results
+
+
+if __name__ == "__main__":
+    import random
+    import tracemalloc
+
+    from rime_dict import iter_entries
+
+    # 建索引，並與整個詞庫載入成字典的做法比較單次查詢
+    base_dir = Path(__file__).parent.parent
+    dict_file = Path(sys.argv[1]) if len(sys.argv) > 1 else \
+        base_dir / "bannuaci" / "borhlang_bannuaci_han.dict.yaml"
+
+    start = time.perf_counter()
+    build_index(dict_file)
+    print(f"建立索引：{(time.perf_counter() - start) * 1000:.1f} ms"
+          f"（{index_path(dict_file).stat().st_size / 1024:.0f} KB）")
+
+    def load_full():
+        full = {}
+        for entry in iter_entries(dict_file):
+            full.setdefault(entry.text, []).append(entry)
+        return full
+
+    def measure(func):
+        """返回 (結果, 秒數, 峰值記憶體)；時間與記憶體分兩次量測"""
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if isinstance(result, DictIndex):
+            result.close()
+        tracemalloc.start()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, elapsed, peak
+
+    full, load_time, full_peak = measure(load_full)
+    index, open_time, index_peak = measure(lambda: DictIndex.open(dict_file))
+
+    samples = random.Random(0).sample(sorted(full), 1000)
+    start = time.perf_counter()
+    mismatches = sum(1 for text in samples
+                     if [(e.text, e.code, e.weight) for e in index.lookup_text(text)] !=
+                     [(e.text, e.code, e.weight) for e in full[text]])
+    lookup_time = (time.perf_counter() - start) / len(samples)
+
+    print(f"整個載入：{load_time * 1000:.1f} ms，峰值記憶體 {full_peak / 1024:,.0f} KB")
+    print(f"開啟索引：{open_time * 1000:.2f} ms，峰值記憶體 {index_peak / 1024:,.0f} KB")
+    print(f"單次查詢：{lookup_time * 1e6:.1f} µs（抽查 {len(samples)} 個詞，不一致 {mismatches} 個）")
+    for text in ["莆田", "興化"]:
+        print(f"  {text}：{[(e.code, e.weight) for e in index.lookup_text(text)]}")
+    print(f"  po2 cheng2：{[e.text for e in index.lookup_code('po2 cheng2')]}")
+    index.close()
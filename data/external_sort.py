@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外部排序
+External Merge Sort
+
+輸入量超過記憶體時的排序：記錄先累積在記憶體中，每滿 run_size 筆就排序後
+寫成磁碟上的一段「有序段」（run），最後以 heapq.merge 多路合併所有有序段。
+有序段超過 MERGE_FAN_IN 段時先分批合併成較長的有序段；合併時每段只載入一個小區塊，
+記憶體用量只與 run_size 有關，與輸入總量無關。
+
+記錄須為 marshal 可序列化的 tuple，依 tuple 本身的大小順序排序
+（需要降冪的欄位請先取負值）。記錄全部放得進一段時不寫磁碟。
+
+用法：
+    with ExternalSorter(run_size=100_000) as sorter:
+        sorter.extend(records)
+        for record in sorter:       # 可重複迭代
+            ...
+"""
+
+import heapq
+import marshal
+import shutil
+import tempfile
+from itertools import groupby
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+# 每段有序段的預設記錄數
+DEFAULT_RUN_SIZE = 200_000
+
+# 有序段檔中每個區塊的記錄數上限（讀取時一次載入一個區塊）
+BLOCK_SIZE = 4096
+
+# 一次合併的有序段數上限
+MERGE_FAN_IN = 64
+
+
+class ExternalSorter:
+    """分段排序、寫出有序段，再多路合併的排序器"""
+
+    def __init__(self, run_size: int = DEFAULT_RUN_SIZE, temp_dir: Optional[PathLike] = None):
+        """
+        Args:
+            run_size: 每段有序段的記錄數（即記憶體中最多暫存的記錄數）
+            temp_dir: 存放有序段的上層目錄（None 為系統暫存目錄）
+        """
+        if run_size < 1:
+            raise ValueError(f"run_size 必須為正整數：{run_size}")
+        self.run_size = run_size
+        # 合併時同時載入 MERGE_FAN_IN 個區塊，合計約為一段有序段的大小
+        self.block_size = max(1, min(BLOCK_SIZE, run_size // MERGE_FAN_IN))
+        self.count = 0
+        self._temp_parent = temp_dir
+        self._temp_dir: Optional[Path] = None
+        self._buffer: List[Tuple] = []
+        self._runs: List[Path] = []
+        self._next_run = 0
+
+    @property
+    def run_count(self) -> int:
+        """已寫到磁碟的有序段數"""
+        return len(self._runs)
+
+    def add(self, record: Tuple):
+        """加入一筆記錄"""
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.run_size:
+            self._spill()
+
+    def extend(self, records: Iterable[Tuple]):
+        """加入多筆記錄"""
+        for record in records:
+            self.add(record)
+
+    def _spill(self):
+        """把記憶體中的記錄排序後寫成一段有序段"""
+        if self._temp_dir is None:
+            if self._temp_parent is not None:
+                Path(self._temp_parent).mkdir(parents=True, exist_ok=True)
+            self._temp_dir = Path(tempfile.mkdtemp(prefix="external_sort.", dir=self._temp_parent))
+        self._buffer.sort()
+        self._write_run(self._buffer)
+        self._buffer = []
+
+    def _write_run(self, records: Iterable[Tuple]):
+        """把已排序的記錄逐區塊寫成一段新的有序段"""
+        run_file = self._temp_dir / f"run{self._next_run:05d}.marshal"
+        self._next_run += 1
+        with open(run_file, 'wb') as f:
+            block = []
+            for record in records:
+                block.append(record)
+                if len(block) >= self.block_size:
+                    marshal.dump(block, f)
+                    block = []
+            if block:
+                marshal.dump(block, f)
+        self._runs.append(run_file)
+
+    def _reduce_runs(self):
+        """有序段過多時，每 MERGE_FAN_IN 段合併成一段，直到可以一次合併完"""
+        while len(self._runs) > MERGE_FAN_IN:
+            group, self._runs = self._runs[:MERGE_FAN_IN], self._runs[MERGE_FAN_IN:]
+            self._write_run(heapq.merge(*(self._read_run(run_file) for run_file in group)))
+            for run_file in group:
+                run_file.unlink()
+
+    @staticmethod
+    def _read_run(run_file: Path) -> Iterator[Tuple]:
+        with open(run_file, 'rb') as f:
+            while True:
+                try:
+                    block = marshal.load(f)
+                except EOFError:
+                    return
+                yield from block
+
+    def __iter__(self) -> Iterator[Tuple]:
+        """依序產生所有記錄（未寫出的記錄先在記憶體中排序）"""
+        self._buffer.sort()
+        if not self._runs:
+            return iter(self._buffer)
+        self._reduce_runs()
+        return heapq.merge(*(self._read_run(run_file) for run_file in self._runs),
+                           self._buffer)
+
+    def cleanup(self):
+        """刪除所有有序段（之後排序器不能再使用）"""
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+        self._runs = []
+        self._buffer = []
+
+    def __enter__(self) -> "ExternalSorter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+
+
+def group_sorted(records: Iterable[Tuple],
+                 key: Callable[[Tuple], object]) -> Iterator[Tuple[object, List[Tuple]]]:
+    """
+    把已排序的記錄依 key 分組（只保留目前一組在記憶體中）
+
+    Returns:
+        (鍵, 該組記錄) 的迭代器
+    """
+    for group_key, group in groupby(records, key):
+        yield group_key, list(group)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    import tracemalloc
+
+    # 與 sorted() 比較：記錄由生成器產生，sorted() 必須把全部記錄留在記憶體中
+    def records():
+        rng = random.Random(0)
+        for index in range(500_000):
+            yield (rng.randrange(1 << 20), f"w{index}")
+
+    def checksum(ordered):
+        """與順序相關的校驗和"""
+        return sum(position * key for position, (key, _) in enumerate(ordered))
+
+    def in_memory():
+        return checksum(sorted(records()))
+
+    def external():
+        with ExternalSorter(run_size=50_000) as sorter:
+            sorter.extend(records())
+            return checksum(sorter)
+
+    def measure(func):
+        """返回 (結果, 秒數, 峰值記憶體)；時間與記憶體分兩次量測"""
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, elapsed, peak
+
+    expected, in_memory_time, in_memory_peak = measure(in_memory)
+    result, external_time, external_peak = measure(external)
+
+    print("記錄數：500,000（有序段 50,000 筆）")
+    print(f"sorted()：{in_memory_time * 1000:.0f} ms，峰值記憶體 {in_memory_peak / 1024:,.0f} KB")
+    print(f"外部排序：{external_time * 1000:.0f} ms，峰值記憶體 {external_peak / 1024:,.0f} KB"
+          f"（結果{'相同' if result == expected else '不同'}）")
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+詞彙資料庫（SQLite）
+Lexicon Store
+
+把所有詞彙來源放進同一個 SQLite 檔（預設 .cache/lexicon.sqlite3）：
+
+- 參考詞庫 Pouleng.dict.yaml、vocab_from_wikt.yaml（莆拼）
+- vocab_from_bible.yaml、產生的平話字詞庫（輸入式，另存平話字拼寫）
+- cpx-pron-data.lua 的單字讀音（平話字，另存輸入式）
+
+每筆資料都記錄來源名稱與行號；來源檔以內容 SHA-1 判斷是否需要重新匯入。
+讀出的漢字、編碼與讀音經由建置共用的字串池去重（見 string_pool.py）。
+建有漢字、（拼音系統, 編碼）、音節與來源的索引，例如
+「哪些詞用到音節 X」只需一次索引查詢：
+
+    with LexiconStore() as store:
+        store.sync(base_dir)
+        for entry in store.entries_with_syllable("ngu1", "input"):
+            ...
+
+命令列：python data/lexicon_store.py [漢字 | 音節 ...]
+"""
+
+import hashlib
+import sqlite3
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+from rime_dict import DictEntry, iter_entries
+from romanization_converter import RomanizationConverter
+from string_pool import STRING_POOL, StringPool
+
+PathLike = Union[str, Path]
+
+# 資料庫結構版本（改變資料表結構時遞增，舊資料庫會被清空重建）
+SCHEMA_VERSION = 1
+
+# 標準來源：名稱 -> (相對於專案根目錄的路徑, 拼音系統)
+STANDARD_SOURCES: Dict[str, Tuple[str, str]] = {
+    "base": ("hinghwa-ime/Pouleng/Pouleng.dict.yaml", "psp"),
+    "wikt": ("data/vocab_from_wikt.yaml", "psp"),
+    "bible": ("data/vocab_from_bible.yaml", "input"),
+    "bannuaci_han": ("bannuaci/borhlang_bannuaci_han.dict.yaml", "input"),
+}
+
+# cpx 單字讀音的來源名稱
+CPX_SOURCE = "cpx"
+
+# 匯入詞庫時每批寫入的詞條數（只有一批詞條同時留在記憶體中）
+IMPORT_BATCH_SIZE = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    path TEXT NOT NULL,
+    system TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    imported_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    line_number INTEGER NOT NULL,
+    system TEXT NOT NULL,
+    text TEXT NOT NULL,
+    code TEXT NOT NULL,
+    weight TEXT,
+    weight_value INTEGER NOT NULL,
+    buc TEXT
+);
+CREATE TABLE IF NOT EXISTS syllables (
+    entry_id INTEGER NOT NULL REFERENCES entries(id),
+    position INTEGER NOT NULL,
+    syllable TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS char_readings (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    char TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    buc TEXT,
+    input TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_text ON entries(text);
+CREATE INDEX IF NOT EXISTS entries_code ON entries(system, code);
+CREATE INDEX IF NOT EXISTS entries_source ON entries(source_id, line_number);
+CREATE INDEX IF NOT EXISTS syllables_syllable ON syllables(syllable);
+CREATE INDEX IF NOT EXISTS syllables_entry ON syllables(entry_id);
+CREATE INDEX IF NOT EXISTS char_readings_char ON char_readings(char, source_id, position);
+CREATE INDEX IF NOT EXISTS char_readings_source ON char_readings(source_id, id);
+"""
+
+
+class LexiconEntry(NamedTuple):
+    """資料庫中的一筆詞條（含來源）"""
+    source: str
+    line_number: int
+    system: str
+    text: str
+    code: str
+    weight: Optional[str]
+    buc: Optional[str]
+
+    def to_dict_entry(self) -> DictEntry:
+        return DictEntry(self.text, self.code, self.weight, self.line_number)
+
+
+def file_digest(path: PathLike) -> str:
+    """來源檔內容的 SHA-1"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class LexiconStore:
+    """詞彙資料庫"""
+
+    DEFAULT_FILE = Path(__file__).resolve().parent.parent / ".cache" / "lexicon.sqlite3"
+
+    _ENTRY_COLUMNS = ("s.name, e.line_number, e.system, e.text, e.code, e.weight, e.buc")
+
+    def __init__(self, db_file: Optional[PathLike] = None):
+        """
+        Args:
+            db_file: 資料庫路徑（預設 DEFAULT_FILE；":memory:" 表示只放在記憶體）
+        """
+        db_file = self.DEFAULT_FILE if db_file is None else db_file
+        if db_file != ":memory:":
+            Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+        self.db_file = db_file
+        self.conn = sqlite3.connect(str(db_file))
+        # 資料庫可由來源檔重建，不需要逐筆同步到磁碟
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self._init_schema()
+
+    def _init_schema(self):
+        """建立資料表；結構版本不符時清空重建"""
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if row is not None and row[0] == str(SCHEMA_VERSION):
+                return
+            for table in ("syllables", "entries", "char_readings", "sources", "meta"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute("INSERT INTO meta VALUES ('schema_version', ?)",
+                              (str(SCHEMA_VERSION),))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> "LexiconStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ========== 匯入 ==========
+
+    def _replace_source(self, name: str, path: Path, system: str,
+                        digest: str) -> Optional[int]:
+        """
+        準備重新匯入一個來源（在交易中呼叫）
+
+        Returns:
+            來源編號；來源內容沒變（不需匯入）時返回 None
+        """
+        row = self.conn.execute("SELECT id, digest, path FROM sources WHERE name = ?",
+                                (name,)).fetchone()
+        if row is not None:
+            source_id, old_digest, old_path = row
+            if old_digest == digest and old_path == str(path):
+                return None
+            self.conn.execute(
+                "DELETE FROM syllables WHERE entry_id IN "
+                "(SELECT id FROM entries WHERE source_id = ?)", (source_id,))
+            self.conn.execute("DELETE FROM entries WHERE source_id = ?", (source_id,))
+            self.conn.execute("DELETE FROM char_readings WHERE source_id = ?", (source_id,))
+            self.conn.execute(
+                "UPDATE sources SET path = ?, system = ?, digest = ?, imported_at = ? "
+                "WHERE id = ?", (str(path), system, digest, time.time(), source_id))
+            return source_id
+        cursor = self.conn.execute(
+            "INSERT INTO sources (name, path, system, digest, imported_at) "
+            "VALUES (?, ?, ?, ?, ?)", (name, str(path), system, digest, time.time()))
+        return cursor.lastrowid
+
+    def import_dict(self, name: str, dict_file: PathLike, system: str) -> bool:
+        """
+        匯入一個 Rime 詞庫（內容沒變時略過）
+
+        輸入式詞庫另外存入平話字拼寫（buc 欄；無法轉換時為 NULL）。
+
+        Args:
+            name: 來源名稱
+            dict_file: 詞庫路徑
+            system: 編碼的拼音系統（'psp' 或 'input'）
+
+        Returns:
+            是否重新匯入
+        """
+        dict_file = Path(dict_file)
+        digest = file_digest(dict_file)
+        with self.conn:
+            source_id = self._replace_source(name, dict_file, system, digest)
+            if source_id is None:
+                return False
+
+            # 編號連續配給，音節表可直接以同一編號寫入
+            first_id = (self.conn.execute("SELECT MAX(id) FROM entries").fetchone()[0] or 0) + 1
+            entry_iter = iter_entries(dict_file)
+            while True:
+                entries = list(islice(entry_iter, IMPORT_BATCH_SIZE))
+                if not entries:
+                    break
+                if system == "input":
+                    bucs = [result.result if result.ok else None
+                            for result in RomanizationConverter.convert_words(
+                                (entry.code for entry in entries), "input", "buc")]
+                else:
+                    bucs = [None] * len(entries)
+                self.conn.executemany(
+                    "INSERT INTO entries (id, source_id, line_number, system, text, code, "
+                    "weight, weight_value, buc) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((first_id + i, source_id, entry.line_number, system, entry.text, entry.code,
+                      entry.weight, entry.weight_value(), buc)
+                     for i, (entry, buc) in enumerate(zip(entries, bucs))))
+                self.conn.executemany(
+                    "INSERT INTO syllables (entry_id, position, syllable) VALUES (?, ?, ?)",
+                    ((first_id + i, position, syllable)
+                     for i, entry in enumerate(entries)
+                     for position, syllable in enumerate(entry.syllables)))
+                first_id += len(entries)
+        return True
+
+    def import_char_readings(self, name: str, source_file: PathLike,
+                             load: Callable[[], Mapping[str, List[str]]],
+                             parser_version: int = 0) -> bool:
+        """
+        匯入單字讀音表（內容與解析器版本都沒變時略過，也不呼叫 load）
+
+        Args:
+            name: 來源名稱
+            source_file: 來源檔（用於判斷內容是否改變與記錄出處）
+            load: 解析來源檔，返回 {字: [平話字讀音, ...]}
+            parser_version: 解析器版本（改變解析規則時遞增，強制重新匯入）
+
+        Returns:
+            是否重新匯入
+        """
+        source_file = Path(source_file)
+        digest = file_digest(source_file)
+        if parser_version:
+            digest = f"{digest}:v{parser_version}"
+        with self.conn:
+            source_id = self._replace_source(name, source_file, "buc", digest)
+            if source_id is None:
+                return False
+            rows = []
+            for char, prons in load().items():
+                if not prons:
+                    # 表中有此字但沒有讀音：以 buc 為 NULL 的一列保留
+                    rows.append((source_id, char, 0, None, None))
+                for position, pron in enumerate(prons):
+                    try:
+                        input_form = RomanizationConverter.buc_to_input(pron)
+                    except ValueError:
+                        input_form = None
+                    rows.append((source_id, char, position, pron, input_form))
+            self.conn.executemany(
+                "INSERT INTO char_readings (source_id, char, position, buc, input) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+        return True
+
+    def sync(self, base_dir: PathLike, names: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        匯入標準來源（STANDARD_SOURCES）中存在的檔案
+
+        Args:
+            base_dir: 專案根目錄
+            names: 只匯入這些來源（預設全部）
+
+        Returns:
+            {來源名稱: 是否重新匯入}
+        """
+        base_dir = Path(base_dir)
+        updated = {}
+        for name, (relative_path, system) in STANDARD_SOURCES.items():
+            if names is not None and name not in names:
+                continue
+            path = base_dir / relative_path
+            if path.exists():
+                updated[name] = self.import_dict(name, path, system)
+        return updated
+
+    # ========== 查詢 ==========
+
+    def sources(self) -> List[Tuple[str, str, str, int]]:
+        """已匯入的來源：[(名稱, 路徑, 拼音系統, 詞條或讀音數)]"""
+        return self.conn.execute(
+            "SELECT s.name, s.path, s.system, "
+            "(SELECT COUNT(*) FROM entries WHERE source_id = s.id) + "
+            "(SELECT COUNT(*) FROM char_readings WHERE source_id = s.id) "
+            "FROM sources s ORDER BY s.id").fetchall()
+
+    def source_digest(self, name: str) -> Optional[str]:
+        """來源匯入時的內容指紋（含解析器版本；未匯入時為 None）"""
+        row = self.conn.execute("SELECT digest FROM sources WHERE name = ?", (name,)).fetchone()
+        return row[0] if row is not None else None
+
+    def has_source(self, name: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM sources WHERE name = ?",
+                                 (name,)).fetchone() is not None
+
+    def _entries(self, where: str, params: Tuple) -> List[LexiconEntry]:
+        rows = self.conn.execute(
+            f"SELECT {self._ENTRY_COLUMNS} FROM entries e JOIN sources s ON s.id = e.source_id "
+            f"WHERE {where} ORDER BY s.id, e.line_number", params)
+        return [LexiconEntry._make(row) for row in rows]
+
+    def source_entries(self, name: str, pool: Optional[StringPool] = None) -> Iterator[DictEntry]:
+        """
+        逐條產生某個來源的詞條（依原檔行序）
+
+        Args:
+            name: 來源名稱
+            pool: 字串經由此字串池去重（None 表示不去重；逐條處理、不保留詞條時不必去重）
+        """
+        rows = self.conn.execute(
+            "SELECT text, code, weight, line_number FROM entries "
+            "WHERE source_id = (SELECT id FROM sources WHERE name = ?) ORDER BY line_number",
+            (name,))
+        if pool is None:
+            for row in rows:
+                yield DictEntry._make(row)
+            return
+        intern = pool.intern
+        for text, code, weight, line_number in rows:
+            yield DictEntry(intern(text), intern(code), intern(weight), line_number)
+
+    def source_weights(self, name: str) -> Dict[Tuple[str, str], int]:
+        """
+        某個來源的 {(漢字, 編碼): 權重}
+
+        與逐行讀入字典的結果相同：重複的詞條保留第一次出現的位置、最後一次的權重。
+        """
+        rows = self.conn.execute(
+            "SELECT text, code, weight_value FROM entries "
+            "WHERE source_id = (SELECT id FROM sources WHERE name = ?) ORDER BY line_number",
+            (name,))
+        intern = STRING_POOL.intern
+        return {(intern(text), intern(code)): weight for text, code, weight in rows}
+
+    def lookup_text(self, text: str) -> List[LexiconEntry]:
+        """以漢字查詞條（所有來源）"""
+        return self._entries("e.text = ?", (text,))
+
+    def lookup_code(self, code: str, system: str) -> List[LexiconEntry]:
+        """以編碼查詞條（system 為 'psp' 或 'input'）"""
+        return self._entries("e.system = ? AND e.code = ?", (system, code))
+
+    def entries_with_syllable(self, syllable: str,
+                              system: Optional[str] = None) -> List[LexiconEntry]:
+        """用到某個音節的詞條（可限定拼音系統）"""
+        where = "e.id IN (SELECT entry_id FROM syllables WHERE syllable = ?)"
+        if system is None:
+            return self._entries(where, (syllable,))
+        return self._entries(where + " AND e.system = ?", (syllable, system))
+
+    def char_readings(self, char: str, name: str = CPX_SOURCE) -> Optional[List[str]]:
+        """
+        單字的平話字讀音（依原表順序）
+
+        Returns:
+            讀音列表；表中沒有此字時為 None（有此字但沒有讀音時為空列表）
+        """
+        rows = self.conn.execute(
+            "SELECT buc FROM char_readings WHERE char = ? AND source_id = "
+            "(SELECT id FROM sources WHERE name = ?) ORDER BY position", (char, name)).fetchall()
+        if not rows:
+            return None
+        return [STRING_POOL.intern(buc) for buc, in rows if buc is not None]
+
+    def reading_map(self, name: str = CPX_SOURCE) -> "CharReadings":
+        """單字讀音表的唯讀對照（見 CharReadings）"""
+        return CharReadings(self, name)
+
+
+class CharReadings(Mapping):
+    """
+    以資料庫為後端的 {字: [平話字讀音, ...]} 唯讀對照
+
+    逐字查詢時才讀取並記住結果，不必先把整張讀音表載入成字典；
+    items() 以一次查詢依原表順序取出全部讀音。
+    """
+
+    def __init__(self, store: LexiconStore, name: str = CPX_SOURCE):
+        self.store = store
+        self.name = name
+        self._cache: Dict[str, Optional[List[str]]] = {}
+        self._size: Optional[int] = None
+
+    def __getitem__(self, char: str) -> List[str]:
+        prons = self._cache.get(char)
+        if prons is None and char not in self._cache:
+            prons = self.store.char_readings(char, self.name)
+            self._cache[char] = prons
+        if prons is None:
+            raise KeyError(char)
+        return prons
+
+    def __contains__(self, char) -> bool:
+        try:
+            self[char]
+        except KeyError:
+            return False
+        return True
+
+    def _rows(self):
+        return self.store.conn.execute(
+            "SELECT char, buc FROM char_readings "
+            "WHERE source_id = (SELECT id FROM sources WHERE name = ?) ORDER BY id", (self.name,))
+
+    def items(self):
+        result: Dict[str, List[str]] = {}
+        intern = STRING_POOL.intern
+        for char, pron in self._rows():
+            prons = result.setdefault(intern(char), [])
+            if pron is not None:
+                prons.append(intern(pron))
+        return result.items()
+
+    def __iter__(self):
+        return iter(dict(self.items()))
+
+    def __len__(self) -> int:
+        if self._size is None:
+            self._size = self.store.conn.execute(
+                "SELECT COUNT(DISTINCT char) FROM char_readings "
+                "WHERE source_id = (SELECT id FROM sources WHERE name = ?)",
+                (self.name,)).fetchone()[0]
+        return self._size
+
+
+if __name__ == "__main__":
+    import sys
+
+    base_dir = Path(__file__).parent.parent
+    with LexiconStore() as store:
+        start = time.perf_counter()
+        updated = store.sync(base_dir)
+        print(f"同步：{time.perf_counter() - start:.3f} 秒"
+              f"（重新匯入：{', '.join(name for name, flag in updated.items() if flag) or '無'}）")
+        for name, path, system, count in store.sources():
+            print(f"  {name:14} {system:6} {count:6} 筆  {path}")
+
+        for query in sys.argv[1:] or ["莆田", "ngu1"]:
+            start = time.perf_counter()
+            if query.isascii():
+                results = store.entries_with_syllable(query)
+            else:
+                results = store.lookup_text(query)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"\n{query}：{len(results)} 筆（{elapsed:.2f} ms）")
+            for entry in results[:10]:
+                buc = f"  [{entry.buc}]" if entry.buc else ""
+                print(f"  {entry.source}:{entry.line_number}  {entry.text}\t{entry.code}{buc}")
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lua 資料表解析器
+Streaming Lua Table Parser
+
+解析維基詞典模組（如 cpx-pron-data.lua）這類純資料的 Lua 檔，
+逐行讀取、逐個產生詞法單元，一次走完整個檔案，不必先把整個檔案讀進記憶體。
+
+支援的語法（資料模組用到的子集）：
+    local export = {}
+    export.buc = { ["一"] = {"ih", "seo̍h"}, ... }
+    export.name = "..."; export.list = {1, 2, 3}
+    return export
+    -- 單行註解、--[[ 多行註解 ]]、"..." / '...'（含跳脫字元）、[[長字串]]、
+    數字、true / false / nil、引用先前定義的變數或欄位
+
+Lua 表的對應：
+    只有依序值（或是空表）→ list；有鍵值的欄位 → dict（依序值的鍵為 1, 2, ...）
+
+所有字串預設正規化為 NFC（平話字的組合附加符號在不同來源中可能分解或預組合）。
+
+用法：
+    module = parse_lua_module("data/cpx-pron-data.lua")
+    module["buc"]["一"]     # -> ["ih", "seo̍h"]
+"""
+
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+# 不含跳脫字元的雙引號字串（資料模組中絕大多數的字串）
+_PLAIN_STRING = r'"[^"\\\n]*"'
+
+# 每個詞法單元之前的空白與單行註解一併略過；行尾只剩空白或註解時匹配 end
+_TOKEN = re.compile(r"""
+    (?:\s|--(?!\[=*\[)[^\n]*(?![^\n]))*
+    (?:
+        (?P<key>\[[ \t]*"(?P<key_value>[^"\\\n]*)"[ \t]*\][ \t]*=)
+      | (?P<flat>\{[ \t]*(?:%(s)s[ \t]*(?:[,;][ \t]*%(s)s[ \t]*)*(?:[,;][ \t]*)?)?\})
+      | (?P<long>(?:--)?\[=*\[)
+      | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+      | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<symbol>[{}\[\]=,;.-])
+      | (?P<end>\Z)
+    )
+""" % {'s': _PLAIN_STRING}, re.VERBOSE)
+
+_PLAIN_STRING_CONTENT = re.compile(r'"([^"\\\n]*)"')
+
+_ESCAPE = re.compile(r"\\(?:(\d{1,3})|x([0-9a-fA-F]{2})|u\{([0-9a-fA-F]+)\}|z\s*|(.))", re.DOTALL)
+
+_SIMPLE_ESCAPES = {
+    'n': '\n', 't': '\t', 'r': '\r', 'a': '\a', 'b': '\b', 'f': '\f', 'v': '\v',
+    '\\': '\\', '"': '"', "'": "'", '\n': '\n',
+}
+
+_KEYWORDS = {'true': True, 'false': False, 'nil': None}
+
+# 詞法單元為 (種類, 值, 行號) 的 tuple：
+#   'string'、'number'、'name'：值為字串內容（已處理跳脫與正規化）、數值或名稱
+#   'key'：["..."] = 的鍵；'list'：只含簡單字串的表 {"...", ...}，值為 list
+#   符號的種類即符號本身（'{'、','、'=' 等）；檔案結尾為 'eof'
+Token = Tuple[str, Any, int]
+
+
+class LuaSyntaxError(ValueError):
+    """不支援或錯誤的 Lua 語法"""
+
+
+def _unescape(raw: str, line_number: int) -> str:
+    def replace(match):
+        decimal, hexadecimal, codepoint, simple = match.groups()
+        if decimal is not None:
+            return chr(int(decimal))
+        if hexadecimal is not None:
+            return chr(int(hexadecimal, 16))
+        if codepoint is not None:
+            return chr(int(codepoint, 16))
+        if simple is None:
+            return ''   # \z：略過後面的空白
+        if simple not in _SIMPLE_ESCAPES:
+            raise LuaSyntaxError(f"第 {line_number} 行：無效的跳脫字元 \\{simple}")
+        return _SIMPLE_ESCAPES[simple]
+    return _ESCAPE.sub(replace, raw)
+
+
+def _nfc(value: str) -> str:
+    return value if unicodedata.is_normalized('NFC', value) else unicodedata.normalize('NFC', value)
+
+
+def tokenize(lines: Iterable[str], normalize: bool = True) -> Iterator[Token]:
+    """
+    把 Lua 原始碼切成詞法單元（註解與空白略過）
+
+    Args:
+        lines: 原始碼的行（如開啟的檔案；保留行尾換行）
+        normalize: 是否把字串正規化為 NFC
+
+    Yields:
+        (種類, 值, 行號)，最後是種類為 'eof' 的結束單元
+    """
+    lines = iter(lines)
+    line_number = 0
+    for text in lines:
+        line_number += 1
+        match_token = _TOKEN.scanner(text).match
+        while True:
+            match = match_token()
+            if match is None:
+                raise LuaSyntaxError(f"第 {line_number} 行：無法辨識的內容 {text.strip()!r}")
+            kind = match.lastgroup
+            if kind == 'symbol':
+                symbol = match.group(kind)
+                yield symbol, symbol, line_number
+            elif kind == 'key':
+                # 快速路徑：["鍵"] =
+                value = match.group('key_value')
+                yield 'key', _nfc(value) if normalize else value, line_number
+            elif kind == 'flat':
+                # 快速路徑：只含簡單字串的表 {"a", "b"}（直接成為 list）
+                values = _PLAIN_STRING_CONTENT.findall(match.group(kind))
+                yield 'list', [_nfc(value) for value in values] if normalize else values, line_number
+            elif kind == 'end':
+                break
+            elif kind == 'name':
+                yield 'name', match.group(kind), line_number
+            elif kind == 'string':
+                value = match.group(kind)[1:-1]
+                if '\\' in value:
+                    value = _unescape(value, line_number)
+                yield 'string', _nfc(value) if normalize else value, line_number
+            elif kind == 'number':
+                number = match.group(kind)
+                if number[:2] in ('0x', '0X'):
+                    value = int(number, 16)
+                elif '.' in number or 'e' in number or 'E' in number:
+                    value = float(number)
+                else:
+                    value = int(number)
+                yield 'number', value, line_number
+            else:
+                # 長字串或長註解：[==[ ... ]==]，可跨行
+                opening = match.group(kind)
+                closing = ']' + '=' * opening.count('=') + ']'
+                start, start_line = match.end(), line_number
+                end = text.find(closing, start)
+                while end == -1:
+                    following = next(lines, None)
+                    if following is None:
+                        raise LuaSyntaxError(f"第 {start_line} 行：長字串或長註解沒有結束")
+                    line_number += 1
+                    text += following
+                    end = text.find(closing, start)
+                if not opening.startswith('--'):
+                    value = text[start:end]
+                    # 緊接在開頭括號後的換行不算在內容中
+                    if value.startswith('\r\n'):
+                        value = value[2:]
+                    elif value.startswith('\n'):
+                        value = value[1:]
+                    yield 'string', _nfc(value) if normalize else value, start_line
+                # 從結束括號之後繼續（text 可能已接上後面的行）
+                match_token = _TOKEN.scanner(text, end + len(closing)).match
+    yield 'eof', None, line_number
+
+
+class _Parser:
+    """遞迴下降解析器（只執行賦值與 return）"""
+
+    def __init__(self, tokens: Iterator[Token]):
+        self._next_token = tokens.__next__
+        self._token = self._next_token()
+        self.variables: Dict[str, Any] = {}
+
+    def _advance(self) -> Token:
+        token = self._token
+        self._token = self._next_token()
+        return token
+
+    def _error(self, message: str) -> LuaSyntaxError:
+        kind, value, line_number = self._token
+        found = "檔案結尾" if kind == 'eof' else repr(value)
+        return LuaSyntaxError(f"第 {line_number} 行：{message}（遇到 {found}）")
+
+    def _expect(self, symbol: str):
+        if self._token[0] != symbol:
+            raise self._error(f"預期 {symbol!r}")
+        self._advance()
+
+    def _accept(self, symbol: str) -> bool:
+        if self._token[0] == symbol:
+            self._advance()
+            return True
+        return False
+
+    def _name(self) -> str:
+        kind, value, _ = self._token
+        if kind != 'name' or value in _KEYWORDS:
+            raise self._error("預期名稱")
+        self._advance()
+        return value
+
+    def _path(self) -> List[str]:
+        """name.field.field"""
+        path = [self._name()]
+        while self._accept('.'):
+            path.append(self._name())
+        return path
+
+    def parse_chunk(self) -> Any:
+        """執行所有敘述，返回 return 的值（沒有 return 時為 None）"""
+        while self._token[0] != 'eof':
+            if self._accept(';'):
+                continue
+            kind, value, _ = self._token
+            if kind == 'name' and value == 'return':
+                self._advance()
+                result = self._expression()
+                self._accept(';')
+                if self._token[0] != 'eof':
+                    raise self._error("return 之後不能再有敘述")
+                return result
+            if kind == 'name' and value == 'local':
+                self._advance()
+                name = self._name()
+                self.variables[name] = self._expression() if self._accept('=') else None
+                continue
+            self._assignment()
+        return None
+
+    def _assignment(self):
+        """name.field.field = expression"""
+        path = self._path()
+        self._expect('=')
+        value = self._expression()
+        if len(path) == 1:
+            self.variables[path[0]] = value
+            return
+        owner = self._resolve(path[:-1])
+        if isinstance(owner, list):
+            if owner:
+                raise self._error(f"無法對依序表 {'.'.join(path[:-1])} 設定欄位")
+            # 空表 {} 在第一次設定欄位時改為 dict
+            owner = self._replace_with_dict(path[:-1])
+        elif not isinstance(owner, dict):
+            raise self._error(f"{'.'.join(path[:-1])} 不是表")
+        owner[path[-1]] = value
+
+    def _resolve(self, path: List[str]) -> Any:
+        if path[0] not in self.variables:
+            raise self._error(f"未定義的變數 {path[0]}")
+        value = self.variables[path[0]]
+        for field in path[1:]:
+            if not isinstance(value, dict) or field not in value:
+                raise self._error(f"未定義的欄位 {'.'.join(path)}")
+            value = value[field]
+        return value
+
+    def _replace_with_dict(self, path: List[str]) -> dict:
+        table: dict = {}
+        if len(path) == 1:
+            self.variables[path[0]] = table
+        else:
+            self._resolve(path[:-1])[path[-1]] = table
+        return table
+
+    def _expression(self) -> Any:
+        kind, value, _ = self._token
+        if kind == 'list' or kind == 'string' or kind == 'number':
+            self._advance()
+            return value
+        if kind == '{':
+            return self._table()
+        if kind == '-':
+            self._advance()
+            if self._token[0] != 'number':
+                raise self._error("負號後預期數字")
+            return -self._advance()[1]
+        if kind == 'name':
+            if value in _KEYWORDS:
+                self._advance()
+                return _KEYWORDS[value]
+            return self._resolve(self._path())
+        raise self._error("預期值")
+
+    def _table(self) -> Union[list, dict]:
+        """表建構式；只有依序值時返回 list"""
+        self._expect('{')
+        items: list = []
+        fields: Optional[dict] = None
+        while self._token[0] != '}':
+            kind, value, _ = self._token
+            if kind == 'key':
+                self._advance()
+                if fields is None:
+                    fields = {}
+                fields[value] = self._expression()
+            elif kind == '[':
+                self._advance()
+                key = self._expression()
+                self._expect(']')
+                self._expect('=')
+                if fields is None:
+                    fields = {}
+                fields[key] = self._expression()
+            elif kind == 'name' and value not in _KEYWORDS:
+                self._advance()
+                if self._accept('='):
+                    if fields is None:
+                        fields = {}
+                    fields[value] = self._expression()
+                else:
+                    # 引用變數的依序值
+                    path = [value]
+                    while self._accept('.'):
+                        path.append(self._name())
+                    items.append(self._resolve(path))
+            else:
+                items.append(self._expression())
+            separator = self._token[0]
+            if separator == ',' or separator == ';':
+                self._advance()
+            elif separator != '}':
+                raise self._error("預期 ',' 或 '}'")
+        self._advance()
+        if fields is None:
+            return items
+        for index, item in enumerate(items, 1):
+            fields[index] = item
+        return fields
+
+
+def parse_lua(lines: Iterable[str], normalize: bool = True) -> Any:
+    """
+    解析 Lua 資料模組的原始碼
+
+    Args:
+        lines: 原始碼的行
+        normalize: 是否把字串正規化為 NFC
+
+    Returns:
+        return 敘述的值（沒有 return 時為所有 local 與全域變數的 dict）
+
+    Raises:
+        LuaSyntaxError: 語法錯誤或用到不支援的語法
+    """
+    parser = _Parser(tokenize(lines, normalize))
+    result = parser.parse_chunk()
+    return parser.variables if result is None else result
+
+
+def parse_lua_module(lua_file: PathLike, normalize: bool = True) -> Dict[str, Any]:
+    """
+    解析 Lua 資料模組檔（如 cpx-pron-data.lua），返回模組匯出的表
+
+    Returns:
+        {欄位名稱: 值}（例如 {"buc": {"一": ["ih", "seo̍h"], ...}}）
+
+    Raises:
+        LuaSyntaxError: 語法錯誤，或模組返回的不是表
+    """
+    with open(lua_file, 'r', encoding='utf-8') as f:
+        try:
+            module = parse_lua(f, normalize)
+        except LuaSyntaxError as e:
+            raise LuaSyntaxError(f"{lua_file}：{e}") from None
+    if isinstance(module, list) and not module:
+        module = {}
+    if not isinstance(module, dict):
+        raise LuaSyntaxError(f"{lua_file}：模組返回的不是表")
+    return module
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # 與原本的正規表示式解析（convert_dict_v3.py 舊版）比較速度與結果
+    lua_file = Path(sys.argv[1]) if len(sys.argv) > 1 else \
+        Path(__file__).parent / "cpx-pron-data.lua"
+
+    def parse_regex(lua_file):
+        """對照：整個檔案讀入後以 DOTALL 正規表示式擷取 export.buc，再逐條比對"""
+        with open(lua_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        match = re.search(r'export\.buc\s*=\s*\{(.+)\}', content, re.DOTALL)
+        char_dict = {}
+        for entry in re.finditer(r'\["(.+?)"\]\s*=\s*\{([^}]*)\}', match.group(1)):
+            char_dict[entry.group(1)] = re.findall(r'"([^"]+)"', entry.group(2))
+        return char_dict
+
+    def best_of(func, repeat=5):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+        return result, min(times)
+
+    expected, regex_time = best_of(lambda: parse_regex(lua_file))
+    module, stream_time = best_of(lambda: parse_lua_module(lua_file))
+    _, raw_time = best_of(lambda: parse_lua_module(lua_file, normalize=False))
+
+    print(f"正規表示式：{regex_time * 1000:.1f} ms（只有 export.buc）")
+    print(f"串流解析：  {stream_time * 1000:.1f} ms（NFC 正規化；不正規化 {raw_time * 1000:.1f} ms）")
+    print(f"匯出的表：{', '.join(f'{name}（{len(value)} 項）' if isinstance(value, (list, dict)) else name for name, value in module.items())}")
+    print(f"export.buc 與正規表示式結果{'相同' if module.get('buc') == expected else '不同'}")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+只在內容改變時才更新的輸出檔
+Change-Aware Atomic Output
+
+產生器先把結果寫到同目錄的暫存檔（或記憶體），與現有檔案比較：
+- 內容相同：丟棄暫存檔，原檔（含修改時間）保持不動，Rime 不會重新部署
+- 內容不同：以 os.replace 原子地取代原檔，不會留下寫到一半的檔案
+寫入失敗時刪除暫存檔。產生器與快取都經由這裡寫檔，不要自行組暫存檔名或呼叫 os.replace。
+"""
+
+import filecmp
+import os
+from pathlib import Path
+from typing import BinaryIO, Callable, Union
+
+PathLike = Union[str, Path]
+
+
+def temp_path(target: PathLike) -> Path:
+    """與目標同目錄的暫存檔路徑（同一檔案系統，os.replace 才是原子操作）"""
+    target = Path(target)
+    return target.with_name(f"{target.name}.{os.getpid()}.tmp")
+
+
+def _write_temp(target: Path, write: Callable[[BinaryIO], object]) -> Path:
+    """建立目錄並以 write(f) 寫入暫存檔；失敗時刪除暫存檔再拋出例外"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = temp_path(target)
+    try:
+        with open(temp_file, 'wb') as f:
+            write(f)
+    except BaseException:
+        temp_file.unlink(missing_ok=True)
+        raise
+    return temp_file
+
+
+def replace_if_changed(temp_file: PathLike, target: PathLike) -> bool:
+    """
+    以暫存檔取代目標檔；內容相同時刪除暫存檔、保留原檔
+
+    Returns:
+        目標檔是否被更新
+    """
+    temp_file, target = Path(temp_file), Path(target)
+    if target.exists() and filecmp.cmp(temp_file, target, shallow=False):
+        temp_file.unlink()
+        return False
+    os.replace(temp_file, target)
+    return True
+
+
+def write_bytes_if_changed(target: PathLike, data: bytes) -> bool:
+    """
+    寫入位元組內容（內容相同時不動原檔）
+
+    Returns:
+        目標檔是否被更新
+    """
+    target = Path(target)
+    try:
+        with open(target, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    os.replace(_write_temp(target, lambda f: f.write(data)), target)
+    return True
+
+
+def write_file_if_changed(target: PathLike, write: Callable[[BinaryIO], object]) -> bool:
+    """
+    以 write(f) 逐段寫出檔案（不必先在記憶體中拼出整個檔案；內容相同時不動原檔）
+
+    Args:
+        target: 目標檔
+        write: 接受以二進位模式開啟的暫存檔，把內容寫入其中
+
+    Returns:
+        目標檔是否被更新
+    """
+    target = Path(target)
+    return replace_if_changed(_write_temp(target, write), target)
+
+
+def write_text_if_changed(target: PathLike, text: str) -> bool:
+    """寫入 UTF-8 文字（一律 LF 換行；內容相同時不動原檔）"""
+    return write_bytes_if_changed(target, text.encode('utf-8'))
+
+
+def status_label(changed: bool) -> str:
+    """輸出訊息用的更新狀態"""
+    return "已更新" if changed else "未變更"
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析結果快取
+Parsed Source Cache
+
+建置過程中同一批來源檔（詞庫 YAML、cpx-pron-data.lua）會在多個行程中
+被反覆解析。本模組把解析結果以 marshal 寫入 .cache/parsed/，
+鍵為「來源檔內容的 SHA-1 + 解析器名稱 + 解析器版本」：
+
+- 來源檔內容沒變（即使被重新產生、修改時間不同）就直接載入
+- 修改解析邏輯時遞增解析器版本，舊快取自動失效
+
+解析結果必須是 marshal 可序列化的型別（str、int、None、tuple、list、dict 等）。
+"""
+
+import hashlib
+import marshal
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple, Union
+
+from output_files import write_bytes_if_changed
+
+# 快取檔的格式版本（改變序列化內容時遞增）
+PARSE_CACHE_VERSION = 1
+
+# 快取目錄（設為 None 則停用快取）
+PARSE_CACHE_DIR: Optional[Path] = Path(__file__).resolve().parent.parent / ".cache" / "parsed"
+
+PathLike = Union[str, Path]
+
+
+def file_digest(source_file: PathLike) -> str:
+    """來源檔內容的 SHA-1"""
+    with open(source_file, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def cache_path(source_file: PathLike, parser_name: str) -> Optional[Path]:
+    """
+    來源檔與解析器對應的快取檔路徑
+
+    每個（來源檔路徑, 解析器）只有一個快取檔，來源更新時直接覆寫，不會累積舊檔。
+    """
+    if PARSE_CACHE_DIR is None:
+        return None
+    source_file = Path(source_file).resolve()
+    path_digest = hashlib.sha1(str(source_file).encode()).hexdigest()[:10]
+    return PARSE_CACHE_DIR / f"{source_file.name}.{path_digest}.{parser_name}.marshal"
+
+
+def load(cache_file: Path, key: str) -> Tuple[bool, Any]:
+    """
+    讀取快取檔
+
+    Returns:
+        (True, 解析結果)；檔案不存在、損壞或鍵不符時為 (False, None)
+    """
+    try:
+        with open(cache_file, 'rb') as f:
+            version, cached_key, data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return False, None
+    if version != PARSE_CACHE_VERSION or cached_key != key:
+        return False, None
+    return True, data
+
+
+def save(cache_file: Path, key: str, data: Any):
+    """以 marshal 寫入快取檔（經由暫存檔原子地取代，並行的行程不會讀到不完整的檔案）"""
+    write_bytes_if_changed(cache_file, marshal.dumps((PARSE_CACHE_VERSION, key, data)))
+
+
+def cached_parse(source_file: PathLike, parser_name: str, parser_version: int,
+                 parse: Callable[[Path], Any], use_cache: bool = True) -> Any:
+    """
+    解析來源檔，內容與解析器版本都沒變時直接載入快取
+
+    Args:
+        source_file: 來源檔路徑
+        parser_name: 解析器名稱（同一來源檔可有多種解析結果，如 "entries"、"entries-strip"）
+        parser_version: 解析器版本（解析邏輯或結果格式改變時遞增）
+        parse: 實際的解析函數，接受來源檔路徑
+        use_cache: 是否讀寫快取
+
+    Returns:
+        解析結果
+    """
+    source_file = Path(source_file)
+    cache_file = cache_path(source_file, parser_name) if use_cache else None
+    if cache_file is None:
+        return parse(source_file)
+
+    key = f"{parser_name}:{parser_version}:{file_digest(source_file)}"
+    found, data = load(cache_file, key)
+    if found:
+        return data
+
+    data = parse(source_file)
+    try:
+        save(cache_file, key, data)
+    except (OSError, ValueError):
+        pass  # 快取只是加速；無法寫入或結果無法序列化時照常返回
+    return data
+
+
+if __name__ == "__main__":
+    import sys
+
+    from rime_dict import load_entries
+
+    # 比較重新解析與載入快取的時間
+    base_dir = Path(__file__).parent.parent
+    dict_files = [Path(arg) for arg in sys.argv[1:]] or [
+        base_dir / "pouseng_pinging" / "borhlang_pouleng.dict.yaml",
+        base_dir / "bannuaci" / "borhlang_bannuaci_han.dict.yaml",
+        base_dir / "bannuaci" / "borhlang_bannuaci.dict.yaml",
+    ]
+
+    for dict_file in dict_files:
+        start = time.perf_counter()
+        parsed = load_entries(dict_file, use_cache=False)
+        parse_time = time.perf_counter() - start
+
+        load_entries(dict_file)  # 確保快取存在
+        start = time.perf_counter()
+        cached = load_entries(dict_file)
+        load_time = time.perf_counter() - start
+
+        same = "一致" if cached == parsed else "不一致"
+        print(f"{dict_file.name}：{len(parsed)} 條，重新解析 {parse_time * 1000:.1f} ms，"
+              f"載入快取 {load_time * 1000:.1f} ms（結果{same}）")
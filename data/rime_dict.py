@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rime 詞庫讀寫
+Streaming Rime Dictionary Reader / Writer
+
+讀取：iter_entries() 逐行產生 DictEntry，不把整個檔案讀進記憶體；
+      load_entries() 一次讀取全部詞條，並快取解析結果（見 parse_cache.py），
+      讀出的字串經由建置共用的字串池去重（見 string_pool.py）
+寫入：DictWriter 寫出標準標頭，並以緩衝方式寫入詞條
+
+詞庫格式：
+    # 註解
+    ---
+    name: ...
+    ...
+    漢字<TAB>編碼[<TAB>權重]
+
+權重可為整數或百分比（如 "90%"）；漢字欄中以 [] 括起的多個字為一個合音字，
+編碼中以 {} 括起的音節為標記音節（轉換時去掉括號）。
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar, Union
+
+from external_sort import ExternalSorter
+from output_files import temp_path
+from parse_cache import cached_parse
+from string_pool import STRING_POOL, StringPool
+
+# 權重欄缺少或無法解析時使用的預設權重
+DEFAULT_WEIGHT = 500
+
+# 標頭中內容雜湊行的前綴（見 DictWriter）
+CONTENT_HASH_PREFIX = "# content-sha1: "
+
+# load_entries() 的解析器版本（改變 iter_entries 的切分規則時遞增，使快取失效）
+ENTRIES_PARSER_VERSION = 1
+
+PathLike = Union[str, Path]
+T = TypeVar("T")
+
+
+def parse_weight(weight: Optional[str], default: int = DEFAULT_WEIGHT) -> int:
+    """
+    解析權重欄
+
+    Args:
+        weight: 權重欄原文（如 "800"、"90%"；None 表示沒有權重欄）
+        default: 缺少或無法解析時的預設值
+
+    Returns:
+        整數權重（百分比取其數值，如 "90%" -> 90）
+    """
+    if weight is None:
+        return default
+    weight = weight.strip()
+    if weight.endswith('%'):
+        weight = weight[:-1]
+    if not weight:
+        return default
+    try:
+        return int(weight)
+    except ValueError:
+        return default
+
+
+def sort_by_weight(items: Iterable[T], weight: Callable[[T], int]) -> List[T]:
+    """
+    依權重由高到低排序；同權重的項目依原本的順序（即在來源中的位置）
+
+    sorted() 是穩定排序，相當於以 (-權重, 位置) 為全序，結果只取決於輸入順序，
+    不受 dict、set 的內部順序或 PYTHONHASHSEED 影響（也不必為每項另建排序鍵 tuple）。
+    """
+    return sorted(items, key=lambda item: -weight(item))
+
+
+def split_text(text: str) -> List[str]:
+    """將漢字欄拆為單字，[] 括起的部分視為一個字（如 "[爬起]來" -> ["[爬起]", "來"]）"""
+    chars = []
+    i = 0
+    while i < len(text):
+        if text[i] == '[':
+            j = text.find(']', i)
+            if j != -1:
+                chars.append(text[i:j + 1])
+                i = j + 1
+                continue
+        chars.append(text[i])
+        i += 1
+    return chars
+
+
+def split_code(code: str) -> List[str]:
+    """將編碼拆為音節，並去掉標記音節的 {} 括號"""
+    return [syllable.strip('{}') for syllable in code.split()]
+
+
+class DictEntry(NamedTuple):
+    """詞庫中的一個詞條"""
+    text: str
+    code: str
+    weight: Optional[str] = None   # 權重欄原文（None 表示沒有權重欄）
+    line_number: int = 0
+
+    def weight_value(self, default: int = DEFAULT_WEIGHT) -> int:
+        """整數權重（見 parse_weight）"""
+        return parse_weight(self.weight, default)
+
+    @property
+    def is_percent(self) -> bool:
+        """權重是否為百分比格式"""
+        return self.weight is not None and self.weight.strip().endswith('%')
+
+    @property
+    def characters(self) -> List[str]:
+        """漢字欄拆成的單字（見 split_text）"""
+        return split_text(self.text)
+
+    @property
+    def syllables(self) -> List[str]:
+        """編碼拆成的音節（見 split_code）"""
+        return split_code(self.code)
+
+
+def _identity(value):
+    return value
+
+
+def iter_entries(dict_file: PathLike, strip_fields: bool = False,
+                 pool: Optional[StringPool] = None) -> Iterator[DictEntry]:
+    """
+    逐條讀取 Rime 詞庫
+
+    跳過 YAML 標頭（到 "..." 為止）、空行、註解行與欄位不足兩欄的行。
+    每行只去掉首尾空白；欄位內部的空白（如漢字後多打的空格）予以保留。
+
+    Args:
+        dict_file: 詞庫路徑
+        strip_fields: 是否另外去掉每個欄位首尾的空白
+        pool: 漢字、編碼與權重字串經由此字串池去重（None 表示不去重；
+              逐條處理、不保留詞條時不必去重）
+
+    Yields:
+        DictEntry
+    """
+    intern = pool.intern if pool is not None else _identity
+    with open(dict_file, 'r', encoding='utf-8') as f:
+        in_header = True
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if in_header:
+                if line == '...':
+                    in_header = False
+                continue
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split('\t')
+            if len(parts) < 2:
+                continue
+            if strip_fields:
+                parts = [part.strip() for part in parts]
+            yield DictEntry(intern(parts[0]), intern(parts[1]),
+                            intern(parts[2]) if len(parts) > 2 else None, line_number)
+
+
+def load_entries(dict_file: PathLike, strip_fields: bool = False,
+                 use_cache: bool = True,
+                 pool: Optional[StringPool] = STRING_POOL) -> List[DictEntry]:
+    """
+    讀取整個詞庫的詞條列表（經由 parse_cache 快取）
+
+    詞庫內容沒變時直接載入上次的解析結果，不必重新逐行切分。
+    需要逐條處理、不必一次持有全部詞條時，改用 iter_entries()。
+
+    Args:
+        dict_file: 詞庫路徑
+        strip_fields: 同 iter_entries()
+        use_cache: 是否讀寫快取
+        pool: 漢字、編碼與權重字串經由此字串池去重（None 表示不去重；
+              從快取載入的字串也會去重）
+
+    Returns:
+        DictEntry 列表
+    """
+    def parse(path: Path) -> List[Tuple]:
+        # 去重後寫入快取，marshal 會保留共用關係，快取檔也較小
+        return [tuple(entry) for entry in iter_entries(path, strip_fields, pool)]
+
+    parser_name = "entries-strip" if strip_fields else "entries"
+    rows = cached_parse(dict_file, parser_name, ENTRIES_PARSER_VERSION, parse, use_cache)
+    if pool is None:
+        return list(map(DictEntry._make, rows))
+    intern = pool.intern
+    return [DictEntry(intern(text), intern(code), intern(weight), line_number)
+            for text, code, weight, line_number in rows]
+
+
+def read_header(dict_file: PathLike) -> Dict[str, str]:
+    """
+    讀取 YAML 標頭中的簡單鍵值（name、version、sort 等）
+
+    Returns:
+        {鍵: 值}（值保留原文，例如 version 的引號）
+    """
+    header = {}
+    with open(dict_file, 'r', encoding='utf-8') as f:
+        in_yaml = False
+        for line in f:
+            line = line.strip()
+            if line == '...':
+                break
+            if line == '---':
+                in_yaml = True
+                continue
+            if in_yaml and ':' in line and not line.startswith('#'):
+                key, value = line.split(':', 1)
+                header[key.strip()] = value.strip()
+    return header
+
+
+class DictWriter:
+    """
+    Rime 詞庫寫入器
+
+    輸出與平台無關：一律 UTF-8、LF 換行。標頭第三行為內容雜湊
+    （"# content-sha1: ..."，涵蓋檔案中除此行以外的所有位元組），
+    相同內容必定寫出相同的位元組，下游可直接比較雜湊判斷詞庫是否改變。
+
+    詞條先寫到同目錄的暫存檔；關閉時與現有檔案比較雜湊，內容相同就丟棄
+    暫存檔、保留原檔（修改時間不變），不同才以 os.replace 原子地取代，
+    並統計新增、刪除、權重變更的詞條數（見 diff、report()）。
+    with 區塊中發生例外時丟棄暫存檔，原檔不受影響。
+
+    用法：
+        with DictWriter(path, "borhlang_bannuaci", "0.2.0", comments=[...]) as writer:
+            writer.write_entry("莆田", "po2 cheng2", 800)
+    """
+
+    def __init__(self, dict_file: PathLike, name: str, version: str,
+                 comments: Iterable[str] = (), sort: str = "by_weight",
+                 use_preset_vocabulary: Optional[bool] = False,
+                 buffer_size: int = 1 << 16, diff_run_size: Optional[int] = None):
+        """
+        Args:
+            dict_file: 輸出路徑
+            name: 詞庫名稱
+            version: 版本號（寫出時加引號）
+            comments: 標頭註解（每項一行，不含 "# "；空字串寫成單獨的 "#"），
+                      接在 "# Rime dictionary"、"# encoding: utf-8" 與內容雜湊之後
+            sort: 排序方式
+            use_preset_vocabulary: 是否使用預設詞彙（None 表示不寫出此項）
+            buffer_size: 寫入緩衝大小（位元組）
+            diff_run_size: 統計差異時以外部排序比對（見 diff_entries() 的 run_size），
+                           None 表示在記憶體中比對
+        """
+        self.dict_file = Path(dict_file)
+        self.diff_run_size = diff_run_size
+        self.count = 0
+        self.content_hash: Optional[str] = None
+        self.changed: Optional[bool] = None      # 關閉後：目標檔是否被更新
+        self.diff: Optional[DictDiff] = None      # 關閉後：與原檔的差異（原檔不存在時為 None）
+        self._hasher = hashlib.sha1()
+        self._temp_file = temp_path(self.dict_file)
+        self._file = open(self._temp_file, 'wb', buffering=buffer_size)
+
+        lines = ["#"]
+        lines.extend(f"# {comment}" if comment else "#" for comment in comments)
+        lines.append("---")
+        lines.append(f"name: {name}")
+        lines.append(f'version: "{version}"')
+        if use_preset_vocabulary is not None:
+            lines.append(f"use_preset_vocabulary: {'true' if use_preset_vocabulary else 'false'}")
+        lines.append(f"sort: {sort}")
+        lines.append("...")
+
+        # 雜湊行先寫入同長度的佔位字串，關閉時再回填
+        self._write("# Rime dictionary\n# encoding: utf-8\n")
+        self._hash_offset = self._file.tell() + len(CONTENT_HASH_PREFIX)
+        self._file.write(f"{CONTENT_HASH_PREFIX}{'0' * 40}\n".encode('ascii'))
+        self._write("\n".join(lines) + "\n\n")
+
+    def _write(self, text: str):
+        data = text.encode('utf-8')
+        self._hasher.update(data)
+        self._file.write(data)
+
+    def write_entry(self, text: str, code: str, weight=None):
+        """寫入一個詞條（weight 為 None 或空字串時不寫權重欄）"""
+        if weight is None or weight == '':
+            self._write(f"{text}\t{code}\n")
+        else:
+            self._write(f"{text}\t{code}\t{weight}\n")
+        self.count += 1
+
+    def write_entries(self, entries: Iterable[Tuple]):
+        """寫入多個 (漢字, 編碼[, 權重]) 詞條"""
+        for entry in entries:
+            self.write_entry(*entry)
+
+    def close(self):
+        """回填內容雜湊，內容有變時取代目標檔"""
+        if self._file.closed:
+            return
+        self.content_hash = self._hasher.hexdigest()
+        self._file.seek(self._hash_offset)
+        self._file.write(self.content_hash.encode('ascii'))
+        self._file.close()
+
+        existed = self.dict_file.exists()
+        if existed and compute_content_hash(self.dict_file) == self.content_hash:
+            self._temp_file.unlink()
+            self.changed = False
+            self.diff = DictDiff(0, 0, 0)
+            return
+        if existed:
+            self.diff = diff_entries(self.dict_file, self._temp_file, self.diff_run_size)
+        os.replace(self._temp_file, self.dict_file)
+        self.changed = True
+
+    def discard(self):
+        """放棄寫入：刪除暫存檔，目標檔保持不動"""
+        if not self._file.closed:
+            self._file.close()
+        if self._temp_file.exists():
+            self._temp_file.unlink()
+        self.changed = False
+
+    def report(self) -> str:
+        """更新結果的說明（關閉後呼叫）"""
+        name = self.dict_file.name
+        if not self.changed:
+            return f"{name}：未變更（{self.count} 條）"
+        if self.diff is None:
+            return f"{name}：新檔案（{self.count} 條）"
+        return f"{name}：已更新，{self.diff}（共 {self.count} 條）"
+
+    def __enter__(self) -> "DictWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+
+class DictDiff(NamedTuple):
+    """兩版詞庫的差異（以 (漢字, 編碼) 為鍵）"""
+    added: int
+    removed: int
+    changed: int    # 鍵相同、權重不同
+
+    def __str__(self) -> str:
+        return f"新增 {self.added}、刪除 {self.removed}、權重變更 {self.changed}"
+
+
+def diff_entries(old_file: PathLike, new_file: PathLike,
+                 run_size: Optional[int] = None) -> DictDiff:
+    """
+    比較兩個詞庫的詞條
+
+    重複的 (漢字, 編碼) 視為一條，權重取最後一次出現的值。
+
+    Args:
+        old_file: 原詞庫
+        new_file: 新詞庫
+        run_size: 指定時兩個詞庫各自以外部排序依 (漢字, 編碼) 排序後逐條比對，
+                  記憶體用量與詞庫大小無關（見 external_sort.py）；
+                  None 表示把兩個詞庫都讀進字典比較
+    """
+    if run_size is not None:
+        return _diff_sorted(_sorted_weights(old_file, run_size),
+                            _sorted_weights(new_file, run_size))
+    old = {(entry.text, entry.code): entry.weight for entry in iter_entries(old_file)}
+    new = {(entry.text, entry.code): entry.weight for entry in iter_entries(new_file)}
+    changed = sum(1 for key, weight in new.items() if key in old and old[key] != weight)
+    return DictDiff(len(new.keys() - old.keys()), len(old.keys() - new.keys()), changed)
+
+
+def _sorted_weights(dict_file: PathLike, run_size: int) -> Iterator[Tuple[Tuple[str, str], Optional[str]]]:
+    """依 (漢字, 編碼) 排序產生 ((漢字, 編碼), 最後一次出現的權重)"""
+    with ExternalSorter(run_size) as sorter:
+        sorter.extend((entry.text, entry.code, entry.line_number, entry.weight)
+                      for entry in iter_entries(dict_file))
+        previous = None
+        for text, code, _, weight in sorter:
+            key = (text, code)
+            if previous is not None and previous[0] != key:
+                yield previous
+            previous = (key, weight)
+        if previous is not None:
+            yield previous
+
+
+def _diff_sorted(old: Iterator[Tuple[Tuple[str, str], Optional[str]]],
+                 new: Iterator[Tuple[Tuple[str, str], Optional[str]]]) -> DictDiff:
+    """合併比對兩個依鍵排序、鍵不重複的 (鍵, 權重) 序列"""
+    added = removed = changed = 0
+    old_item = next(old, None)
+    new_item = next(new, None)
+    while old_item is not None or new_item is not None:
+        if new_item is None or (old_item is not None and old_item[0] < new_item[0]):
+            removed += 1
+            old_item = next(old, None)
+        elif old_item is None or new_item[0] < old_item[0]:
+            added += 1
+            new_item = next(new, None)
+        else:
+            changed += old_item[1] != new_item[1]
+            old_item = next(old, None)
+            new_item = next(new, None)
+    return DictDiff(added, removed, changed)
+
+
+def read_content_hash(dict_file: PathLike) -> Optional[str]:
+    """
+    讀取 DictWriter 寫入標頭的內容雜湊（只讀前幾行）
+
+    Returns:
+        40 字元的十六進位 SHA-1；沒有雜湊行時為 None
+    """
+    prefix = CONTENT_HASH_PREFIX.encode('ascii')
+    with open(dict_file, 'rb') as f:
+        for _ in range(8):
+            line = f.readline()
+            if not line.startswith(b'#'):
+                break
+            if line.startswith(prefix):
+                return line[len(prefix):].strip().decode('ascii')
+    return None
+
+
+def compute_content_hash(dict_file: PathLike) -> str:
+    """重新計算詞庫的內容雜湊（除雜湊行以外的所有位元組）"""
+    prefix = CONTENT_HASH_PREFIX.encode('ascii')
+    hasher = hashlib.sha1()
+    with open(dict_file, 'rb') as f:
+        for line in f:
+            if not line.startswith(prefix):
+                hasher.update(line)
+    return hasher.hexdigest()
+
+
+if __name__ == "__main__":
+    import sys
+    import tracemalloc
+
+    # 解析速度與記憶體測試
+    base_dir = Path(__file__).parent.parent
+    dict_files = [Path(arg) for arg in sys.argv[1:]] or [
+        base_dir / "pouseng_pinging" / "borhlang_pouleng.dict.yaml",
+        base_dir / "bannuaci" / "borhlang_bannuaci_han.dict.yaml",
+        base_dir / "bannuaci" / "borhlang_bannuaci.dict.yaml",
+    ]
+
+    def parse_readlines(dict_file):
+        """對照：先 readlines() 再逐行解析（原本各工具的做法）"""
+        with open(dict_file, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        entries = []
+        in_header = True
+        for line in lines:
+            line = line.strip()
+            if in_header:
+                in_header = line != '...'
+                continue
+            if line and not line.startswith('#'):
+                parts = line.split('\t')
+                if len(parts) >= 2:
+                    entries.append(parts)
+        return len(entries)
+
+    def parse_stream(dict_file):
+        return sum(1 for _ in iter_entries(dict_file))
+
+    for dict_file in dict_files:
+        size = dict_file.stat().st_size
+        print(f"{dict_file.name}（{size / 1024:.0f} KB）")
+        for label, parse in [("readlines", parse_readlines), ("串流", parse_stream)]:
+            start = time.perf_counter()
+            count = parse(dict_file)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            parse(dict_file)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"  {label:10} {count} 條，{elapsed * 1000:6.1f} ms"
+                  f"（{count / elapsed / 1000:.0f}k 條/秒），峰值記憶體 {peak / 1024:,.0f} KB")
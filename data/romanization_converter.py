@@ -13,14 +13,193 @@ Puxian Romanization System Converter
     PSP <-> 輸入式 <-> BUC
 """
 
+import hashlib
+import marshal
 import re
-from typing import List, Tuple, Optional
-from unicodedata import normalize as norm
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple, Optional
+from unicodedata import combining, normalize as norm
+
+from output_files import write_bytes_if_changed
+from syllable_inventory import SyllableGenerator
+
+
+# 建立預編譯表時的鎖（表建好後只讀，可在多執行緒間共用）
+_COMPILE_LOCK = threading.RLock()
+
+# 預編譯表快取檔的格式版本（改變序列化內容時遞增）
+TABLES_CACHE_VERSION = 1
+
+
+class CompiledTables:
+    """
+    預編譯音節轉換表
+
+    對整個合法音節空間預先執行一次轉換，之後每次轉換只需一次字典查找。
+    表中只收錄轉換成功的音節；查不到的輸入交回原本的逐步轉換邏輯處理。
+    """
+
+    __slots__ = ("psp_to_input", "input_to_psp", "input_to_buc", "buc_to_input",
+                 "psp_to_buc_candidates", "buc_normalizer")
+
+    def __init__(self):
+        self.psp_to_input: Dict[str, str] = {}
+        self.input_to_psp: Dict[str, str] = {}
+        # 鍵：(輸入式音節, output_tone6b, output_tone7b)
+        self.input_to_buc: Dict[Tuple[str, bool, bool], Tuple[str, ...]] = {}
+        self.buc_to_input: Dict[str, str] = {}
+        self.psp_to_buc_candidates: Dict[str, Tuple[str, ...]] = {}
+        # 平話字異體拼寫表（首次遇到非標準拼寫時才建立）
+        self.buc_normalizer: Optional["BucNormalizer"] = None
+
+    def __len__(self) -> int:
+        return (len(self.psp_to_input) + len(self.input_to_psp) +
+                len(self.input_to_buc) + len(self.buc_to_input) +
+                len(self.psp_to_buc_candidates))
+
+    # 序列化的表（buc_normalizer 由 buc_to_input 推導，不寫入快取）
+    _CACHED_FIELDS = ("psp_to_input", "input_to_psp", "input_to_buc", "buc_to_input",
+                      "psp_to_buc_candidates")
+
+    @staticmethod
+    def source_fingerprint() -> str:
+        """轉換邏輯原始碼的指紋（轉換器或音節表修改後，舊快取自動失效）"""
+        digest = hashlib.sha1(str(TABLES_CACHE_VERSION).encode())
+        for source in (__file__, sys.modules[SyllableGenerator.__module__].__file__):
+            with open(source, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def save(self, cache_file: Path, fingerprint: str):
+        """以 marshal 寫入快取檔（經由暫存檔原子地取代，不會留下不完整的檔案）"""
+        payload = (TABLES_CACHE_VERSION, fingerprint,
+                   tuple(getattr(self, field) for field in self._CACHED_FIELDS))
+        write_bytes_if_changed(cache_file, marshal.dumps(payload))
+
+    @classmethod
+    def load(cls, cache_file: Path, fingerprint: str) -> Optional["CompiledTables"]:
+        """
+        讀取快取檔
+
+        Returns:
+            預編譯表；檔案不存在、損壞或版本、指紋不符時返回 None
+        """
+        try:
+            with open(cache_file, 'rb') as f:
+                version, cached_fingerprint, fields = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != TABLES_CACHE_VERSION or cached_fingerprint != fingerprint:
+            return None
+        if len(fields) != len(cls._CACHED_FIELDS):
+            return None
+
+        tables = cls()
+        for field, value in zip(cls._CACHED_FIELDS, fields):
+            setattr(tables, field, value)
+        return tables
+
+
+class BucNormalizer:
+    """
+    平話字拼寫正規化器
+
+    由標準平話字（NFC、小寫、調符在正確位置）展開所有常見的異體拼寫：
+    - 預組字元（NFC）與組合字元（NFD）
+    - 組合符號順序錯誤（調符寫在下點之前）
+    - 調符標在其他字母上
+    - 首字母大寫、全部大寫
+    - 尾隨的 * 號（保留於表中，因為 * 會影響調號）
+    每個異體直接對應標準的輸入式音節，查表一次即可完成轉換。
+    """
+
+    def __init__(self, canonical: Dict[str, str]):
+        """
+        Args:
+            canonical: 標準平話字 -> 輸入式音節
+        """
+        # 標準拼寫優先，異體不覆蓋已有的鍵
+        self.table: Dict[str, str] = dict(canonical)
+        for buc, input_syllable in canonical.items():
+            for variant in self.surface_forms(buc):
+                self.table.setdefault(variant, input_syllable)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def normalize(self, syllable: str) -> Optional[str]:
+        """返回對應的輸入式音節；不認得的拼寫返回 None"""
+        return self.table.get(syllable)
+
+    @staticmethod
+    def spelling_key(syllable: str) -> str:
+        """
+        比對用的拼寫鍵：小寫 NFD，調符移到最後
+
+        調符標在不同字母上的異體（如 a̤̍uh 與 a̤u̍h）得到相同的鍵
+        """
+        nfd = norm('NFD', syllable.lower())
+        marks = "".join(char for char in nfd if char in RomanizationConverter.TONE_MARKS_REVERSE)
+        for mark in marks:
+            nfd = nfd.replace(mark, "")
+        return nfd + marks
+
+    @staticmethod
+    def surface_forms(buc: str) -> List[str]:
+        """列舉一個標準平話字音節的所有異體拼寫（含自身）"""
+        star = "*" if buc.endswith("*") else ""
+        nfd = norm('NFD', buc.rstrip("*"))
+
+        tone_mark = ""
+        for char in nfd:
+            if char in RomanizationConverter.TONE_MARKS_REVERSE:
+                tone_mark = char
+                break
+
+        spellings = {nfd}
+        if tone_mark:
+            # 調符緊接在任一字母之後（可能落在下點等組合符號之前）
+            base = nfd.replace(tone_mark, "")
+            for i, char in enumerate(base):
+                if not combining(char):
+                    spellings.add(base[:i + 1] + tone_mark + base[i + 1:])
+
+        forms = set()
+        for spelling in spellings:
+            for form in (spelling, norm('NFD', spelling), norm('NFC', spelling)):
+                for cased in (form, form[:1].upper() + form[1:], form.upper()):
+                    forms.add(cased + star)
+        return sorted(forms)
+
+
+class ConversionResult(NamedTuple):
+    """批次轉換的單項結果：成功時 error 為 None，失敗時 result 為 None"""
+    source: str
+    result: Optional[str]
+    error: Optional[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 
 class RomanizationConverter:
     """莆仙語羅馬字系統轉換器"""
 
+    # 預編譯轉換表（轉換方法首次使用時由 compile_tables() 載入，None 表示尚未載入）
+    _compiled: Optional[CompiledTables] = None
+
+    # 正在建表（建表時以各轉換方法的逐步轉換算出表值，此時不能查表）
+    _building = False
+
+    # 預編譯表的快取檔（設為 None 則每次重新建表）
+    TABLES_CACHE_FILE: Optional[Path] = (
+        Path(__file__).resolve().parent.parent / ".cache" / "romanization_tables.marshal")
+
     # ========== 聲母對照表 ==========
     # 格式：{"莆拼": ("輸入式", "平話字")}
     INITIALS = {
@@ -233,6 +412,12 @@ class RomanizationConverter:
         "nn": "ⁿ"
     }
 
+    # 替換順序：按長度從長到短，避免誤替換（在類別建立時排序一次）
+    _BUC_TO_INPUT_ORDER = tuple(sorted(BUC_TO_INPUT_CHARS.items(),
+                                       key=lambda x: len(x[0]), reverse=True))
+    _INPUT_TO_BUC_ORDER = tuple(sorted(INPUT_TO_BUC_CHARS.items(),
+                                       key=lambda x: len(x[0]), reverse=True))
+
     # ========== 聲調符號映射 ==========
     # 調號 -> Unicode 組合符號
     TONE_MARKS = {
@@ -299,6 +484,56 @@ class RomanizationConverter:
         "ioo"   # io̤h*
     }
 
+    # ========== 莆拼韻母的平話字候選 ==========
+    # 莆田話已無鼻化與部分入聲對立，一個莆拼韻母可能對應數個平話字韻母
+    # 格式：{"PSP韻母": ["輸入式韻母", ...]}（第一個為首選）
+    PSP_FINAL_CANDIDATES = {
+        "a": ["a", "ann", "ah"],
+        "ae": ["e"],
+        "ah": ["ah"],
+        "ai": ["ai"],
+        "ang": ["ang"],
+        "ao": ["au"],
+        "e": ["aa", "aann", "aah"],
+        "eh": ["eh"],          # 與字典一致（如 十 se̍h），不同於 FINALS_PSP_TO_INPUT
+        "aeh": ["eh"],
+        "eng": ["eng"],
+        "i": ["i", "ih"],
+        "ia": ["ia", "iann", "iah"],
+        "iah": ["iah"],
+        "ieh": ["iah"],
+        "ieng": ["iang"],
+        "ieo": ["aau", "aaunn", "aauh"],
+        "ih": ["ih"],
+        "ing": ["ing"],
+        "iu": ["iu"],
+        "ng": ["ng"],
+        "o": ["eo", "eoh"],
+        "oe": ["ee", "eenn"],
+        "oeh": ["eeh"],
+        "oeng": ["eeng"],
+        "oh": ["eoh"],
+        "ong": ["eong"],
+        "or": ["oo", "oonn", "ooh"],
+        "orh": ["ooh"],
+        "orng": ["oong"],
+        "ou": ["o"],
+        "u": ["u"],
+        "ua": ["ua", "uann", "uah"],
+        "uah": ["uah"],
+        "uang": ["uang"],
+        "uei": ["oi", "oinn", "oih"],
+        "uh": ["uh"],
+        "ui": ["ui"],
+        "ung": ["ng"],
+        "y": ["y"],
+        "yh": ["yh"],
+        "yng": ["yng"],
+        "yor": ["ioo", "ioonn", "iooh"],
+        "yorh": ["iooh"],
+        "yorng": ["ioong"],
+    }
+
     # ========== 核心轉換方法 ==========
 
     @staticmethod
@@ -312,6 +547,12 @@ class RomanizationConverter:
         Returns:
             輸入式音節（如 "po2", "sioong5", "daa4"）
         """
+        compiled = RomanizationConverter._tables()
+        if compiled is not None:
+            result = compiled.psp_to_input.get(syllable)
+            if result is not None:
+                return result
+
         # 處理大小寫（專有名詞會大寫）
         syllable = syllable.lower()
 
@@ -354,6 +595,12 @@ class RomanizationConverter:
         Returns:
             莆拼音節（如 "pou2", "syorng5", "de4"）
         """
+        compiled = RomanizationConverter._tables()
+        if compiled is not None:
+            result = compiled.input_to_psp.get(syllable)
+            if result is not None:
+                return result
+
         # 處理大小寫
         syllable = syllable.lower()
 
@@ -409,6 +656,12 @@ class RomanizationConverter:
         Returns:
             平話字列表（可能包含多個變體）
         """
+        compiled = RomanizationConverter._tables()
+        if compiled is not None:
+            result = compiled.input_to_buc.get((syllable, output_tone6b, output_tone7b))
+            if result is not None:
+                return list(result)
+
         # 處理大小寫
         syllable = syllable.lower()
 
@@ -516,6 +769,17 @@ class RomanizationConverter:
         Returns:
             輸入式音節（如 "sa5", "sa6", "sa2", "sa7"）
         """
+        compiled = RomanizationConverter._tables()
+        if compiled is not None:
+            result = compiled.buc_to_input.get(syllable)
+            if result is None:
+                result = RomanizationConverter.buc_normalizer().normalize(syllable)
+            if result is not None:
+                return result
+
+        # 處理大小寫（專有名詞會大寫）
+        syllable = syllable.lower()
+
         # 移除星號標記（記錄是否有星號）
         has_star = syllable.endswith("*")
         syllable_clean = syllable.rstrip("*")
@@ -573,6 +837,326 @@ class RomanizationConverter:
 
         return initial + final_input + tone
 
+    @staticmethod
+    def psp_to_buc_candidates(syllable: str) -> List[str]:
+        """
+        莆拼 -> 所有可能的平話字（供比對平話字字典）
+
+        Args:
+            syllable: 莆拼音節（如 "ka5", "yor3"）
+
+        Returns:
+            平話字列表（如 ['kā', 'kāⁿ', 'kāh']，首選在前）；無法解析時為空列表
+        """
+        compiled = RomanizationConverter._tables()
+        if compiled is not None:
+            result = compiled.psp_to_buc_candidates.get(syllable)
+            if result is not None:
+                return list(result)
+
+        syllable = syllable.lower()
+        if not syllable or not syllable[-1].isdigit():
+            return []
+
+        tone = syllable[-1]
+        syllable_no_tone = syllable[:-1]
+        initial_psp = RomanizationConverter._extract_initial_psp(syllable_no_tone)
+        final_psp = syllable_no_tone[len(initial_psp):]
+        final_psp = RomanizationConverter.WRONG_FINALS.get(final_psp, final_psp)
+
+        if (initial_psp not in RomanizationConverter.INITIALS or
+                final_psp not in RomanizationConverter.PSP_FINAL_CANDIDATES or
+                tone not in RomanizationConverter.TONE_MARKS):
+            return []
+        initial_input = RomanizationConverter.INITIALS[initial_psp][0]
+
+        # 字典中的平話字不帶 * 標記，第6、7調直接使用 TONE_MARKS 的基本調符
+        tone_mark = RomanizationConverter.TONE_MARKS[tone]
+        candidates = []
+        for final_input in RomanizationConverter.PSP_FINAL_CANDIDATES[final_psp]:
+            final_buc = RomanizationConverter._add_tone_mark(
+                RomanizationConverter._input_final_to_buc(final_input), final_input, tone_mark)
+            candidates.append(norm('NFC', initial_input + final_buc))
+        return candidates
+
+    # ========== 批次轉換 ==========
+
+    # 系統名稱：莆拼、輸入式、平話字
+    SYSTEMS = ("psp", "input", "buc")
+
+    # 詞內音節分隔符：平話字用連字號，其餘用空格
+    WORD_SEPARATORS = {"psp": " ", "input": " ", "buc": "-"}
+
+    _WORD_SPLIT = re.compile(r"[-\s]+")
+
+    @staticmethod
+    def _check_systems(src: str, dst: str):
+        """檢查系統名稱"""
+        for system in (src, dst):
+            if system not in RomanizationConverter.SYSTEMS:
+                raise ValueError(f"未知的羅馬字系統：{system}"
+                                 f"（可用：{', '.join(RomanizationConverter.SYSTEMS)}）")
+
+    @staticmethod
+    def convert_syllable(syllable: str, src: str, dst: str) -> str:
+        """
+        在任兩個系統之間轉換單個音節（經由輸入式中轉）
+
+        Args:
+            syllable: 音節
+            src: 來源系統（"psp", "input", "buc"）
+            dst: 目標系統（"psp", "input", "buc"）
+
+        Returns:
+            目標系統的音節；轉為平話字時只取第一個候選（不含 * 變體）
+        """
+        RomanizationConverter._check_systems(src, dst)
+        if src == dst:
+            return syllable
+
+        if src == "psp":
+            syllable = RomanizationConverter.psp_to_input(syllable)
+        elif src == "buc":
+            syllable = RomanizationConverter.buc_to_input(syllable)
+
+        if dst == "psp":
+            return RomanizationConverter.input_to_psp(syllable)
+        if dst == "buc":
+            return RomanizationConverter.input_to_buc(syllable, False, False)[0]
+        return syllable
+
+    @staticmethod
+    def convert_word(word: str, src: str, dst: str) -> str:
+        """
+        轉換整個詞（音節以空格或連字號分隔）
+
+        Args:
+            word: 詞（如 "po2 cheng2"、"pó-chéng"）
+            src: 來源系統
+            dst: 目標系統
+
+        Returns:
+            轉換後的詞，按目標系統的分隔符連接
+
+        Raises:
+            ValueError: 任一音節轉換失敗（訊息包含失敗的音節）
+        """
+        converted = []
+        for syllable in RomanizationConverter._WORD_SPLIT.split(word.strip()):
+            if not syllable:
+                continue
+            try:
+                converted.append(
+                    RomanizationConverter.convert_syllable(syllable, src, dst))
+            except (ValueError, KeyError) as e:
+                raise ValueError(f"音節轉換失敗 '{syllable}': {e}") from e
+        return RomanizationConverter.WORD_SEPARATORS[dst].join(converted)
+
+    @staticmethod
+    def try_convert_word(word: str, src: str, dst: str) -> ConversionResult:
+        """
+        轉換整個詞，失敗時不拋出例外，錯誤記錄在返回值中
+
+        Returns:
+            ConversionResult
+        """
+        try:
+            return ConversionResult(
+                word, RomanizationConverter.convert_word(word, src, dst), None)
+        except ValueError as e:
+            return ConversionResult(word, None, str(e))
+
+    @staticmethod
+    def convert_many(syllables: Iterable[str], src: str,
+                     dst: str) -> Iterator[ConversionResult]:
+        """
+        批次轉換音節，逐項產生結果（惰性求值，記憶體用量固定）
+
+        單項轉換失敗不會中斷，錯誤記錄在該項的 ConversionResult.error。
+
+        Args:
+            syllables: 音節的可迭代物件（可為生成器）
+            src: 來源系統
+            dst: 目標系統
+
+        Yields:
+            每個音節的 ConversionResult，順序與輸入相同
+        """
+        RomanizationConverter._check_systems(src, dst)
+        convert = RomanizationConverter.convert_syllable
+        for syllable in syllables:
+            try:
+                yield ConversionResult(syllable, convert(syllable, src, dst), None)
+            except (ValueError, KeyError) as e:
+                yield ConversionResult(syllable, None, str(e))
+
+    @staticmethod
+    def convert_words(words: Iterable[str], src: str,
+                      dst: str) -> Iterator[ConversionResult]:
+        """
+        批次轉換詞（音節以空格或連字號分隔），逐項產生結果
+
+        Args:
+            words: 詞的可迭代物件（可為生成器）
+            src: 來源系統
+            dst: 目標系統
+
+        Yields:
+            每個詞的 ConversionResult，順序與輸入相同
+        """
+        RomanizationConverter._check_systems(src, dst)
+        for word in words:
+            yield RomanizationConverter.try_convert_word(word, src, dst)
+
+    # ========== 預編譯表 ==========
+
+    @staticmethod
+    def _tables() -> Optional[CompiledTables]:
+        """轉換方法使用的預編譯表（首次存取時載入）；建表期間為 None，改走逐步轉換"""
+        compiled = RomanizationConverter._compiled
+        if compiled is None and not RomanizationConverter._building:
+            compiled = RomanizationConverter.compile_tables()
+        return compiled
+
+    @staticmethod
+    def compile_tables(use_cache: bool = True) -> CompiledTables:
+        """
+        載入預編譯表：列舉整個合法音節空間，建立四個方向的轉換表與莆拼的平話字候選表
+
+        各轉換方法首次使用時會自動呼叫，呼叫端不必先呼叫；
+        需要把載入時間移出計時區段，或要取得表本身時才直接呼叫。
+
+        音節空間與 SyllableGenerator.generate_all_syllables() 相同，並加上第6B、7B調；
+        莆拼方向另外列舉所有莆拼聲母 × 韻母（含容錯拼法）× 聲調 1-7。
+        表中的每個值都由原本的轉換邏輯算出，因此結果與未編譯時完全一致。
+        重複呼叫時直接返回已建立的表。
+
+        建好的表會以 marshal 寫入 TABLES_CACHE_FILE；之後的行程只要快取的
+        版本與原始碼指紋相符，就直接載入而不重新列舉（每個建置步驟都是新的
+        直譯器，這可省下大部分啟動時間）。
+
+        Args:
+            use_cache: 是否讀寫快取檔
+
+        Returns:
+            預編譯轉換表
+        """
+        if RomanizationConverter._compiled is not None:
+            return RomanizationConverter._compiled
+
+        with _COMPILE_LOCK:
+            if RomanizationConverter._compiled is None:
+                RomanizationConverter._building = True
+                try:
+                    RomanizationConverter._compiled = (
+                        RomanizationConverter._load_or_build_tables(use_cache))
+                finally:
+                    RomanizationConverter._building = False
+        return RomanizationConverter._compiled
+
+    @staticmethod
+    def _load_or_build_tables(use_cache: bool) -> CompiledTables:
+        """從快取檔載入預編譯表，沒有可用的快取時重新建表並寫入快取"""
+        cache_file = RomanizationConverter.TABLES_CACHE_FILE
+        if not use_cache or cache_file is None:
+            return RomanizationConverter._build_tables()
+
+        fingerprint = CompiledTables.source_fingerprint()
+        tables = CompiledTables.load(cache_file, fingerprint)
+        if tables is None:
+            tables = RomanizationConverter._build_tables()
+            try:
+                tables.save(cache_file, fingerprint)
+            except OSError:
+                pass  # 快取只是加速，無法寫入時照常使用記憶體中的表
+        return tables
+
+    @staticmethod
+    def _build_tables() -> CompiledTables:
+        """列舉音節空間並建立預編譯表（在 _compiled 為 None 時執行）"""
+        tables = CompiledTables()
+        tones = SyllableGenerator.TONES_OPEN + SyllableGenerator.TONES_CHECKED
+
+        def try_convert(func, *args):
+            try:
+                return func(*args)
+            except (ValueError, KeyError):
+                return None
+
+        # 輸入式 -> 莆拼、平話字
+        # 陰聲韻配第6、7調即第6B、7B調（sā*、sa̍h*），也一併收錄
+        input_syllables = list(SyllableGenerator.iter_syllables())
+        input_syllables.extend(initial + final + tone
+                               for initial in SyllableGenerator.INITIALS
+                               for final in SyllableGenerator.FINALS_OPEN
+                               for tone in SyllableGenerator.TONES_CHECKED)
+        flag_combos = [(True, True), (True, False), (False, True), (False, False)]
+        for syllable in input_syllables:
+            psp = try_convert(RomanizationConverter.input_to_psp, syllable)
+            if psp is not None:
+                tables.input_to_psp[syllable] = psp
+            for tone6b, tone7b in flag_combos:
+                buc_forms = try_convert(RomanizationConverter.input_to_buc,
+                                        syllable, tone6b, tone7b)
+                if buc_forms is not None:
+                    tables.input_to_buc[(syllable, tone6b, tone7b)] = tuple(buc_forms)
+
+        # 莆拼 -> 輸入式
+        psp_finals = (list(RomanizationConverter.FINALS_PSP_TO_INPUT) +
+                      list(RomanizationConverter.WRONG_FINALS) +
+                      [final for final in RomanizationConverter.PSP_FINAL_CANDIDATES
+                       if final not in RomanizationConverter.FINALS_PSP_TO_INPUT])
+        psp_syllables = [initial + final + tone
+                         for initial in RomanizationConverter.INITIALS
+                         for final in psp_finals
+                         for tone in tones]
+        psp_syllables.extend(tables.input_to_psp.values())
+        for syllable in psp_syllables:
+            if syllable in tables.psp_to_input:
+                continue
+            result = try_convert(RomanizationConverter.psp_to_input, syllable)
+            if result is not None:
+                tables.psp_to_input[syllable] = result
+            candidates = try_convert(RomanizationConverter.psp_to_buc_candidates, syllable)
+            if candidates:
+                tables.psp_to_buc_candidates[syllable] = tuple(candidates)
+
+        # 平話字 -> 輸入式（收錄所有生成的平話字，包括 * 變體）
+        for buc_forms in tables.input_to_buc.values():
+            for buc in buc_forms:
+                if buc in tables.buc_to_input:
+                    continue
+                result = try_convert(RomanizationConverter.buc_to_input, buc)
+                if result is not None:
+                    tables.buc_to_input[buc] = result
+
+        return tables
+
+    @staticmethod
+    def buc_normalizer() -> BucNormalizer:
+        """
+        取得平話字異體拼寫正規化器（首次呼叫時建立，需要預編譯表）
+
+        Returns:
+            BucNormalizer
+        """
+        tables = RomanizationConverter.compile_tables()
+        if tables.buc_normalizer is None:
+            with _COMPILE_LOCK:
+                if tables.buc_normalizer is None:
+                    tables.buc_normalizer = BucNormalizer(tables.buc_to_input)
+        return tables.buc_normalizer
+
+    @staticmethod
+    def clear_compiled_tables():
+        """丟棄已載入的預編譯表（下次轉換時重新載入）"""
+        RomanizationConverter._compiled = None
+
+    @staticmethod
+    def is_compiled() -> bool:
+        """預編譯表是否已載入"""
+        return RomanizationConverter._compiled is not None
+
     # ========== 輔助方法 ==========
 
     @staticmethod
@@ -610,11 +1194,7 @@ class RomanizationConverter:
         """將輸入式韻母轉換為平話字韻母"""
         result = final_input
         # 按照長度從長到短替換，避免誤替換
-        for input_char, buc_char in sorted(
-            RomanizationConverter.INPUT_TO_BUC_CHARS.items(),
-            key=lambda x: len(x[0]),
-            reverse=True
-        ):
+        for input_char, buc_char in RomanizationConverter._INPUT_TO_BUC_ORDER:
             result = result.replace(input_char, buc_char)
         return result
 
@@ -630,12 +1210,8 @@ class RomanizationConverter:
                 result = result.replace(tone_mark, "")
         result = norm('NFC', result)
 
-        # 替換特殊字符
-        for buc_char, input_char in sorted(
-            RomanizationConverter.BUC_TO_INPUT_CHARS.items(),
-            key=lambda x: len(x[0]),
-            reverse=True
-        ):
+        # 替換特殊字符（按長度從長到短）
+        for buc_char, input_char in RomanizationConverter._BUC_TO_INPUT_ORDER:
             result = result.replace(buc_char, input_char)
         return result
 
@@ -674,6 +1250,143 @@ class RomanizationConverter:
         return result
 
 
+class CachedConverter:
+    """
+    帶快取的轉換器實例
+
+    每個轉換方向各有一個有上限的 LRU 快取，並記錄命中、未命中、錯誤次數
+    與各方法計算未命中項目耗費的時間。轉換本身使用 RomanizationConverter 的共用預編譯表
+    （建好後只讀），快取與統計的更新都在鎖內進行，可在執行緒池中共用同一個實例。
+    轉換失敗（ValueError）不會被快取，每次都重新拋出。
+    """
+
+    METHODS = ("psp_to_input", "input_to_psp", "input_to_buc", "buc_to_input")
+
+    def __init__(self, maxsize: int = 8192, compiled: bool = True):
+        """
+        Args:
+            maxsize: 每個方向的快取上限（條目數）
+            compiled: 是否在建立時先載入 RomanizationConverter 的預編譯表
+                      （否則在首次轉換時載入）
+        """
+        if compiled:
+            RomanizationConverter.compile_tables()
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._caches: Dict[str, OrderedDict] = {m: OrderedDict() for m in self.METHODS}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self.clear()
+
+    def clear(self):
+        """清空快取與統計"""
+        with self._lock:
+            for cache in self._caches.values():
+                cache.clear()
+            self._stats = {m: {"hits": 0, "misses": 0, "errors": 0, "time": 0.0}
+                           for m in self.METHODS}
+
+    def _call(self, method: str, key, compute, *args):
+        """查快取；未命中時呼叫 compute(*args) 並存入快取"""
+        cache = self._caches[method]
+        with self._lock:
+            result = cache.get(key)
+            if result is not None:
+                cache.move_to_end(key)
+                self._stats[method]["hits"] += 1
+                return result
+
+        start = time.perf_counter()
+        try:
+            result = compute(*args)
+        except ValueError:
+            with self._lock:
+                stats = self._stats[method]
+                stats["errors"] += 1
+                stats["misses"] += 1
+                stats["time"] += time.perf_counter() - start
+            raise
+
+        with self._lock:
+            cache[key] = result
+            if len(cache) > self.maxsize:
+                cache.popitem(last=False)
+            stats = self._stats[method]
+            stats["misses"] += 1
+            stats["time"] += time.perf_counter() - start
+        return result
+
+    def psp_to_input(self, syllable: str) -> str:
+        """莆拼 -> 輸入式（見 RomanizationConverter.psp_to_input）"""
+        return self._call("psp_to_input", syllable,
+                          RomanizationConverter.psp_to_input, syllable)
+
+    def input_to_psp(self, syllable: str) -> str:
+        """輸入式 -> 莆拼（見 RomanizationConverter.input_to_psp）"""
+        return self._call("input_to_psp", syllable,
+                          RomanizationConverter.input_to_psp, syllable)
+
+    def input_to_buc(self, syllable: str, output_tone6b: bool = True,
+                     output_tone7b: bool = True) -> List[str]:
+        """輸入式 -> 平話字（見 RomanizationConverter.input_to_buc）"""
+        key = (syllable, output_tone6b, output_tone7b)
+        return list(self._call("input_to_buc", key, self._input_to_buc_tuple, *key))
+
+    @staticmethod
+    def _input_to_buc_tuple(syllable: str, output_tone6b: bool,
+                            output_tone7b: bool) -> Tuple[str, ...]:
+        # 快取中存 tuple，避免呼叫端修改共用的列表
+        return tuple(RomanizationConverter.input_to_buc(syllable, output_tone6b, output_tone7b))
+
+    def buc_to_input(self, syllable: str) -> str:
+        """平話字 -> 輸入式（見 RomanizationConverter.buc_to_input）"""
+        return self._call("buc_to_input", syllable,
+                          RomanizationConverter.buc_to_input, syllable)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        返回各方法的統計快照
+
+        Returns:
+            {方法名: {"hits", "misses", "errors", "time", "size", "hit_rate"}}
+        """
+        with self._lock:
+            snapshot = {}
+            for method in self.METHODS:
+                stats = dict(self._stats[method])
+                calls = stats["hits"] + stats["misses"]
+                stats["size"] = len(self._caches[method])
+                stats["hit_rate"] = stats["hits"] / calls if calls else 0.0
+                snapshot[method] = stats
+            return snapshot
+
+    def merge_stats(self, stats: Dict[str, Dict[str, float]],
+                    baseline: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        加上另一個實例（如子行程中的轉換器）的統計
+
+        Args:
+            stats: 該實例的 stats() 快照
+            baseline: 該實例較早的快照（只加兩次快照之間的差額）
+        """
+        with self._lock:
+            for method, values in stats.items():
+                for field in ("hits", "misses", "errors", "time"):
+                    delta = values[field] - (baseline[method][field] if baseline else 0)
+                    self._stats[method][field] += delta
+
+    def format_stats(self) -> str:
+        """將統計格式化為多行文字（只列出有呼叫的方法）"""
+        lines = []
+        for method, stats in self.stats().items():
+            calls = stats["hits"] + stats["misses"]
+            if not calls:
+                continue
+            lines.append(f"{method}: 呼叫 {calls}，命中率 {stats['hit_rate']:.1%}，"
+                         f"錯誤 {stats['errors']}，快取 {stats['size']} 項，"
+                         f"耗時 {stats['time'] * 1000:.1f} ms")
+        return "\n".join(lines)
+
+
 # ========== 測試代碼 ==========
 if __name__ == "__main__":
     converter = RomanizationConverter()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+建置用字串池
+String Pool for Dictionary Builds
+
+建置過程中，同樣的漢字、編碼與權重字串會在上萬個 tuple、集合與列表中重複出現：
+每讀一行詞庫、每查一次 SQLite、每組合一次拼式都會產生新的字串物件。
+讀取端把字串交給字串池，內容相同的字串就共用同一個物件，重複的副本隨即可被回收。
+
+不用 sys.intern() 的原因：字串池可以統計省下的記憶體，也可以整個清掉；
+sys.intern() 的字串在行程結束前都不會釋放。
+
+只在要長時間持有大量字串（整個詞表留在記憶體中）時才使用；
+逐條串流處理的路徑不要經過字串池，否則每個不同的字串都會被池留住，
+記憶體用量反而隨輸入大小增加。
+
+用法：
+    from string_pool import STRING_POOL
+    text = STRING_POOL.intern(text)
+    print(STRING_POOL.report())
+    STRING_POOL.clear()         # 步驟結束後釋放池
+"""
+
+import sys
+from typing import Dict, Optional
+
+
+class StringPool:
+    """字串池：相同內容的字串只保留一個物件"""
+
+    def __init__(self):
+        self._strings: Dict[str, str] = {}
+        self.duplicates = 0         # 以池中物件取代的重複字串數
+        self.duplicate_bytes = 0    # 被取代的重複字串所佔的位元組
+
+    def intern(self, value: Optional[str]) -> Optional[str]:
+        """
+        返回池中內容相同的字串（第一次出現時放入池中）
+
+        Args:
+            value: 字串（None 原樣返回，方便處理可省略的欄位）
+        """
+        if value is None:
+            return None
+        pooled = self._strings.setdefault(value, value)
+        if pooled is not value:
+            self.duplicates += 1
+            self.duplicate_bytes += sys.getsizeof(value)
+        return pooled
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._strings
+
+    @property
+    def pool_bytes(self) -> int:
+        """池本身（字串與雜湊表）所佔的位元組"""
+        return sys.getsizeof(self._strings) + sum(map(sys.getsizeof, self._strings))
+
+    def clear(self):
+        """清空字串池與統計"""
+        self._strings.clear()
+        self.duplicates = self.duplicate_bytes = 0
+
+    @property
+    def net_bytes(self) -> int:
+        """淨省下的位元組：被取代的重複字串減去池本身的用量（可能為負）"""
+        return self.duplicate_bytes - self.pool_bytes
+
+    def report(self) -> str:
+        """統計說明（池本身也佔記憶體，淨值才是實際省下的量）"""
+        if not self._strings:
+            return "字串池：未使用"
+        net = self.net_bytes
+        return (f"字串池：{len(self._strings):,} 個不同字串，"
+                f"共用 {self.duplicates:,} 個重複字串"
+                f"（重複副本 {self.duplicate_bytes / 1024:,.0f} KB，"
+                f"池本身 {self.pool_bytes / 1024:,.0f} KB，"
+                f"淨{'省下' if net >= 0 else '多用'} {abs(net) / 1024:,.0f} KB）")
+
+
+# 建置步驟共用的字串池（每個步驟結束時清空，見 tools/build_all_dicts.py）
+STRING_POOL = StringPool()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+未分詞羅馬字的音節切分器
+Syllabifier for Unsegmented Romanized Text
+
+將沒有空格的輸入式或莆拼字串（如 "pocheng2"、"sioongdaa"）切分為合法音節。
+以合法音節的字首樹（trie）配合動態規劃列舉所有切分方式，
+並按詞庫權重排序：
+1. 整個切分（去掉聲調）在詞庫中的詞頻，越高越前
+2. 音節數，越少越前
+3. 各音節（去掉聲調）單字詞頻的總和，越高越前
+
+聲調數字可有可無；有寫時必須是該音節的合法聲調。
+空格、連字號與撇號視為固定的音節邊界。
+
+長字串的切分數會組合爆炸，因此只保留排序最前的 max_parses 種：
+- 第 2、3 項（音節數、單字詞頻總和，再依音節本身）可逐段累加，
+  動態規劃的每一格只留這個次序的前 max_parses 個（beam search），結果與完整列舉後排序相同
+- 第 1 項只有整個切分恰為詞庫詞時才非零，這些切分直接由詞庫詞對齊字串找出，
+  不經動態規劃，因此不會被上限剔除
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from rime_dict import load_entries
+from romanization_converter import RomanizationConverter
+from syllable_ids import get_syllable_table
+
+
+# 字首樹中標記「到此為一個完整音節」的鍵
+_END = ""
+
+
+class Parse(NamedTuple):
+    """一種切分方式"""
+    syllables: Tuple[str, ...]
+    weight: int            # 整個切分在詞庫中的詞頻（找不到為 0）
+    syllable_weight: int   # 各音節單字詞頻的總和
+
+
+class Syllabifier:
+    """音節切分器"""
+
+    _BOUNDARY = re.compile(r"[-\s']+")
+    _TONE = re.compile(r"\d")
+
+    def __init__(self, system: str = "input", max_parses: int = 256):
+        """
+        Args:
+            system: 字串所屬系統（"input" 或 "psp"）
+            max_parses: 最多返回的切分數（排序最前者；見模組說明）
+        """
+        if system not in ("input", "psp"):
+            raise ValueError(f"只支援輸入式與莆拼的切分：{system}")
+        self.system = system
+        self.max_parses = max_parses
+
+        # 合法音節（帶調）與字首樹（不帶調）
+        self.syllables = set()
+        self.trie: Dict[str, dict] = {}
+        for syllable in self._valid_syllables(system):
+            self.syllables.add(syllable)
+            self._insert(syllable[:-1])
+
+        # 詞頻：鍵為去掉聲調的音節 tuple
+        self.word_weights: Dict[Tuple[str, ...], int] = {}
+        self.syllable_weights: Dict[str, int] = {}
+        # 連寫的去調字串 -> 詞庫詞（去調音節 tuple）
+        self.words_by_text: Dict[str, Set[Tuple[str, ...]]] = {}
+
+    @staticmethod
+    def _valid_syllables(system: str) -> Iterable[str]:
+        """列舉該系統的合法帶調音節"""
+        if system == "input":
+            table = get_syllable_table()
+            return table.forms["input"][:table.static_size]
+        # 莆拼：預編譯表收錄的所有莆拼拼法（含容錯拼法）
+        return RomanizationConverter.compile_tables().psp_to_input.keys()
+
+    def _insert(self, base: str):
+        node = self.trie
+        for char in base:
+            node = node.setdefault(char, {})
+        node[_END] = {}
+
+    # ========== 詞頻 ==========
+
+    @classmethod
+    def strip_tones(cls, syllables: Iterable[str]) -> Tuple[str, ...]:
+        """去掉每個音節的聲調數字"""
+        return tuple(cls._TONE.sub("", syllable) for syllable in syllables)
+
+    def add_weight(self, code: str, weight: int):
+        """登記一個詞庫詞條的詞頻（同一讀音取最大值）"""
+        key = self.strip_tones(code.split())
+        if not key:
+            return
+        if key[0] and len(key) == 1:
+            self.syllable_weights[key[0]] = max(self.syllable_weights.get(key[0], 0), weight)
+        self.word_weights[key] = max(self.word_weights.get(key, 0), weight)
+        self.words_by_text.setdefault(''.join(key), set()).add(key)
+
+    def load_dict(self, dict_file) -> int:
+        """
+        從 Rime 詞庫載入詞頻（編碼須與切分器屬同一系統）
+
+        Returns:
+            登記的詞條數
+        """
+        count = 0
+        for entry in load_entries(dict_file):
+            self.add_weight(entry.code, entry.weight_value())
+            count += 1
+        return count
+
+    # ========== 切分 ==========
+
+    def _chunk_ends(self, text: str) -> Tuple[str, List[int]]:
+        """
+        去掉固定邊界
+
+        Returns:
+            (去掉邊界後的字串, 每個位置所屬片段的結束位置)
+        """
+        chunks = [chunk for chunk in self._BOUNDARY.split(text.strip().lower()) if chunk]
+        ends: List[int] = []
+        for chunk in chunks:
+            ends.extend([len(ends) + len(chunk)] * len(chunk))
+        return "".join(chunks), ends
+
+    def _syllable_at(self, text: str, ends: List[int], i: int, base: str) -> Optional[str]:
+        """
+        text[i:] 以不帶調的 base 開頭時，該處的音節（含後接的聲調數字）
+
+        Returns:
+            音節；base 跨越固定邊界或聲調不合法時為 None
+        """
+        j = i + len(base)
+        if j > ends[i] or text[i:j] != base:
+            return None
+        if j < ends[i] and text[j].isdigit():
+            syllable = base + text[j]
+            return syllable if syllable in self.syllables else None
+        return base
+
+    def _segment(self, text: str, ends: List[int]) -> List[Tuple[int, int, Tuple[str, ...]]]:
+        """
+        以動態規劃列舉切分，每格只保留次序最前的 max_parses 個
+
+        Returns:
+            (音節數, -單字詞頻總和, 音節) 的列表，已按此次序排序
+        """
+        n = len(text)
+        # parses[i]：text[i:] 的切分
+        parses: List[List[Tuple[int, int, Tuple[str, ...]]]] = [[] for _ in range(n + 1)]
+        parses[n] = [(0, 0, ())]
+
+        for i in range(n - 1, -1, -1):
+            results = parses[i]
+            node = self.trie
+            j = i
+            while j < ends[i] and text[j] in node:
+                node = node[text[j]]
+                j += 1
+                if _END not in node:
+                    continue
+                syllable = self._syllable_at(text, ends, i, text[i:j])
+                if syllable is None:
+                    continue
+                rest = parses[i + len(syllable)]
+                if not rest:
+                    continue
+                weight = self.syllable_weights.get(text[i:j], 0)
+                for count, negative_weight, syllables in rest:
+                    results.append((count + 1, negative_weight - weight, (syllable,) + syllables))
+            # 兩個切分共用同一段後綴時，次序與該後綴的次序相同，因此每格取前幾個即可
+            results.sort()
+            del results[self.max_parses:]
+
+        return parses[0]
+
+    def _dictionary_parses(self, text: str, ends: List[int]) -> List[Tuple[str, ...]]:
+        """整個切分恰為詞庫詞的所有切分（詞庫詞逐音節對齊字串）"""
+        found = []
+        for key in self.words_by_text.get(self._TONE.sub("", text), ()):
+            syllables = []
+            i = 0
+            for base in key:
+                syllable = self._syllable_at(text, ends, i, base) if i < len(text) else None
+                if syllable is None or not self._is_base(base):
+                    break
+                syllables.append(syllable)
+                i += len(syllable)
+            else:
+                if i == len(text):
+                    found.append(tuple(syllables))
+        return found
+
+    def _is_base(self, base: str) -> bool:
+        """base 是否為合法的不帶調音節"""
+        node = self.trie
+        for char in base:
+            node = node.get(char)
+            if node is None:
+                return False
+        return _END in node
+
+    def parse(self, text: str) -> List[Parse]:
+        """
+        列舉字串的切分方式，按詞庫權重排序
+
+        Args:
+            text: 未分詞的羅馬字（如 "pocheng2"、"sioongdaa"）
+
+        Returns:
+            排序最前的至多 max_parses 種切分（最佳在前）；無法切分時為空列表
+        """
+        text, ends = self._chunk_ends(text)
+        if not text:
+            return []
+
+        candidates = {syllables for _, _, syllables in self._segment(text, ends)}
+        candidates.update(self._dictionary_parses(text, ends))
+
+        results = []
+        for syllables in candidates:
+            toneless = self.strip_tones(syllables)
+            results.append(Parse(
+                syllables,
+                self.word_weights.get(toneless, 0),
+                sum(self.syllable_weights.get(s, 0) for s in toneless),
+            ))
+
+        results.sort(key=lambda p: (-p.weight, len(p.syllables), -p.syllable_weight, p.syllables))
+        del results[self.max_parses:]
+        return results
+
+    def best(self, text: str) -> Optional[Tuple[str, ...]]:
+        """返回最佳切分；無法切分時返回 None"""
+        parses = self.parse(text)
+        return parses[0].syllables if parses else None
+
+    def is_ambiguous(self, text: str) -> bool:
+        """字串是否有多於一種切分"""
+        return len(self.parse(text)) > 1
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    base_dir = Path(__file__).parent.parent
+    syllabifier = Syllabifier("input")
+    dict_file = base_dir / "bannuaci" / "borhlang_bannuaci_han.dict.yaml"
+    print(f"載入詞頻：{syllabifier.load_dict(dict_file)} 個詞條")
+
+    samples = sys.argv[1:] or ["pocheng2", "sioongdaa", "pocheng", "ngaleh"]
+    for sample in samples:
+        parses = syllabifier.parse(sample)
+        print(f"\n{sample}：{len(parses)} 種切分")
+        for p in parses[:5]:
+            print(f"  {' '.join(p.syllables):24} 詞頻 {p.weight:5}  單字 {p.syllable_weight}")
+
+    # 批次檢查：詞庫中去掉空格與聲調後，能切成另一個詞庫詞的多音節詞
+    ambiguous = 0
+    total = 0
+    for key in syllabifier.word_weights:
+        if len(key) < 2:
+            continue
+        total += 1
+        in_dict = [p for p in syllabifier.parse(''.join(key)) if p.weight]
+        if len(in_dict) > 1:
+            ambiguous += 1
+            if ambiguous <= 5:
+                print("  " + " / ".join(' '.join(p.syllables) for p in in_dict))
+    print(f"\n多音節詞 {total} 個（無調），連寫後與其他詞庫詞衝突：{ambiguous} 個")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音節編號陣列的向量化轉換
+Vectorized Conversion over Syllable-ID Arrays
+
+以 syllable_ids.SyllableTable 的編號為基礎，將整批詞編碼攤平為
+一個音節編號陣列加上詞的起訖位移（offsets），再用查找陣列一次完成：
+- 系統間轉換（莆拼 -> 輸入式 -> 平話字）：查找陣列的 fancy indexing
+- 韻母分類（第6B、7B調韻母、陰聲韻 / 鼻音韻 / 鼻化韻 / 入聲韻）與聲調
+
+安裝 numpy 時使用 numpy 陣列運算；未安裝時退回 array + 串列的純 Python 實作，
+兩者結果相同。
+"""
+
+import time
+from array import array
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為選用依賴
+    np = None
+
+from romanization_converter import RomanizationConverter
+from syllable_ids import SyllableTable, get_syllable_table
+
+
+# 韻尾類型代碼（名稱與 AssimilationReverser.get_final_type 相同）
+FINAL_OPEN = 0       # 陰聲韻 (a/i/e/o/u/y)
+FINAL_NASAL_NG = 1   # 鼻音韻 (ng)
+FINAL_NASAL_NN = 2   # 鼻化韻 (nn)
+FINAL_STOP = 3       # 入聲韻 (h)
+
+FINAL_TYPE_NAMES = ("open", "nasal_ng", "nasal_nn", "stop")
+
+
+def final_type_code(final_input: str) -> int:
+    """判斷輸入式韻母的韻尾類型代碼"""
+    if final_input.endswith("nn"):
+        return FINAL_NASAL_NN
+    if final_input.endswith("ng"):
+        return FINAL_NASAL_NG
+    if final_input.endswith("h"):
+        return FINAL_STOP
+    return FINAL_OPEN
+
+
+class CodeArray(NamedTuple):
+    """
+    一批詞編碼的扁平表示
+
+    ids 為所有音節編號；第 i 個詞是 ids[offsets[i]:offsets[i + 1]]
+    """
+    ids: Sequence[int]
+    offsets: Sequence[int]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def word(self, i: int) -> Sequence[int]:
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+
+class SyllableArrays:
+    """音節編號的查找陣列"""
+
+    def __init__(self, table: Optional[SyllableTable] = None, use_numpy: bool = True):
+        """
+        Args:
+            table: 音節編號表（預設使用全域共用表）
+            use_numpy: 是否使用 numpy（未安裝時自動停用）
+        """
+        self.table = table if table is not None else get_syllable_table()
+        self.use_numpy = use_numpy and np is not None
+        self._size = -1
+        self.refresh()
+
+    def refresh(self):
+        """重建查找陣列（編號表追加動態編號後呼叫）"""
+        table = self.table
+        if len(table) == self._size:
+            return
+
+        finals = table.finals
+        final_types = [final_type_code(final) for final in finals]
+        tone6b = [final in RomanizationConverter.TONE6B_FINALS_INPUT for final in finals]
+        tone7b = [final in RomanizationConverter.TONE7B_FINALS_INPUT for final in finals]
+
+        if self.use_numpy:
+            self.forms = {system: np.array(table.forms[system], dtype=object)
+                          for system in table.SYSTEMS}
+            self.final_ids = np.frombuffer(table.final_ids, dtype=np.uint16).copy()
+            self.tones = np.frombuffer(table.tones, dtype=np.uint8).copy()
+            self.final_type_lookup = np.array(final_types, dtype=np.uint8)
+            self.tone6b_lookup = np.array(tone6b, dtype=bool)
+            self.tone7b_lookup = np.array(tone7b, dtype=bool)
+        else:
+            self.forms = {system: list(table.forms[system]) for system in table.SYSTEMS}
+            self.final_ids = array('H', table.final_ids)
+            self.tones = array('B', table.tones)
+            self.final_type_lookup = array('B', final_types)
+            self.tone6b_lookup = tone6b
+            self.tone7b_lookup = tone7b
+
+        self._size = len(table)
+
+    # ========== 編碼 ==========
+
+    def encode_codes(self, codes: Iterable[str], system: str = "input") -> CodeArray:
+        """
+        將一批詞編碼轉為扁平的編號陣列
+
+        Args:
+            codes: 詞編碼（空格或連字號分隔的音節）
+            system: 編碼所屬系統
+
+        Returns:
+            CodeArray
+        """
+        encode = self.table.encode
+        ids = array('I')
+        offsets = array('I', [0])
+        for code in codes:
+            ids.extend(encode(code, system))
+            offsets.append(len(ids))
+        self.refresh()
+
+        if self.use_numpy:
+            return CodeArray(np.frombuffer(ids, dtype=np.uint32).astype(np.intp),
+                             np.frombuffer(offsets, dtype=np.uint32).astype(np.intp))
+        return CodeArray(ids, offsets)
+
+    def _gather(self, lookup, ids):
+        """以編號陣列索引查找陣列"""
+        if self.use_numpy:
+            return lookup[ids]
+        return [lookup[i] for i in ids]
+
+    # ========== 轉換 ==========
+
+    def translate(self, codes: CodeArray, dst: str) -> List[Optional[str]]:
+        """
+        將整批詞轉為目標系統
+
+        Args:
+            codes: encode_codes() 的結果
+            dst: 目標系統（"psp", "input", "buc"）
+
+        Returns:
+            每個詞的編碼；含無法轉換音節的詞為 None
+        """
+        gathered = self._gather(self.forms[dst], codes.ids)
+        if self.use_numpy:
+            gathered = gathered.tolist()
+            offsets = codes.offsets.tolist()
+        else:
+            offsets = codes.offsets
+
+        separator = RomanizationConverter.WORD_SEPARATORS[dst]
+        results = []
+        for start, end in zip(offsets, offsets[1:]):
+            try:
+                results.append(separator.join(gathered[start:end]))
+            except TypeError:  # 含 None（該系統無對應形式）
+                results.append(None)
+        return results
+
+    def convert_codes(self, codes: Iterable[str], src: str, dst: str) -> List[Optional[str]]:
+        """整批轉換詞編碼（encode_codes + translate）"""
+        return self.translate(self.encode_codes(codes, src), dst)
+
+    # ========== 分類 ==========
+
+    def final_types(self, ids):
+        """每個音節的韻尾類型代碼（FINAL_OPEN / FINAL_NASAL_NG / FINAL_NASAL_NN / FINAL_STOP）"""
+        return self._gather(self.final_type_lookup, self._gather(self.final_ids, ids))
+
+    def tone_numbers(self, ids):
+        """每個音節的聲調數字（無法解析時為 0）"""
+        return self._gather(self.tones, ids)
+
+    def is_open_final(self, ids):
+        """是否為陰聲韻（以元音結尾）"""
+        types = self.final_types(ids)
+        if self.use_numpy:
+            return types == FINAL_OPEN
+        return [t == FINAL_OPEN for t in types]
+
+    def is_checked_final(self, ids):
+        """是否為入聲韻（以 h 結尾）"""
+        types = self.final_types(ids)
+        if self.use_numpy:
+            return types == FINAL_STOP
+        return [t == FINAL_STOP for t in types]
+
+    def is_tone6b_final(self, ids):
+        """韻母是否在 TONE6B_FINALS_INPUT 中"""
+        return self._gather(self.tone6b_lookup, self._gather(self.final_ids, ids))
+
+    def is_tone7b_final(self, ids):
+        """韻母是否在 TONE7B_FINALS_INPUT 中"""
+        return self._gather(self.tone7b_lookup, self._gather(self.final_ids, ids))
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    from rime_dict import iter_entries
+
+    # 以漢字版平話字詞庫測試整批轉換速度
+    dict_file = Path(__file__).parent.parent / "bannuaci" / "borhlang_bannuaci_han.dict.yaml"
+    codes = [entry.code for entry in iter_entries(dict_file)]
+
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    codes = codes * repeat
+    print(f"詞條數：{len(codes)}（numpy：{'有' if np is not None else '無'}）")
+
+    start = time.perf_counter()
+    expected = [RomanizationConverter.try_convert_word(code, "input", "buc").result
+                for code in codes]
+    print(f"逐詞轉換：{time.perf_counter() - start:.3f} 秒")
+
+    for use_numpy in ([True, False] if np is not None else [False]):
+        arrays = SyllableArrays(use_numpy=use_numpy)
+        start = time.perf_counter()
+        encoded = arrays.encode_codes(codes, "input")
+        middle = time.perf_counter()
+        results = arrays.translate(encoded, "buc")
+        end = time.perf_counter()
+        label = "numpy" if use_numpy else "純 Python"
+        print(f"陣列轉換（{label}）：編碼 {middle - start:.3f} 秒，轉換 {end - middle:.3f} 秒，"
+              f"結果{'一致' if results == expected else '不一致'}")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音節整數編號表
+Syllable ID Interning Table
+
+將莆拼、輸入式、平話字三套系統的音節統一映射為緊湊的整數編號：
+- 靜態編號：整個合法音節空間（SyllableGenerator + 第6B、7B調），順序固定
+- 動態編號：表外的音節在首次遇到時追加，確保任何輸入都能編號
+
+每個編號在三套系統中各有一個顯示形式（以列表按編號索引），
+因此詞庫可以存成小整數陣列，系統間轉換只是陣列索引，
+去重與合併只需對整數 tuple 雜湊。
+
+不變式：forms[系統][index[系統][s]] == s，即同一系統內編碼後可原樣解碼。
+"""
+
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from romanization_converter import RomanizationConverter
+from syllable_inventory import SyllableGenerator
+
+
+class SyllableTable:
+    """音節編號表"""
+
+    SYSTEMS = RomanizationConverter.SYSTEMS
+
+    def __init__(self):
+        # 各系統的顯示形式，按編號索引（轉換失敗為 None）
+        self.forms: Dict[str, List[Optional[str]]] = {system: [] for system in self.SYSTEMS}
+        # 各系統的音節 -> 編號
+        self.index: Dict[str, Dict[str, int]] = {system: {} for system in self.SYSTEMS}
+
+        # 輸入式聲母、韻母清單；每個編號以索引記錄其 (聲母, 韻母, 聲調)
+        self.initials: List[str] = []
+        self.finals: List[str] = []
+        self._initial_index: Dict[str, int] = {}
+        self._final_index: Dict[str, int] = {}
+        self.initial_ids = array('H')
+        self.final_ids = array('H')
+        self.tones = array('B')   # 聲調數字，無法解析時為 0
+
+        # 靜態音節數（之後追加的均為動態編號）
+        self.static_size = 0
+
+        self._build_static()
+
+    # ========== 建表 ==========
+
+    def _build_static(self):
+        """以輸入式列舉整個合法音節空間，建立靜態編號"""
+        input_syllables = list(SyllableGenerator.iter_syllables())
+        input_syllables.extend(initial + final + tone
+                               for initial in SyllableGenerator.INITIALS
+                               for final in SyllableGenerator.FINALS_OPEN
+                               for tone in SyllableGenerator.TONES_CHECKED)
+
+        for syllable in input_syllables:
+            if syllable in self.index["input"]:
+                continue
+            self._append("input", syllable)
+
+        # 莆拼、平話字形式只有在能原樣轉回該編號時才登記，否則留給動態編號
+        for syllable_id in range(len(self.forms["input"])):
+            input_form = self.forms["input"][syllable_id]
+            for system in ("psp", "buc"):
+                form = self.forms[system][syllable_id]
+                if form is None or form in self.index[system]:
+                    continue
+                if self._convert(form, system, "input") == input_form:
+                    self.index[system][form] = syllable_id
+
+        self.static_size = len(self.forms["input"])
+
+    @staticmethod
+    def _convert(syllable: str, src: str, dst: str) -> Optional[str]:
+        """轉換單個音節，失敗時返回 None"""
+        try:
+            return RomanizationConverter.convert_syllable(syllable, src, dst)
+        except (ValueError, KeyError):
+            return None
+
+    def _append(self, system: str, syllable: str) -> int:
+        """追加一個新編號，並計算其在各系統的顯示形式"""
+        syllable_id = len(self.forms["input"])
+        input_form = syllable if system == "input" else self._convert(syllable, system, "input")
+
+        for dst in self.SYSTEMS:
+            if dst == system:
+                form = syllable
+            elif input_form is None:
+                form = None
+            else:
+                form = self._convert(input_form, "input", dst)
+            self.forms[dst].append(form)
+        self.index[system][syllable] = syllable_id
+
+        # 記錄 (聲母, 韻母, 聲調)
+        initial, final, tone = self.split_input(input_form or "")
+        self.initial_ids.append(self._intern_part(initial, self.initials, self._initial_index))
+        self.final_ids.append(self._intern_part(final, self.finals, self._final_index))
+        self.tones.append(int(tone) if tone else 0)
+        return syllable_id
+
+    @staticmethod
+    def _intern_part(part: str, parts: List[str], part_index: Dict[str, int]) -> int:
+        if part not in part_index:
+            part_index[part] = len(parts)
+            parts.append(part)
+        return part_index[part]
+
+    @staticmethod
+    def split_input(syllable: str) -> Tuple[str, str, str]:
+        """
+        將輸入式音節拆為 (聲母, 韻母, 聲調)
+
+        Returns:
+            三元組；沒有聲調數字時聲調為空字串
+        """
+        syllable = syllable.lower()
+        tone = syllable[-1] if syllable and syllable[-1].isdigit() else ""
+        base = syllable[:-1] if tone else syllable
+        initial = RomanizationConverter._extract_initial_input(base)
+        return initial, base[len(initial):], tone
+
+    # ========== 編號與解碼 ==========
+
+    def __len__(self) -> int:
+        return len(self.forms["input"])
+
+    def intern(self, syllable: str, system: str = "input") -> int:
+        """
+        取得音節編號，表外音節追加動態編號
+
+        Args:
+            syllable: 音節
+            system: 音節所屬系統（"psp", "input", "buc"）
+
+        Returns:
+            整數編號
+        """
+        syllable_id = self.index[system].get(syllable)
+        if syllable_id is None:
+            syllable_id = self._append(system, syllable)
+        return syllable_id
+
+    def lookup(self, syllable: str, system: str = "input") -> Optional[int]:
+        """查詢音節編號，不追加新編號"""
+        return self.index[system].get(syllable)
+
+    def encode(self, code: str, system: str = "input") -> Tuple[int, ...]:
+        """
+        將詞的編碼（空格或連字號分隔的音節）轉為編號 tuple
+
+        Args:
+            code: 詞的編碼（如 "po2 cheng2"）
+            system: 編碼所屬系統
+
+        Returns:
+            編號 tuple（可直接作為字典鍵或集合元素）
+        """
+        index = self.index[system]
+        ids = []
+        for syllable in RomanizationConverter._WORD_SPLIT.split(code.strip()):
+            if not syllable:
+                continue
+            syllable_id = index.get(syllable)
+            if syllable_id is None:
+                syllable_id = self._append(system, syllable)
+            ids.append(syllable_id)
+        return tuple(ids)
+
+    def decode(self, ids: Sequence[int], system: str = "input") -> str:
+        """
+        將編號序列轉為指定系統的詞編碼
+
+        Raises:
+            ValueError: 某個編號在該系統沒有對應形式
+        """
+        forms = self.forms[system]
+        syllables = []
+        for syllable_id in ids:
+            form = forms[syllable_id]
+            if form is None:
+                raise ValueError(f"編號 {syllable_id}（{self.forms['input'][syllable_id]}）"
+                                 f"無法轉為 {system}")
+            syllables.append(form)
+        return RomanizationConverter.WORD_SEPARATORS[system].join(syllables)
+
+    def convert(self, code: str, src: str, dst: str) -> str:
+        """經由編號在兩個系統之間轉換詞編碼"""
+        return self.decode(self.encode(code, src), dst)
+
+    def triple(self, syllable_id: int) -> Tuple[str, str, str]:
+        """取得編號對應的輸入式 (聲母, 韻母, 聲調)"""
+        tone = self.tones[syllable_id]
+        return (self.initials[self.initial_ids[syllable_id]],
+                self.finals[self.final_ids[syllable_id]],
+                str(tone) if tone else "")
+
+
+_shared_table: Optional[SyllableTable] = None
+
+
+def get_syllable_table() -> SyllableTable:
+    """取得全域共用的音節編號表（首次呼叫時建立）"""
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = SyllableTable()
+    return _shared_table
+
+
+if __name__ == "__main__":
+    table = get_syllable_table()
+    print(f"靜態音節數：{table.static_size}")
+    print(f"聲母 {len(table.initials)} 個，韻母 {len(table.finals)} 個")
+
+    for code, system in [("po2 cheng2", "input"), ("pou2 ceng2", "psp"), ("pó-chéng", "buc")]:
+        ids = table.encode(code, system)
+        print(f"{code} ({system}) -> {ids}")
+        for dst in table.SYSTEMS:
+            print(f"  {dst}: {table.decode(ids, dst)}")
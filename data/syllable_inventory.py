@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+莆仙語合法音節表
+Puxian Valid Syllable Inventory
+
+以輸入式平話字定義全部合法音節（聲母 × 韻母 × 聲調），
+供詞庫生成與轉換器預編譯表共用，確保各工具使用同一個音節空間
+"""
+
+from typing import Iterator, Set
+
+
+class SyllableGenerator:
+    """合法音節生成器"""
+
+    # 聲母（15個）
+    INITIALS = ['b', 'p', 'm', 'd', 't', 'n', 'l', 'g', 'k', 'h', 'ng', 'c', 'ch', 's', '']
+
+    # 韻母分類
+    FINALS_NASAL_NN = ['ann', 'aann', 'eenn', 'oonn', 'iann', 'aaunn', 'oinn', 'ioonn', 'uann']
+    FINALS_NASAL_NG = ['ng', 'ang', 'ioong', 'eeng', 'uang', 'eong', 'oong', 'eng', 'iang', 'ing', 'yng']
+    FINALS_CHECKED = ['ah', 'aah', 'aih', 'aauh', 'eh', 'eeh', 'eoh', 'ih', 'iah', 'iooh', 'oih', 'ooh', 'uah', 'uh', 'yh']
+    FINALS_OPEN = ['a', 'aa', 'e', 'ee', 'oo', 'eo', 'i', 'y', 'u', 'ia', 'aau', 'iu', 'ai', 'au', 'o', 'ua', 'uai', 'ui', 'ioo']
+
+    # 聲調
+    TONES_OPEN = ['1', '2', '3', '4', '5']
+    TONES_CHECKED = ['6', '7']
+
+    @classmethod
+    def is_valid_syllable(cls, initial: str, final: str, tone: str) -> bool:
+        """檢查音節是否合法"""
+        if initial in ['m', 'n', 'ng'] and final in cls.FINALS_NASAL_NN:
+            return False
+        if initial == 'ng' and final == 'ng':
+            return False
+        if final in cls.FINALS_CHECKED and tone not in cls.TONES_CHECKED:
+            return False
+        all_open_finals = cls.FINALS_NASAL_NN + cls.FINALS_NASAL_NG + cls.FINALS_OPEN
+        if final in all_open_finals and tone not in cls.TONES_OPEN:
+            return False
+        return True
+
+    @classmethod
+    def iter_syllables(cls) -> Iterator[str]:
+        """按固定順序逐一產生所有合法音節（聲母 → 韻母 → 聲調）"""
+        all_finals = (cls.FINALS_NASAL_NN + cls.FINALS_NASAL_NG +
+                      cls.FINALS_CHECKED + cls.FINALS_OPEN)
+        all_tones = cls.TONES_OPEN + cls.TONES_CHECKED
+
+        for initial in cls.INITIALS:
+            for final in all_finals:
+                for tone in all_tones:
+                    if cls.is_valid_syllable(initial, final, tone):
+                        yield f"{initial}{final}{tone}"
+
+    @classmethod
+    def generate_all_syllables(cls) -> Set[str]:
+        """生成所有合法音節"""
+        return set(cls.iter_syllables())
+
+
+if __name__ == "__main__":
+    syllables = list(SyllableGenerator.iter_syllables())
+    print(f"合法音節總數：{len(syllables)}")
+    print("前 10 個：", syllables[:10])
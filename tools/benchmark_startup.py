@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轉換模組啟動時間測試
+Romanization Module Startup Benchmark
+
+每次都啟動新的直譯器（與 build_all_dicts.py 的每個步驟相同），量測：
+1. 匯入 romanization_converter
+2. 不用快取建立預編譯表
+3. 從快取檔載入預編譯表
+4. 整個行程的執行時間（含直譯器啟動）
+
+用法：python tools/benchmark_startup.py [重複次數]
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+# 在子行程中執行，輸出 "匯入秒數 建表秒數"
+SNIPPET = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {data_dir!r})
+from romanization_converter import RomanizationConverter
+imported = time.perf_counter()
+RomanizationConverter.compile_tables(use_cache={use_cache})
+compiled = time.perf_counter()
+print(imported - start, compiled - imported)
+"""
+
+
+def run_once(use_cache: bool):
+    """啟動一個新的直譯器，返回 (匯入, 建表, 整個行程) 秒數"""
+    code = SNIPPET.format(data_dir=str(DATA_DIR), use_cache=use_cache)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                            text=True, check=True).stdout
+    total = time.perf_counter() - start
+    import_time, compile_time = map(float, output.split())
+    return import_time, compile_time, total
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    # 先確保快取檔存在且為最新
+    run_once(use_cache=True)
+
+    print(f"重複 {repeat} 次，取中位數（毫秒）")
+    print(f"{'模式':12} {'匯入':>8} {'建表':>8} {'整個行程':>10}")
+    for label, use_cache in [("不用快取", False), ("載入快取", True)]:
+        results = [run_once(use_cache) for _ in range(repeat)]
+        medians = [statistics.median(column) * 1000 for column in zip(*results)]
+        print(f"{label:12} {medians[0]:8.1f} {medians[1]:8.1f} {medians[2]:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,53 +10,52 @@ Build all dictionaries from all data sources
 3. 合併所有詞彙到 pouseng_pinging/borhlang_pouleng.dict.yaml
 4. 轉換為平話字詞表 (bannuaci/borhlang_bannuaci.dict.yaml)
 5. 生成純平話字詞表 (bannuaci/borhlang_bannuaci.dict.yaml with Lua format)
+
+各步驟在同一個行程中依相依關係執行（見 build_graph()），
+詞條在步驟之間直接以記憶體傳遞，最後印出各步驟的狀態與耗時。
+輸入檔（資料與程式碼）都沒變的步驟會被略過（建置紀錄：.cache/build_manifest.json），
+--force 重新執行所有步驟。
+提取與建立索引的步驟在子行程中與其他步驟平行執行（-j 指定子行程數）。
 """
 
+import argparse
+import importlib
+import os
 import sys
-import subprocess
+from functools import partial
 from pathlib import Path
 from collections import defaultdict
+from operator import itemgetter
+from typing import Iterable, Iterator, Optional
 import yaml
 
 # 導入羅馬字轉換器（用於聖經詞彙的格式轉換）
 sys.path.append(str(Path(__file__).parent.parent / "data"))
 from romanization_converter import RomanizationConverter
+from rime_dict import DictEntry, DictWriter, sort_by_weight
+from lexicon_store import LexiconStore
+from dict_index import build_index, index_path, is_fresh
+from output_files import status_label
+from binary_lexicon import convert_dict_file, lexicon_path, write_binary_lexicon
+from external_sort import DEFAULT_RUN_SIZE, ExternalSorter, group_sorted
+from string_pool import STRING_POOL
+from build_graph import BuildGraph, TaskFailed, module_closure
 
+import extract_vocab_from_wikt
+import extract_vocab_from_bible
+from convert_dict_v3 import convert_pouleng_dict
+from generate_pure_bannuaci_dict import generate_pure_dict
 
-def run_script(script_path: Path, description: str):
-    """執行 Python 腳本"""
-    print("\n" + "=" * 70)
-    print(f">>> {description}")
-    print("=" * 70)
 
-    try:
-        # 使用系統預設編碼（Windows 為 cp950/gbk）
-        import locale
-        system_encoding = locale.getpreferredencoding()
-
-        result = subprocess.run(
-            [sys.executable, str(script_path)],
-            check=True,
-            capture_output=True,
-            text=True,
-            encoding=system_encoding,
-            errors='replace'  # 替換無法解碼的字符
-        )
-        print(result.stdout)
-        if result.stderr:
-            print("警告：", result.stderr)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] 錯誤：腳本執行失敗")
-        print(f"返回碼：{e.returncode}")
-        if e.stdout:
-            print("標準輸出：", e.stdout)
-        if e.stderr:
-            print("錯誤輸出：", e.stderr)
-        return False
-
-
-def merge_vocabularies(base_dir: Path):
+# 合併來源的順序（即優先級，也是二進位詞庫中來源旗標的位元順序）
+SOURCE_ORDER = ('base', 'wikt', 'bible')
+
+# 聖經詞彙的權重上限（避免覆蓋標準詞彙）
+BIBLE_MAX_WEIGHT = 300
+
+
+def merge_vocabularies(base_dir: Path, external_sort: bool = False,
+                       run_size: int = DEFAULT_RUN_SIZE):
     """
     合併所有詞彙來源
 
@@ -68,10 +67,17 @@ def merge_vocabularies(base_dir: Path):
     注意：
     - data/cpx-pron-data.lua 的單字會在後續的 convert_dict_v3.py 中使用
     - 聖經詞彙為輸入式格式（保留鼻化韻），合併時需轉換為 PSP 格式
+
+    Args:
+        base_dir: 專案根目錄
+        external_sort: 以外部排序合併（見 merge_external()；輸出與記憶體內合併相同）
+        run_size: 外部排序每段有序段的記錄數
+
+    Returns:
+        依輸出順序排列的 (漢字, 拼音, 權重, 來源旗標) 列表；外部排序時詞條不留在記憶體中，返回 None
     """
-    print("\n" + "=" * 70)
-    print(">>> 合併所有詞彙來源")
-    print("=" * 70)
+    if external_sort:
+        print("使用外部排序合併")
 
     # 數據源
     sources = {
@@ -80,72 +86,98 @@ def merge_vocabularies(base_dir: Path):
         'bible': base_dir / "data" / "vocab_from_bible.yaml",
     }
 
-    # 合併後的輸出
+    # 合併後的輸出（內容沒變時不會改寫，因此不再需要備份）
     output_file = base_dir / "pouseng_pinging" / "borhlang_pouleng.dict.yaml"
-    backup_file = base_dir / "pouseng_pinging" / "borhlang_pouleng.dict.yaml.backup"
 
-    # 備份原始檔案
-    if output_file.exists():
-        import shutil
-        shutil.copy(output_file, backup_file)
-        print(f"[OK] 已備份原始檔案到：{backup_file.name}")
+    # 各來源先匯入詞彙資料庫（內容沒變的來源不重新解析），再由資料庫讀出
+    store = LexiconStore()
+    updated = store.sync(base_dir, names=list(sources))
+    print(f"[OK] 詞彙資料庫：{store.db_file}"
+          f"（重新匯入：{', '.join(name for name, flag in updated.items() if flag) or '無'}）")
+
+    if external_sort:
+        with merge_external(store, sources, run_size, base_dir / ".cache" / "merge") as merged:
+            store.close()
+            write_merged_outputs(output_file, merged, merged.count, diff_run_size=run_size)
+        merged = None
+    else:
+        merged = merge_in_memory(store, sources)
+        store.close()
+        write_merged_outputs(output_file, merged, len(merged))
+    print(STRING_POOL.report())
+    STRING_POOL.clear()  # 已存下的字串仍由詞表持有，清空只是讓池本身不再留住它們
+    return merged
+
 
+def merge_in_memory(store: LexiconStore, sources: dict) -> list:
+    """
+    在記憶體中合併各來源
+
+    Returns:
+        依輸出順序排列的 [(漢字, 拼音, 權重, 來源旗標)]
+    """
     # 讀取所有詞條
     all_entries = {}  # {(漢字, 拼音): 權重}
+    # 每個詞條出現在哪些來源（位元依 SOURCE_ORDER，寫入二進位詞庫的旗標）
+    provenance = defaultdict(int)
 
     # 讀取基礎詞庫（權重最高）
     print(f"\n讀取基礎詞庫：{sources['base'].name}")
-    base_entries = read_dict_entries(sources['base'])
-    for (hanzi, pinyin), weight in base_entries.items():
-        all_entries[(hanzi, pinyin)] = weight
+    # 各字典共用來源的 (漢字, 拼音) 鍵 tuple，不為每個字典另建一份
+    base_entries = store.source_weights('base')
+    for key, weight in base_entries.items():
+        all_entries[key] = weight
+        provenance[key] |= 1 << SOURCE_ORDER.index('base')
     print(f"  詞條數：{len(base_entries)}")
+    del base_entries
 
     # 讀取維基詞典詞彙
     if sources['wikt'].exists():
         print(f"\n讀取維基詞典詞彙：{sources['wikt'].name}")
-        wikt_entries = read_dict_entries(sources['wikt'])
+        wikt_entries = store.source_weights('wikt')
         new_count = 0
-        for (hanzi, pinyin), weight in wikt_entries.items():
-            if (hanzi, pinyin) not in all_entries:
-                all_entries[(hanzi, pinyin)] = weight
+        for key, weight in wikt_entries.items():
+            provenance[key] |= 1 << SOURCE_ORDER.index('wikt')
+            if key not in all_entries:
+                all_entries[key] = weight
                 new_count += 1
         print(f"  詞條數：{len(wikt_entries)}")
         print(f"  新增：{new_count}")
+        del wikt_entries
     else:
         print(f"\n[WARNING] 找不到：{sources['wikt']}")
 
     # 讀取聖經詞彙（輸入式格式，需轉換為 PSP）
     if sources['bible'].exists():
         print(f"\n讀取聖經詞彙：{sources['bible'].name}")
-        bible_entries_input = read_dict_entries(sources['bible'])
+        bible_entries_input = store.source_weights('bible')
         new_count = 0
         conversion_errors = 0
 
-        for (hanzi, pinyin_input), weight in bible_entries_input.items():
-            # 跳過帶 ▣ 佔位符的詞條（這些詞只用於純羅馬字輸入法）
-            if '▣' in hanzi:
-                continue
+        # 跳過帶 ▣ 佔位符的詞條（這些詞只用於純羅馬字輸入法）
+        bible_items = [(hanzi, weight) for (hanzi, _), weight in bible_entries_input.items()
+                       if '▣' not in hanzi]
+        bible_codes = (pinyin for (hanzi, pinyin) in bible_entries_input
+                       if '▣' not in hanzi)
 
-            try:
-                # 轉換：輸入式 -> PSP
-                syllables_input = pinyin_input.split()
-                syllables_psp = []
-                for syl_input in syllables_input:
-                    syl_psp = RomanizationConverter.input_to_psp(syl_input)
-                    syllables_psp.append(syl_psp)
-                pinyin_psp = ' '.join(syllables_psp)
-
-                # 合併到詞表
-                if (hanzi, pinyin_psp) not in all_entries:
-                    # 聖經詞彙權重較低（避免覆蓋標準詞彙）
-                    all_entries[(hanzi, pinyin_psp)] = min(weight, 300)
-                    new_count += 1
-            except ValueError as e:
+        # 轉換：輸入式 -> PSP（逐項產生結果，失敗不中斷）
+        results = RomanizationConverter.convert_words(bible_codes, 'input', 'psp')
+        for (hanzi, weight), result in zip(bible_items, results):
+            if not result.ok:
                 # 轉換失敗，記錄但繼續
                 conversion_errors += 1
                 if conversion_errors <= 10:  # 只顯示前 10 個錯誤
                     # 使用 repr() 避免編碼錯誤
-                    print(f"  [WARNING] 轉換失敗：{repr(hanzi)} {pinyin_input} - {e}")
+                    print(f"  [WARNING] 轉換失敗：{repr(hanzi)} {result.source} - {result.error}")
+                continue
+
+            # 合併到詞表
+            key = (hanzi, STRING_POOL.intern(result.result))
+            provenance[key] |= 1 << SOURCE_ORDER.index('bible')
+            if key not in all_entries:
+                # 聖經詞彙權重較低（避免覆蓋標準詞彙）
+                all_entries[key] = min(weight, BIBLE_MAX_WEIGHT)
+                new_count += 1
 
         print(f"  詞條數：{len(bible_entries_input)}")
         print(f"  新增：{new_count}")
@@ -154,160 +186,303 @@ def merge_vocabularies(base_dir: Path):
     else:
         print(f"\n[WARNING] 找不到：{sources['bible']}")
 
-    # 寫入合併後的詞庫
-    print(f"\n寫入合併詞庫：{output_file.name}")
-    write_dict_file(output_file, all_entries, "borhlang_pouleng", "莆仙話拼音詞庫（莆田話）")
-    print(f"[OK] 完成！總詞條數：{len(all_entries)}")
-
+    # 按權重排序（同權重依合併時的加入順序：來源優先級、來源中的位置）
+    return [(*key, weight, provenance[key])
+            for key, weight in sort_by_weight(all_entries.items(), lambda item: item[1])]
 
-def read_dict_entries(file_path: Path) -> dict:
-    """讀取詞典條目"""
-    entries = {}
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        in_header = True
-        for line in f:
-            line = line.strip()
+def source_records(store: LexiconStore, name: str) -> Iterator[tuple]:
+    """
+    逐行產生某個來源的合併記錄（聖經詞彙在此轉換為 PSP）
 
-            # 跳過標頭
-            if in_header:
-                if line == '...':
-                    in_header = False
+    Yields:
+        (漢字, PSP 拼音, 優先級, 行號, 原始編碼, 權重)
+    """
+    priority = SOURCE_ORDER.index(name)
+    conversion_errors = 0
+    for entry in store.source_entries(name):
+        code = entry.code
+        if name == 'bible':
+            # 跳過帶 ▣ 佔位符的詞條（這些詞只用於純羅馬字輸入法）
+            if '▣' in entry.text:
                 continue
-
-            # 跳過空行和註釋
-            if not line or line.startswith('#'):
+            result = RomanizationConverter.try_convert_word(entry.code, 'input', 'psp')
+            if not result.ok:
+                conversion_errors += 1
+                if conversion_errors <= 10:  # 只顯示前 10 個錯誤
+                    print(f"  [WARNING] 轉換失敗：{repr(entry.text)} {result.source} - {result.error}")
                 continue
+            code = result.result
+        yield (entry.text, code, priority, entry.line_number, entry.code, entry.weight_value())
+    if conversion_errors > 0:
+        print(f"  轉換錯誤：{conversion_errors} 行")
 
-            # 解析詞條
-            parts = line.split('\t')
-            if len(parts) >= 2:
-                hanzi = parts[0]
-                pinyin = parts[1]
-
-                # 處理權重（可能是數字、百分比、或空白）
-                if len(parts) >= 3:
-                    weight_str = parts[2].strip()
-                    if weight_str.endswith('%'):
-                        # 百分比格式：90% -> 90
-                        try:
-                            weight = int(weight_str[:-1])
-                        except ValueError:
-                            weight = 500
-                    elif weight_str:
-                        try:
-                            weight = int(weight_str)
-                        except ValueError:
-                            weight = 500
-                    else:
-                        weight = 500
-                else:
-                    weight = 500
-
-                entries[(hanzi, pinyin)] = weight
-
-    return entries
-
-
-def write_dict_file(file_path: Path, entries: dict, name: str, description: str):
-    """寫入詞典檔案"""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        # 寫入標頭
-        f.write("# Rime dictionary\n")
-        f.write("# encoding: utf-8\n")
-        f.write("#\n")
-        f.write(f"# {description}\n")
-        f.write("#\n")
-        f.write("# ⚠️  本詞庫為自動生成，請勿手動編輯！\n")
-        f.write("#     使用 tools/build_all_dicts.py 重新生成\n")
-        f.write("#\n")
-        f.write("# 數據來源（按優先級）：\n")
-        f.write("# 1. hinghwa-ime/Pouleng/Pouleng.dict.yaml - 參考詞庫（24k+ 詞條）\n")
-        f.write("# 2. data/vocab_from_wikt.yaml - 維基詞典多字詞\n")
-        f.write("# 3. data/vocab_from_bible.yaml - 聖經詞彙（輸入式 -> PSP 轉換後合併）\n")
-        f.write("# 4. data/cpx-pron-data.lua - 維基詞典單字（在後續轉換中使用）\n")
-        f.write("#\n")
-        f.write("---\n")
-        f.write(f"name: {name}\n")
-        f.write('version: "0.4.0"\n')
-        f.write("use_preset_vocabulary: false\n")
-        f.write("sort: by_weight\n")
-        f.write("...\n\n")
-
-        # 按權重排序
-        sorted_entries = sorted(entries.items(), key=lambda x: x[1], reverse=True)
-
-        # 寫入詞條
-        for (hanzi, pinyin), weight in sorted_entries:
-            f.write(f"{hanzi}\t{pinyin}\t{weight}\n")
+
+def merge_external(store: LexiconStore, sources: dict, run_size: int,
+                   temp_dir: Path) -> ExternalSorter:
+    """
+    以外部排序合併各來源，記憶體用量與來源大小無關
+
+    1. 各來源逐行讀出，依 (漢字, 拼音, 優先級, 行號) 外部排序
+    2. 多路合併時相同 (漢字, 拼音) 的記錄相鄰：優先級最高的來源勝出，
+       位置取該來源第一次出現的行，權重取同一原始編碼最後一次出現的值
+       （與記憶體內合併逐行讀入字典的結果相同）
+    3. 勝出的詞條依 (-權重, 優先級, 行號) 再外部排序一次，即為輸出順序
+
+    Returns:
+        依輸出順序排列 (-權重, 優先級, 行號, 漢字, 拼音, 來源旗標) 的排序器
+        （可重複迭代；呼叫端以 with 區塊在用完後刪除有序段）
+    """
+    unique_counts = [0] * len(SOURCE_ORDER)
+    new_counts = [0] * len(SOURCE_ORDER)
+    merged = ExternalSorter(run_size, temp_dir)
+    try:
+        with ExternalSorter(run_size, temp_dir) as by_key:
+            for name in SOURCE_ORDER:
+                if not sources[name].exists():
+                    print(f"\n[WARNING] 找不到：{sources[name]}")
+                    continue
+                print(f"\n讀取 {name}：{sources[name].name}")
+                before = by_key.count
+                by_key.extend(source_records(store, name))
+                print(f"  行數：{by_key.count - before}")
+            print(f"\n外部排序：{by_key.count} 行，{by_key.run_count} 段有序段")
+
+            for _, group in group_sorted(by_key, itemgetter(0, 1)):
+                hanzi, pinyin, priority, line_number, source_code, weight = group[0]
+                flags = 0
+                for record in group:
+                    flags |= 1 << record[2]
+                    if record[2] == priority and record[4] == source_code:
+                        weight = record[5]
+                for bit in range(len(SOURCE_ORDER)):
+                    if flags & (1 << bit):
+                        unique_counts[bit] += 1
+                new_counts[priority] += 1
+                if SOURCE_ORDER[priority] == 'bible':
+                    # 聖經詞彙權重較低（避免覆蓋標準詞彙）
+                    weight = min(weight, BIBLE_MAX_WEIGHT)
+                merged.add((-weight, priority, line_number, hanzi, pinyin, flags))
+    except BaseException:
+        merged.cleanup()
+        raise
+
+    for bit, name in enumerate(SOURCE_ORDER):
+        print(f"  {name}：詞條數 {unique_counts[bit]}，新增 {new_counts[bit]}")
+    print(f"  輸出排序：{merged.run_count} 段有序段")
+    return merged
+
+
+class _OutputOrder:
+    """把外部排序器的記錄轉成 (漢字, 拼音, 權重, 來源旗標)（可重複迭代）"""
+
+    def __init__(self, records: Iterable[tuple]):
+        self.records = records
+
+    def __iter__(self) -> Iterator[tuple]:
+        for negative_weight, _, _, hanzi, pinyin, flags in self.records:
+            yield hanzi, pinyin, -negative_weight, flags
+
+
+def write_merged_outputs(output_file: Path, entries: Iterable[tuple], count: int,
+                         diff_run_size: Optional[int] = None):
+    """
+    寫出合併詞庫與其二進位版本
+
+    Args:
+        output_file: 詞庫路徑
+        entries: 依輸出順序排列的 (漢字, 拼音, 權重, 來源旗標)，或 merge_external() 的排序器
+                 （會迭代兩次）
+        count: 詞條數
+        diff_run_size: 與原詞庫比對差異時以外部排序比對（見 DictWriter；None 為在記憶體中比對）
+    """
+    if isinstance(entries, ExternalSorter):
+        entries = _OutputOrder(entries)
+
+    # 寫入合併後的詞庫
+    print(f"\n寫入合併詞庫：{output_file.name}")
+    write_dict_file(output_file, entries, "borhlang_pouleng", "莆仙話拼音詞庫（莆田話）",
+                    diff_run_size)
+
+    # 同時寫出欄式二進位詞庫（詞條順序與 YAML 相同，旗標記錄來源）
+    changed = write_binary_lexicon(lexicon_path(output_file), entries,
+                                   "psp", "borhlang_pouleng", SOURCE_ORDER)
+    print(f"[OK] 二進位詞庫：{lexicon_path(output_file).name}（{status_label(changed)}）")
+    print(f"[OK] 完成！總詞條數：{count}")
+
+
+def write_dict_file(file_path: Path, entries: Iterable[tuple], name: str, description: str,
+                    diff_run_size: Optional[int] = None):
+    """寫入詞典檔案（entries 為已排序的 (漢字, 拼音, 權重, ...)；diff_run_size 見 DictWriter）"""
+    comments = [
+        description,
+        "",
+        "⚠️  本詞庫為自動生成，請勿手動編輯！",
+        "    使用 tools/build_all_dicts.py 重新生成",
+        "",
+        "數據來源（按優先級）：",
+        "1. hinghwa-ime/Pouleng/Pouleng.dict.yaml - 參考詞庫（24k+ 詞條）",
+        "2. data/vocab_from_wikt.yaml - 維基詞典多字詞",
+        "3. data/vocab_from_bible.yaml - 聖經詞彙（輸入式 -> PSP 轉換後合併）",
+        "4. data/cpx-pron-data.lua - 維基詞典單字（在後續轉換中使用）",
+        "",
+    ]
+    with DictWriter(file_path, name, "0.4.0", comments, diff_run_size=diff_run_size) as writer:
+        for hanzi, pinyin, weight, *_ in entries:
+            writer.write_entry(hanzi, pinyin, weight)
+    print(f"[OK] {writer.report()}")
+
+
+def build_graph(base_dir: Path, external_sort: bool = False,
+                run_size: int = DEFAULT_RUN_SIZE, force: bool = False,
+                jobs: int = 1) -> BuildGraph:
+    """
+    建立整個建置流程的工作相依圖
+
+    所有步驟在同一個行程中執行：合併、轉換與生成的詞條直接在記憶體中交給下一步，
+    不再由下一步重新解析剛寫出的詞庫；詞庫檔案照常寫出。
+    提取步驟的輸出（data/vocab_from_*.yaml）仍經由詞彙資料庫讀入。
+
+    每個步驟列出輸入檔與輸出檔：輸入內容都沒變時步驟被略過，下一步改從輸出檔讀取詞條。
+    輸入檔包括本檔、步驟使用的腳本與模組及其遞移匯入的本地模組（見 module_closure()），
+    改到步驟用得到的程式碼才會重新建置。提取步驟的原始資料不存在時略過提取，沿用現有詞彙檔。
+
+    Args:
+        base_dir: 專案根目錄
+        external_sort: 同 merge_vocabularies()
+        run_size: 同 merge_vocabularies()
+        force: 忽略建置紀錄，重新執行所有步驟
+        jobs: 轉換步驟分片轉換的子行程數（見 convert_pouleng_dict()）
+    """
+    data_dir = base_dir / "data"
+    tools_dir = base_dir / "tools"
+    wikt_vocab = data_dir / "vocab_from_wikt.yaml"
+    bible_vocab = data_dir / "vocab_from_bible.yaml"
+    cpx_file = data_dir / "cpx-pron-data.lua"
+    pouleng_file = base_dir / "pouseng_pinging" / "borhlang_pouleng.dict.yaml"
+    han_file = base_dir / "bannuaci" / "borhlang_bannuaci_han.dict.yaml"
+    pure_file = base_dir / "bannuaci" / "borhlang_bannuaci.dict.yaml"
+
+    def code(*modules: str) -> list:
+        """步驟的程式碼：本檔（步驟函數所在）、列出的模組（data/ 或 tools/ 下的檔名）及其匯入的本地模組"""
+        files = [data_dir / module if (data_dir / module).is_file() else tools_dir / module
+                 for module in modules]
+        return [Path(__file__), *module_closure(files, [data_dir, tools_dir])]
+
+    def merge(inputs):
+        return merge_vocabularies(base_dir, external_sort, run_size)
+
+    def convert(inputs):
+        merged = inputs['merge']
+        entries = None
+        if merged is not None:
+            # 與從合併詞庫讀入的詞條相同（權重欄為整數的字串）
+            intern = STRING_POOL.intern
+            entries = [DictEntry(hanzi, pinyin, intern(str(weight)))
+                       for hanzi, pinyin, weight, _ in merged]
+        return convert_pouleng_dict(pouleng_file, cpx_file, han_file, entries, jobs)
+
+    def generate(inputs):
+        return generate_pure_dict(han_file, bible_vocab, pure_file, inputs['convert'])
+
+    def lexicon(inputs):
+        # 平話字詞庫的欄式二進位版本（.lexicon.bin，見 data/binary_lexicon.py）
+        for dict_file, entries in [(han_file, inputs['convert']), (pure_file, inputs['generate'])]:
+            if entries is None:
+                # 上一步沒有重新執行，從詞庫讀取
+                changed = convert_dict_file(dict_file, 'input')
+            else:
+                # 與 convert_dict_file() 讀回的詞條相同（空權重不寫出）
+                changed = write_binary_lexicon(lexicon_path(dict_file),
+                                               ((text, code, weight or None)
+                                                for text, code, weight in entries),
+                                               'input', dict_file.name.split('.')[0])
+            print(f"[OK] {lexicon_path(dict_file).name}（{status_label(changed)}）")
+
+    graph = BuildGraph(base_dir / ".cache" / "build_manifest.json", force)
+    # 提取與建立索引只讀寫檔案，平行建置時交給子行程執行
+    graph.add('wikt', partial(run_extract, extract_vocab_from_wikt.__name__),
+              description="步驟 1/5：從維基詞典提取詞彙", optional=True, process=True,
+              requires=[base_dir / "docs" / "puxian_phrases_from_wikt.txt"],
+              inputs=code("extract_vocab_from_wikt.py"),
+              outputs=[wikt_vocab])
+    graph.add('bible', partial(run_extract, extract_vocab_from_bible.__name__),
+              description="步驟 2/5：從聖經文本提取詞彙", optional=True, process=True,
+              requires=[data_dir / "bible_data.json"],
+              inputs=code("extract_vocab_from_bible.py"),
+              outputs=[bible_vocab])
+    graph.add('merge', merge, deps=['wikt', 'bible'],
+              description="步驟 3/5：合併所有詞彙來源" + ("（外部排序）" if external_sort else ""),
+              inputs=[base_dir / "hinghwa-ime" / "Pouleng" / "Pouleng.dict.yaml",
+                      wikt_vocab, bible_vocab,
+                      *code("lexicon_store.py", "external_sort.py", "binary_lexicon.py")],
+              outputs=[pouleng_file, lexicon_path(pouleng_file)])
+    graph.add('convert', convert, deps=['merge'],
+              description="步驟 4/5：轉換為平話字詞表（漢字版）",
+              inputs=[pouleng_file, cpx_file, *code("convert_dict_v3.py")],
+              outputs=[han_file, han_file.parent / "conversion_log_v3.txt"])
+    graph.add('generate', generate, deps=['convert', 'bible'],
+              description="步驟 5/5：生成純平話字詞表（Lua格式）",
+              inputs=[han_file, bible_vocab, *code("generate_pure_bannuaci_dict.py")],
+              outputs=[pure_file])
+    # 各詞庫一寫出就建立索引（與下一步同時執行）
+    for task_name, dict_file, dep in [('index-pouleng', pouleng_file, 'merge'),
+                                      ('index-han', han_file, 'convert'),
+                                      ('index-pure', pure_file, 'generate')]:
+        graph.add(task_name, partial(build_dict_index, dict_file), deps=[dep],
+                  description=f"建立詞庫索引：{dict_file.name}", process=True,
+                  inputs=[dict_file, *code("dict_index.py")], outputs=[index_path(dict_file)])
+    graph.add('lexicon', lexicon, deps=['convert', 'generate'],
+              description="建立二進位詞庫",
+              inputs=[han_file, pure_file, *code("binary_lexicon.py")],
+              outputs=[lexicon_path(han_file), lexicon_path(pure_file)])
+    return graph
+
+
+def run_extract(module_name: str, inputs: dict):
+    """執行提取腳本（以模組名稱指定，平行建置時可交給子行程）"""
+    if importlib.import_module(module_name).main() != 0:
+        raise TaskFailed("提取腳本返回錯誤")
+
+
+def build_dict_index(dict_file: Path, inputs: dict):
+    """為詞庫建立隨機查詢索引（.dict.yaml.idx，見 data/dict_index.py）"""
+    changed = not is_fresh(dict_file)
+    if changed:
+        build_index(dict_file)
+    print(f"[OK] {index_path(dict_file).name}（{status_label(changed)}）")
 
 
 def main():
     """主函數"""
+    parser = argparse.ArgumentParser(description="木蘭輸入法詞表一鍵更新工具")
+    parser.add_argument('--external-sort', action='store_true',
+                        help="合併詞彙時使用外部排序（來源很大、記憶體不足時使用）")
+    parser.add_argument('--run-size', type=int, default=DEFAULT_RUN_SIZE,
+                        help=f"外部排序每段有序段的記錄數（預設 {DEFAULT_RUN_SIZE}）")
+    parser.add_argument('--force', action='store_true',
+                        help="忽略建置紀錄，重新執行所有步驟")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="同時執行的子行程數，也用於轉換步驟的分片轉換（預設為 CPU 核心數；1 為循序執行）")
+    args = parser.parse_args()
+
     base_dir = Path(__file__).parent.parent
-    tools_dir = base_dir / "tools"
 
     print("=" * 70)
     print("  木蘭輸入法詞表一鍵更新工具")
     print("  Borhlang IME - Dictionary Build Tool")
     print("=" * 70)
 
-    steps = [
-        # 步驟1：從維基詞典提取
-        {
-            'script': tools_dir / "extract_vocab_from_wikt.py",
-            'description': "步驟 1/5：從維基詞典提取詞彙",
-            'optional': True
-        },
-        # 步驟2：從聖經提取
-        {
-            'script': tools_dir / "extract_vocab_from_bible.py",
-            'description': "步驟 2/5：從聖經文本提取詞彙",
-            'optional': True
-        },
-    ]
+    graph = build_graph(base_dir, args.external_sort, args.run_size, args.force, args.jobs)
+    report = graph.run(jobs=args.jobs)
 
-    # 執行提取腳本
-    for step in steps:
-        if step['script'].exists():
-            success = run_script(step['script'], step['description'])
-            if not success and not step.get('optional', False):
-                print(f"\n[ERROR] 關鍵步驟失敗，終止流程")
-                return 1
-        else:
-            print(f"\n[WARNING] 找不到腳本：{step['script']}")
-            if not step.get('optional', False):
-                return 1
-
-    # 步驟3：合併詞彙
-    try:
-        merge_vocabularies(base_dir)
-    except Exception as e:
-        print(f"\n[ERROR] 合併詞彙失敗：{e}")
-        import traceback
-        traceback.print_exc()
+    print("\n" + "=" * 70)
+    print(report.summary())
+    print("=" * 70)
+    if not report.ok:
+        print("\n[ERROR] 關鍵步驟失敗，詞表未全部更新")
         return 1
 
-    # 步驟4：轉換為平話字詞表（漢字版）
-    convert_script = tools_dir / "convert_dict_v3.py"
-    if convert_script.exists():
-        success = run_script(convert_script, "步驟 4/5：轉換為平話字詞表（漢字版）")
-        if not success:
-            print(f"\n[ERROR] 轉換失敗")
-            return 1
-    else:
-        print(f"\n[WARNING] 找不到轉換腳本：{convert_script}")
-
-    # 步驟5：生成純平話字詞表（Lua格式）
-    generate_script = tools_dir / "generate_pure_bannuaci_dict.py"
-    if generate_script.exists():
-        success = run_script(generate_script, "步驟 5/5：生成純平話字詞表（Lua格式）")
-        if not success:
-            print(f"\n[ERROR] 生成失敗")
-            return 1
-    else:
-        print(f"\n[WARNING] 找不到生成腳本：{generate_script}")
-
     # 完成
     print("\n" + "=" * 70)
     print("[SUCCESS] 所有詞表更新完成！")
@@ -7,21 +7,43 @@ Convert Puxian Pinyin dictionary to Báⁿ-uā-ci̍ dictionary (romanization ver
 本版本實作完整的聲母類化反推邏輯
 """
 
+import argparse
+import hashlib
+import marshal
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from unicodedata import normalize as norm
-from typing import List, Dict, Tuple, Optional, Set
+from typing import (Any, Iterable, List, Dict, Mapping, NamedTuple, Sequence, Tuple, Optional,
+                    Set, Union)
 
 # 導入轉換模組
 sys.path.append(str(Path(__file__).parent.parent / "data"))
-from romanization_converter import RomanizationConverter
-from psp_to_buc import buc_finals, buc_tones  # 仍需要用於候選生成
+from romanization_converter import RomanizationConverter, CachedConverter, BucNormalizer
+from rime_dict import DictEntry, DictWriter, load_entries, split_code, split_text
+from parse_cache import cached_parse
+from lexicon_store import CPX_SOURCE, LexiconStore
+from output_files import write_bytes_if_changed, write_text_if_changed
+from lua_table import parse_lua_module
+from string_pool import STRING_POOL
+
+PathLike = Union[str, Path]
+
+# 分片轉換時每個子行程平均分到的分片數（分片較小，各行程的工作量較平均）
+SHARDS_PER_JOB = 4
+
+# 逐詞轉換快取的格式版本（改變記錄內容時遞增；轉換規則的改變由程式碼指紋偵測）
+CONVERSION_CACHE_VERSION = 1
 
 
 class BucRomanizer:
     """平話字拼式轉換器（包裝 RomanizationConverter）"""
 
+    def __init__(self, converter: Optional[CachedConverter] = None):
+        # 帶快取的轉換器（同一批音節會被反覆轉換）
+        self.converter = converter if converter is not None else CachedConverter()
+
     @staticmethod
     def psp_to_buc_candidates(psp_syllable: str) -> List[str]:
         """
@@ -33,196 +55,44 @@ class BucRomanizer:
         Returns:
             平話字列表（如 ['kā', 'kāⁿ']）
         """
-        # 驗證輸入格式
-        if not psp_syllable or not psp_syllable[-1].isdigit():
-            return []
-
-        # 解析聲母和韻母+聲調
-        if psp_syllable.startswith("ng") and len(psp_syllable) == 3:
-            initial_psp = ""
-            finaltone = psp_syllable
-        elif psp_syllable.startswith("ng") or psp_syllable.startswith("ch"):
-            initial_psp = psp_syllable[:2]
-            finaltone = psp_syllable[2:]
-        elif psp_syllable[0] in 'bpmgkhdtnlcsz':
-            initial_psp = psp_syllable[0]
-            finaltone = psp_syllable[1:]
-        else:
-            initial_psp = ""
-            finaltone = psp_syllable
-
-        # 分離韻母和聲調
-        final_psp = finaltone[:-1]
-        tone_psp = finaltone[-1]
-
-        # 驗證聲調
-        if tone_psp not in buc_tones:
-            return []
-
-        # 轉換聲母：莆拼 → 平話字
-        initial_map = {
-            'b': 'b', 'p': 'p', 'm': 'm',
-            'd': 'd', 't': 't', 'n': 'n', 'l': 'l',
-            'g': 'g', 'k': 'k', 'ng': 'ng', 'h': 'h',
-            'z': 'c', 'c': 'ch', 's': 's',
-            '': ''  # 零聲母
-        }
-
-        if initial_psp not in initial_map:
-            return []
-
-        buc_initial = initial_map[initial_psp]
-
-        # 處理常見的韻母變體
-        final_map = {
-            "au": "ao",
-            "iang": "ieng",
-            "ieu": "ieo",
-            "iau": "ieo",
-            "iao": "ieo",
-            "uai": "ue",
-            "uei": "ue",
-            "yoeh": "yeh",
-            "yoeng": "yeng",
-            "yor": "yo",
-            "yorh": "yoh",
-            "yorng": "yong"
-        }
-
-        if final_psp in final_map:
-            final_psp = final_map[final_psp]
-
-        # 獲取韻母候選
-        if final_psp not in buc_finals:
-            return []
-
-        buc_final_candidates = buc_finals[final_psp]
-
-        # 獲取聲調標記
-        tone_mark = buc_tones[tone_psp]
-
-        # 生成所有候選
-        candidates = []
-        for final_info in buc_final_candidates:
-            buc_final = final_info[0]
-
-            # 構建平話字：聲母 + 韻母 + 聲調
-            buc_syllable = buc_initial + buc_final
-
-            # 添加聲調標記（NFD 形式）
-            if tone_mark:
-                # 找到主元音添加聲調標記
-                buc_syllable = BucRomanizer.add_tone_mark(buc_syllable, tone_mark)
-
-            candidates.append(norm('NFC', buc_syllable))
-
-        return candidates
-
-    @staticmethod
-    def add_tone_mark(syllable: str, tone_mark: str) -> str:
-        """在音節的主元音上添加聲調標記"""
-        # NFD 分解
-        syllable = norm('NFD', syllable)
-
-        # 元音優先級規則：
-        # 1. 如果有 a/o/e，按 a > o > e 優先級標記
-        # 2. 否則，標在第一個元音上（i, u, ṳ）
-        # 3. 如果沒有元音（如 ng, m），標在鼻音輔音上
-
-        high_priority_vowels = ['a', 'o', 'e']
-        all_vowels = ['a', 'o', 'e', 'i', 'u', 'ṳ']
-        nasal_consonants = ['n', 'm', 'ng']
-
-        # 先檢查高優先級元音
-        for vowel in high_priority_vowels:
-            if vowel in syllable:
-                parts = syllable.split(vowel, 1)
-                if len(parts) == 2:
-                    return parts[0] + vowel + tone_mark + parts[1]
-
-        # 沒有高優先級元音，找第一個出現的元音
-        for i, char in enumerate(syllable):
-            if char in all_vowels:
-                return syllable[:i] + char + tone_mark + syllable[i+1:]
-
-        # 沒有元音，標在鼻音輔音上（如 ng, m）
-        # 優先標在 n 上（ng 的情況）
-        if 'ng' in syllable:
-            # ng 的情況，標在 n 上
-            parts = syllable.split('ng', 1)
-            if len(parts) == 2:
-                return parts[0] + 'n' + tone_mark + 'g' + parts[1]
-        elif 'n' in syllable:
-            parts = syllable.split('n', 1)
-            if len(parts) == 2:
-                return parts[0] + 'n' + tone_mark + parts[1]
-        elif 'm' in syllable:
-            parts = syllable.split('m', 1)
-            if len(parts) == 2:
-                return parts[0] + 'm' + tone_mark + parts[1]
-
-        return syllable
-
-    @staticmethod
-    def buc_final_to_romanization(buc_final: str) -> str:
-        """
-        將平話字韻母轉換為拼式
+        return RomanizationConverter.psp_to_buc_candidates(psp_syllable)
 
-        a̤ → aa, e̤ → ee, o̤ → oo, ṳ → y, ⁿ → nn
-        """
-        result = buc_final
-        result = result.replace('a̤', 'aa')
-        result = result.replace('e̤', 'ee')
-        result = result.replace('o̤', 'oo')
-        result = result.replace('ṳ', 'y')
-        result = result.replace('ⁿ', 'nn')
-        return result
-
-    @staticmethod
-    def buc_to_romanization(buc_syllable: str) -> str:
+    def buc_to_romanization(self, buc_syllable: str) -> str:
         """
         將平話字音節轉換為輸入式
 
         例如：kā → ka5, sâ̤ → saa3, guáⁿ → guann2, do̤̍h → dooh7
 
-        使用新的 RomanizationConverter
+        使用新的 RomanizationConverter（經由實例快取）
         """
-        return RomanizationConverter.buc_to_input(buc_syllable)
+        return self.converter.buc_to_input(buc_syllable)
 
 
 class LuaDictParser:
     """Lua 字典解析器"""
 
+    # 解析器版本（改變解析規則時遞增，使 parse_cache 與詞彙資料庫中的舊結果失效）
+    PARSER_VERSION = 2
+
     @staticmethod
-    def parse_lua_dict(lua_file: Path) -> Dict[str, List[str]]:
-        """解析 cpx-pron-data.lua 文件"""
-        char_dict = {}
+    def parse_lua_tables(lua_file: Path, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        解析 cpx-pron-data.lua 匯出的所有表（export.*；字串已正規化為 NFC）
 
-        with open(lua_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        檔案內容沒變時載入上次的解析結果。
+        """
+        return cached_parse(lua_file, "cpx-tables", LuaDictParser.PARSER_VERSION,
+                            parse_lua_module, use_cache)
 
-        # 提取 export.buc = { ... } 部分
-        match = re.search(r'export\.buc\s*=\s*\{(.+)\}', content, re.DOTALL)
-        if not match:
+    @staticmethod
+    def parse_lua_dict(lua_file: Path, use_cache: bool = True) -> Dict[str, List[str]]:
+        """解析 cpx-pron-data.lua 的 export.buc，返回 {字: [平話字讀音, ...]}（已移除星號）"""
+        tables = LuaDictParser.parse_lua_tables(lua_file, use_cache)
+        buc = tables.get('buc')
+        if not isinstance(buc, dict):
             print("錯誤：無法解析 Lua 文件")
             return {}
-
-        dict_content = match.group(1)
-
-        # 解析每個條目：["字"] = {"pron1", "pron2", ...}
-        pattern = r'\["(.+?)"\]\s*=\s*\{([^}]*)\}'
-
-        for match in re.finditer(pattern, dict_content):
-            char = match.group(1)
-            prons_str = match.group(2)
-
-            # 解析讀音列表
-            prons = re.findall(r'"([^"]+)"', prons_str)
-            # 移除星號
-            prons = [p.replace('*', '') for p in prons]
-            char_dict[char] = prons
-
-        return char_dict
+        return {char: [pron.replace('*', '') for pron in prons] for char, prons in buc.items()}
 
 
 class AssimilationReverser:
@@ -320,24 +190,115 @@ class AssimilationReverser:
         return reverse_map.get(current_initial_psp, [])
 
 
+class ConversionRecord(NamedTuple):
+    """一個詞條的逐詞轉換結果"""
+    romanization: Optional[str]     # 以空格連接的拼式；None 表示無法轉換
+    warnings: tuple                 # 轉換時產生的警告與註記
+    stats: tuple                    # 統計增量（依 DictConverter.STAT_FIELDS 的順序），
+                                    # 記下各音節走的路徑：字典直接匹配、情況1-3、情況4-5或直接轉換
+
+
+class ConversionCache:
+    """
+    逐詞轉換結果的持久快取
+
+    同樣的 (漢字, 拼音) 詞條每次建置的轉換結果都一樣，只有新增或改動的詞條
+    需要重新產生候選、比對字典與類化反推。快取檔帶有指紋（快取格式版本、
+    轉換規則的程式碼、cpx 讀音的內容），任一項改變時整個快取作廢。
+    寫回時只保留本次建置用到的詞條，刪除的詞條不會一直累積。
+    """
+
+    DEFAULT_FILE = Path(__file__).resolve().parent.parent / ".cache" / "conversion_cache.marshal"
+
+    # 影響逐詞轉換結果的模組（與本檔一起計入指紋）
+    RULE_MODULES = ("romanization_converter", "syllable_inventory", "rime_dict")
+
+    def __init__(self, cache_file: Optional[PathLike] = None, fingerprint: str = ""):
+        """
+        Args:
+            cache_file: 快取檔（None 表示只放在記憶體）
+            fingerprint: 轉換規則與 cpx 讀音的指紋（見 rules_fingerprint()）
+        """
+        self.cache_file = Path(cache_file) if cache_file is not None else None
+        self.fingerprint = fingerprint
+        self.records: Dict[Tuple[str, str], ConversionRecord] = {}
+        self.used: Set[Tuple[str, str]] = set()
+        self.hits = self.misses = 0
+        if self.cache_file is not None:
+            self._load()
+
+    @classmethod
+    def rules_fingerprint(cls, cpx_digest: Optional[str]) -> str:
+        """轉換規則（本檔與 RULE_MODULES 的程式碼）與 cpx 讀音（詞彙資料庫中的指紋）的指紋"""
+        digest = hashlib.sha1(f"{CONVERSION_CACHE_VERSION}:{cpx_digest}".encode())
+        for source in (__file__, *(sys.modules[name].__file__ for name in cls.RULE_MODULES)):
+            with open(source, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'rb') as f:
+                version, fingerprint, rows = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+        if version != CONVERSION_CACHE_VERSION or fingerprint != self.fingerprint:
+            return
+        self.records = {(hanzi, pinyin): ConversionRecord(*record)
+                        for hanzi, pinyin, *record in rows}
+
+    def get(self, key: Tuple[str, str]) -> Optional[ConversionRecord]:
+        record = self.records.get(key)
+        if record is not None:
+            self.hits += 1
+            self.used.add(key)
+        return record
+
+    def put(self, key: Tuple[str, str], record: ConversionRecord):
+        self.records[key] = record
+        self.used.add(key)
+        self.misses += 1
+
+    def save(self) -> bool:
+        """
+        寫回快取檔（只保留本次用到的詞條；內容沒變時不寫）
+
+        Returns:
+            是否寫入
+        """
+        if self.cache_file is None or (not self.misses and len(self.used) == len(self.records)):
+            return False
+        rows = [(hanzi, pinyin, *record) for (hanzi, pinyin), record in self.records.items()
+                if (hanzi, pinyin) in self.used]
+        return write_bytes_if_changed(
+            self.cache_file, marshal.dumps((CONVERSION_CACHE_VERSION, self.fingerprint, rows)))
+
+    def report(self) -> str:
+        """統計說明"""
+        return f"逐詞轉換快取：命中 {self.hits}，重新轉換 {self.misses}"
+
+
 class DictConverter:
     """詞庫轉換器（帶完整類化反推）"""
 
-    def __init__(self, cpx_data: Dict[str, List[str]]):
+    STAT_FIELDS = ('total', 'success', 'from_dict_direct', 'from_dict_case_123',
+                   'from_dict_case_45', 'from_conversion', 'failed', 'bracketed')
+
+    def __init__(self, cpx_data: Mapping[str, List[str]],
+                 cache: Optional[ConversionCache] = None):
+        """
+        Args:
+            cpx_data: {字: [平話字讀音, ...]}
+            cache: 逐詞轉換結果的快取（None 表示每個詞條都重新轉換）
+        """
         self.cpx_data = cpx_data
+        self.cache = cache
+        # 字典讀音的拼寫鍵（按字首次查詢時建立）
+        self.cpx_keys: Dict[str, List[Tuple[str, str]]] = {}
         self.romanizer = BucRomanizer()
         self.reverser = AssimilationReverser()
         self.warnings = []
-        self.stats = {
-            'total': 0,
-            'success': 0,
-            'from_dict_direct': 0,
-            'from_dict_case_123': 0,
-            'from_dict_case_45': 0,
-            'from_conversion': 0,
-            'failed': 0,
-            'bracketed': 0
-        }
+        self.stats = dict.fromkeys(self.STAT_FIELDS, 0)
         self.seen_entries: Set[Tuple[str, str]] = set()
 
     def convert_entry(self, hanzi: str, pinyin: str, weight: Optional[str] = None) -> Optional[Tuple[str, str, Optional[str]]]:
@@ -347,6 +308,125 @@ class DictConverter:
         Returns:
             (漢字, 拼式, 詞頻) 或 None
         """
+        romanization = self.romanize_cached(hanzi, pinyin)
+        if romanization is None:
+            return None
+        return self.add_converted(hanzi, romanization, weight)
+
+    def convert_entries(self, entries: Iterable[DictEntry],
+                        precomputed: Optional[Mapping[Tuple[str, str], ConversionRecord]] = None
+                        ) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        依序轉換詞條，返回成功且不重複的 (漢字, 拼式, 詞頻)
+
+        Args:
+            entries: 詞條
+            precomputed: 已算好的逐詞轉換記錄（見 romanize_cached()）
+        """
+        converted = []
+        for entry in entries:
+            romanization = self.romanize_cached(entry.text, entry.code, precomputed)
+            if romanization is None:
+                continue
+            result = self.add_converted(entry.text, romanization, entry.weight)
+            if result:
+                converted.append(result)
+        return converted
+
+    def convert_entries_sharded(self, entries: Sequence[DictEntry], db_file: PathLike,
+                                jobs: int) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        分片平行轉換詞條（結果、統計與警告皆與 convert_entries() 相同）
+
+        快取中沒有的詞條切成連續的分片交給行程池，每個子行程開啟自己的詞彙資料庫連線，
+        唯讀地查詢同一份已匯入的 cpx 讀音。子行程只負責逐詞轉換（各詞條互不相干），
+        去重、警告與統計依原順序在本行程接回。
+
+        Args:
+            entries: 詞條
+            db_file: 已匯入 cpx 讀音的詞彙資料庫
+            jobs: 子行程數
+        """
+        cached_keys = self.cache.records if self.cache is not None else {}
+        missing = list(dict.fromkeys(key for key in ((entry.text, entry.code) for entry in entries)
+                                     if key not in cached_keys))
+        shard_size = max(1, -(-len(missing) // (jobs * SHARDS_PER_JOB)))
+        shards = [missing[start:start + shard_size]
+                  for start in range(0, len(missing), shard_size)]
+
+        precomputed: Dict[Tuple[str, str], ConversionRecord] = {}
+        if shards:
+            cached = self.romanizer.converter
+            with ProcessPoolExecutor(jobs, initializer=_init_shard_worker,
+                                     initargs=(str(db_file),)) as pool:
+                for shard, (records, cache_stats) in zip(shards, pool.map(_convert_shard, shards)):
+                    precomputed.update(zip(shard, map(ConversionRecord._make, records)))
+                    cached.merge_stats(*cache_stats)
+        return self.convert_entries(entries, precomputed)
+
+    def romanize_cached(self, hanzi: str, pinyin: str,
+                        precomputed: Optional[Mapping[Tuple[str, str], ConversionRecord]] = None
+                        ) -> Optional[str]:
+        """
+        同 romanize_entry()，但先查轉換快取與 precomputed（如子行程算好的記錄），
+        找到時只補上該詞條的警告與統計
+
+        Returns:
+            以空格連接的拼式；無法轉換時為 None
+        """
+        key = (hanzi, pinyin)
+        record = self.cache.get(key) if self.cache is not None else None
+        if record is None and precomputed is not None:
+            record = precomputed.get(key)
+            if record is not None and self.cache is not None:
+                self.cache.put(key, record)
+        if record is not None:
+            self.apply_record(record)
+            return STRING_POOL.intern(record.romanization)
+
+        record = self.convert_record(hanzi, pinyin)
+        if self.cache is not None:
+            self.cache.put(key, record)
+        return record.romanization
+
+    def convert_record(self, hanzi: str, pinyin: str) -> ConversionRecord:
+        """逐詞轉換（同 romanize_entry()），並記下這個詞條產生的警告與統計增量"""
+        warnings_start = len(self.warnings)
+        before = [self.stats[field] for field in self.STAT_FIELDS]
+        romanization = self.romanize_entry(hanzi, pinyin)
+        return ConversionRecord(
+            romanization, tuple(self.warnings[warnings_start:]),
+            tuple(self.stats[field] - count for field, count in zip(self.STAT_FIELDS, before)))
+
+    def apply_record(self, record: ConversionRecord):
+        """補上轉換記錄中的警告與統計"""
+        self.warnings.extend(record.warnings)
+        for field, delta in zip(self.STAT_FIELDS, record.stats):
+            self.stats[field] += delta
+
+    def add_converted(self, hanzi: str, romanization: str,
+                      weight: Optional[str]) -> Optional[Tuple[str, str, Optional[str]]]:
+        """
+        記錄轉換好的詞條（與已有詞條重複時返回 None）
+
+        Returns:
+            (漢字, 拼式, 詞頻) 或 None
+        """
+        entry_key = (hanzi, romanization)
+        if entry_key in self.seen_entries:
+            return None
+        self.seen_entries.add(entry_key)
+
+        self.stats['success'] += 1
+        return (hanzi, romanization, weight)
+
+    def romanize_entry(self, hanzi: str, pinyin: str) -> Optional[str]:
+        """
+        把詞條的拼音轉為拼式（不去重，各詞條互不相干）
+
+        Returns:
+            以空格連接的拼式；無法轉換時為 None（並記錄警告）
+        """
         self.stats['total'] += 1
 
         # 解析漢字和拼音
@@ -378,41 +458,12 @@ class DictConverter:
             romanized_syllables.append(rom_syl)
             prev_romanization = rom_syl  # 更新前一個字的拼式
 
-        # 組合拼式（用空格連接）
-        romanization = ' '.join(romanized_syllables)
-
-        # 去重檢查
-        entry_key = (hanzi, romanization)
-        if entry_key in self.seen_entries:
-            return None
-        self.seen_entries.add(entry_key)
-
-        self.stats['success'] += 1
-        return (hanzi, romanization, weight)
+        # 組合拼式（用空格連接；經由字串池，與去重集合、輸出列表共用同一個字串）
+        return STRING_POOL.intern(' '.join(romanized_syllables))
 
     def parse_entry(self, hanzi: str, pinyin: str) -> Tuple[List[str], List[str]]:
-        """解析詞條的漢字和拼音"""
-        chars = []
-        i = 0
-        while i < len(hanzi):
-            if hanzi[i] == '[':
-                j = hanzi.find(']', i)
-                if j != -1:
-                    chars.append(hanzi[i:j+1])
-                    i = j + 1
-                else:
-                    chars.append(hanzi[i])
-                    i += 1
-            else:
-                chars.append(hanzi[i])
-                i += 1
-
-        syllables = []
-        for syl in pinyin.split():
-            syl = syl.strip('{}')
-            syllables.append(syl)
-
-        return chars, syllables
+        """解析詞條的漢字和拼音（[] 內為合音字，{} 標記的音節去掉括號）"""
+        return split_text(hanzi), split_code(pinyin)
 
     def convert_syllable(
         self,
@@ -611,16 +662,19 @@ class DictConverter:
         if char not in self.cpx_data:
             return None
 
-        char_prons = self.cpx_data[char]
+        dict_keys = self.cpx_keys.get(char)
+        if dict_keys is None:
+            dict_keys = [(BucNormalizer.spelling_key(pron), pron) for pron in self.cpx_data[char]]
+            self.cpx_keys[char] = dict_keys
+
+        # 以拼寫鍵比對，調符標在不同字母上的寫法視為相同
+        candidate_keys = {BucNormalizer.spelling_key(cand) for cand in buc_candidates}
 
         # 優先遍歷字典（按順序），這樣會返回字典中排序最前的讀音
-        for dict_pron in char_prons:
-            dict_pron_norm = norm('NFC', dict_pron)
-            for buc_cand in buc_candidates:
-                buc_cand_norm = norm('NFC', buc_cand)
-                if buc_cand_norm == dict_pron_norm:
-                    # 找到匹配！返回字典中的這個讀音
-                    return self.romanizer.buc_to_romanization(dict_pron)
+        for dict_key, dict_pron in dict_keys:
+            if dict_key in candidate_keys:
+                # 找到匹配！返回字典中的這個讀音
+                return self.romanizer.buc_to_romanization(dict_pron)
 
         return None
 
@@ -641,44 +695,93 @@ class DictConverter:
         return entries
 
 
-def convert_pouleng_dict(pouleng_file: Path, cpx_file: Path, output_file: Path):
-    """轉換詞庫（拼式版本）"""
+# 分片轉換子行程中的轉換器（由 _init_shard_worker 建立）
+_shard_converter: Optional[DictConverter] = None
 
-    print(f"讀取字典資料：{cpx_file}")
-    cpx_data = LuaDictParser.parse_lua_dict(cpx_file)
-    print(f"已載入 {len(cpx_data)} 個漢字的讀音資料\n")
 
-    print(f"讀取詞庫：{pouleng_file}\n")
-    converter = DictConverter(cpx_data)
+def _init_shard_worker(db_file: str):
+    """子行程初始化：開啟自己的資料庫連線，建立轉換器"""
+    global _shard_converter
+    store = LexiconStore(db_file)
+    _shard_converter = DictConverter(store.reading_map(CPX_SOURCE))
 
-    # 讀取原始詞庫
-    with open(pouleng_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
 
-    # 解析詞條
-    entries = []
-    in_header = True
+def _convert_shard(pairs: List[Tuple[str, str]]):
+    """
+    在子行程中轉換一個分片
 
-    for line in lines:
-        line = line.rstrip('\n')
+    Returns:
+        (各詞條的轉換記錄（tuple）, (快取統計, 轉換前的快取統計))
+    """
+    converter = _shard_converter
+    converter.warnings = []
+    cached = converter.romanizer.converter
+    baseline = cached.stats()
+    records = [tuple(converter.convert_record(hanzi, pinyin)) for hanzi, pinyin in pairs]
+    return records, (cached.stats(), baseline)
 
-        if in_header:
-            if line == '...':
-                in_header = False
-            continue
-        else:
-            if not line.strip() or line.strip().startswith('#'):
-                continue
 
-            parts = line.split('\t')
-            if len(parts) >= 2:
-                hanzi = parts[0]
-                pinyin = parts[1]
-                weight = parts[2] if len(parts) > 2 else None
+def convert_pouleng_dict(pouleng_file: Path, cpx_file: Path, output_file: Path,
+                         pouleng_entries: Optional[Iterable[DictEntry]] = None,
+                         jobs: int = 1, compare: bool = False, use_cache: bool = True
+                         ) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    轉換詞庫（拼式版本）
+
+    Args:
+        pouleng_file: 莆仙話拼音詞庫
+        cpx_file: cpx-pron-data.lua
+        output_file: 輸出的平話字詞庫（漢字版）
+        pouleng_entries: 已在記憶體中的莆仙話拼音詞條（由建置流程傳入；None 時讀取 pouleng_file）
+        jobs: 分片轉換的子行程數（1 為循序轉換，見 DictConverter.convert_entries_sharded）
+        compare: 轉換後另以不經快取的循序轉換比對結果、統計與警告
+        use_cache: 是否使用逐詞轉換快取（見 ConversionCache）
 
-                result = converter.convert_entry(hanzi, pinyin, weight)
-                if result:
-                    entries.append(result)
+    Raises:
+        RuntimeError: compare 時兩種轉換的結果不同
+
+    Returns:
+        寫入的 (漢字, 拼式, 詞頻) 詞條（依輸出順序）
+    """
+
+    # 單字讀音經由詞彙資料庫逐字查詢（Lua 檔內容沒變時不重新解析）
+    print(f"讀取字典資料：{cpx_file}")
+    store = LexiconStore()
+    store.import_char_readings(CPX_SOURCE, cpx_file,
+                               lambda: LuaDictParser.parse_lua_dict(cpx_file),
+                               LuaDictParser.PARSER_VERSION)
+    cpx_data = store.reading_map(CPX_SOURCE)
+    print(f"已載入 {len(cpx_data)} 個漢字的讀音資料\n")
+
+    if pouleng_entries is None:
+        print(f"讀取詞庫：{pouleng_file}\n")
+        pouleng_entries = load_entries(pouleng_file)
+    else:
+        print(f"使用合併步驟傳入的詞條（{pouleng_file.name}）\n")
+    # 逐詞轉換快取（轉換規則或 cpx 讀音改變時自動作廢）
+    cache = None
+    if use_cache:
+        cache = ConversionCache(ConversionCache.DEFAULT_FILE,
+                                ConversionCache.rules_fingerprint(store.source_digest(CPX_SOURCE)))
+    converter = DictConverter(cpx_data, cache)
+
+    # 讀取並轉換原始詞庫
+    if jobs > 1 or compare:
+        pouleng_entries = list(pouleng_entries)
+    if jobs > 1:
+        print(f"分片轉換：{jobs} 個子行程\n")
+        entries = converter.convert_entries_sharded(pouleng_entries, store.db_file, jobs)
+    else:
+        entries = converter.convert_entries(pouleng_entries)
+    if cache is not None:
+        cache.save()
+        print(cache.report() + "\n")
+    if compare:
+        reference = DictConverter(cpx_data)
+        if (reference.convert_entries(pouleng_entries) != entries
+                or reference.warnings != converter.warnings or reference.stats != converter.stats):
+            raise RuntimeError("轉換結果與不經快取的循序轉換不同")
+        print("比對：詞條、統計與警告皆與不經快取的循序轉換相同\n")
 
     # 添加 cpx 字典的單字條目
     print("\n添加 cpx 字典的單字條目...")
@@ -689,31 +792,18 @@ def convert_pouleng_dict(pouleng_file: Path, cpx_file: Path, output_file: Path):
 
     # 寫入輸出文件
     print(f"寫入輸出檔案：{output_file}\n")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # 寫入標頭
-        f.write("# Rime dictionary\n")
-        f.write("# encoding: utf-8\n")
-        f.write("#\n")
-        f.write("# 興化平話字詞庫（漢字輸出版本）Báⁿ-uā-ci̍ Dictionary (Chinese Character Output)\n")
-        f.write("# 基於莆田城區口音 Based on Putian downtown accent\n")
-        f.write("#\n")
-        f.write("# 本詞庫用於漢字輸出模式\n")
-        f.write("# 格式：漢字 + 輸入式平話字 + 權重\n")
-        f.write("# 候選詞顯示漢字，註釋顯示平話字\n")
-        f.write("#\n")
-        f.write("---\n")
-        f.write("name: borhlang_bannuaci_han\n")
-        f.write("version: \"0.3.0\"\n")
-        f.write("use_preset_vocabulary: false\n")
-        f.write("sort: by_weight\n")
-        f.write("...\n\n")
-
-        # 寫入詞條
-        for hanzi, romanization, weight in entries:
-            if weight:
-                f.write(f"{hanzi}\t{romanization}\t{weight}\n")
-            else:
-                f.write(f"{hanzi}\t{romanization}\n")
+    comments = [
+        "興化平話字詞庫（漢字輸出版本）Báⁿ-uā-ci̍ Dictionary (Chinese Character Output)",
+        "基於莆田城區口音 Based on Putian downtown accent",
+        "",
+        "本詞庫用於漢字輸出模式",
+        "格式：漢字 + 輸入式平話字 + 權重",
+        "候選詞顯示漢字，註釋顯示平話字",
+        "",
+    ]
+    with DictWriter(output_file, "borhlang_bannuaci_han", "0.3.0", comments) as writer:
+        writer.write_entries(entries)
+    print(writer.report() + "\n")
 
     # 輸出統計
     print("轉換完成！")
@@ -726,18 +816,31 @@ def convert_pouleng_dict(pouleng_file: Path, cpx_file: Path, output_file: Path):
     print(f"重複略過的條目數：{converter.stats['total'] - converter.stats['success'] - len([w for w in converter.warnings if '警告' in w])}")
     print(f"轉換失敗：{len([w for w in converter.warnings if '警告' in w])}")
     print(f"多字總條數：{len(entries)}\n")
+    print("轉換快取統計：")
+    print(converter.romanizer.converter.format_stats())
+    print(STRING_POOL.report() + "\n")
+    STRING_POOL.clear()
 
     # 寫入日誌
     log_file = output_file.parent / "conversion_log_v3.txt"
-    with open(log_file, 'w', encoding='utf-8') as f:
-        for warning in converter.warnings:
-            f.write(warning + '\n')
+    changed = write_text_if_changed(log_file, "".join(warning + '\n' for warning in converter.warnings))
 
-    print(f"轉換日誌已寫入：{log_file}")
+    print(f"轉換日誌{'已寫入' if changed else '未變更'}：{log_file}")
     print(f"共 {len(converter.warnings)} 筆\n")
+    store.close()
+    return entries
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="莆仙話拼音詞庫轉換為平話字詞庫（漢字版）")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="分片轉換的子行程數（預設為 CPU 核心數；1 為循序轉換）")
+    parser.add_argument('--compare', action='store_true',
+                        help="轉換後另以不經快取的循序轉換比對結果")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="不使用逐詞轉換快取")
+    args = parser.parse_args()
+
     base_dir = Path(__file__).parent.parent
 
     # 使用合併後的莆仙話拼音詞庫（包含維基詞典和聖經詞彙）
@@ -746,4 +849,5 @@ if __name__ == '__main__':
     # 輸出為漢字+拼式版本（供 generate_pure_bannuaci_dict.py 使用）
     output_file = base_dir / "bannuaci" / "borhlang_bannuaci_han.dict.yaml"
 
-    convert_pouleng_dict(pouleng_file, cpx_file, output_file)
+    convert_pouleng_dict(pouleng_file, cpx_file, output_file, jobs=args.jobs, compare=args.compare,
+                         use_cache=not args.no_cache)
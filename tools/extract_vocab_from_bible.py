@@ -19,6 +19,8 @@ from unicodedata import normalize as norm
 # 導入轉換模組（從 data/ 目錄）
 sys.path.append(str(Path(__file__).parent.parent / "data"))
 from romanization_converter import RomanizationConverter
+from rime_dict import DictWriter, sort_by_weight
+from output_files import write_text_if_changed
 
 
 def extract_multi_syllable_words_from_text(text: str) -> list:
@@ -74,6 +76,19 @@ def extract_multi_syllable_words_from_text(text: str) -> list:
     return multi_syllable_words
 
 
+def lower_proper_nouns(word_buc: str) -> str:
+    """
+    將專有名詞（首字母大寫）的各音節首字母轉為小寫
+
+    Args:
+        word_buc: 連字號分隔的平話字詞
+
+    Returns:
+        str: 各音節首字母小寫後的詞
+    """
+    return '-'.join(syl[:1].lower() + syl[1:] for syl in word_buc.split('-'))
+
+
 def generate_vocab_list(input_file: Path, output_file: Path):
     """
     從莆仙語聖經 JSON 提取詞表
@@ -133,43 +148,21 @@ def generate_vocab_list(input_file: Path, output_file: Path):
                         if not (han and rom_buc):
                             continue
 
-                        # 轉換平話字 -> 輸入式
-                        try:
-                            # 處理多音節詞（用連字號分隔）
-                            syllables_buc = rom_buc.split('-')
-                            syllables_input = []
-
-                            for syl_buc in syllables_buc:
-                                # 跳過空音節
-                                if not syl_buc:
-                                    continue
-
-                                # 處理專有名詞（首字母大寫）
-                                if syl_buc and syl_buc[0].isupper():
-                                    syl_buc = syl_buc[0].lower() + syl_buc[1:]
-
-                                # 轉換：平話字 -> 輸入式（保留鼻化韻 nn）
-                                try:
-                                    syl_input = RomanizationConverter.buc_to_input(syl_buc)
-                                    syllables_input.append(syl_input)
-                                except ValueError as e:
-                                    # 無法轉換的音節，記錄但跳過整個詞
-                                    raise Exception(f"音節轉換失敗 '{syl_buc}' -> 輸入式: {e}")
-
-                            # 組合音節（用空格分隔）
-                            rom_input = ' '.join(syllables_input)
+                        # 轉換平話字 -> 輸入式（保留鼻化韻 nn）
+                        result = RomanizationConverter.try_convert_word(
+                            lower_proper_nouns(rom_buc), 'buc', 'input')
 
+                        if result.ok:
                             # 計數
-                            vocab_counter[(han, rom_input)] += 1
+                            vocab_counter[(han, result.result)] += 1
                             stats['valid_tokens'] += 1
-
-                        except Exception as e:
+                        else:
                             # 轉換失敗，記錄到日誌
                             stats['conversion_errors'] += 1
                             error_log.append({
                                 'han': han,
                                 'rom_buc': rom_buc,
-                                'error': str(e)
+                                'error': result.error
                             })
 
                     # 處理只有羅馬字沒有漢字的 sections
@@ -182,36 +175,19 @@ def generate_vocab_list(input_file: Path, output_file: Path):
                         # 從 section.rom 中提取多音節詞
                         extracted_words = extract_multi_syllable_words_from_text(section_rom)
 
-                        for word_buc in extracted_words:
-                            try:
-                                # 轉換 BUC -> Input
-                                syllables_buc = word_buc.split('-')
-                                syllables_input = []
-
-                                for syl_buc in syllables_buc:
-                                    if not syl_buc:
-                                        continue
-
-                                    # 處理大寫（專有名詞）
-                                    if syl_buc and syl_buc[0].isupper():
-                                        syl_buc = syl_buc[0].lower() + syl_buc[1:]
-
-                                    syl_input = RomanizationConverter.buc_to_input(syl_buc)
-                                    syllables_input.append(syl_input)
-
-                                rom_input = ' '.join(syllables_input)
-
-                                # 使用特殊標記表示無漢字
-                                # 用 ▣ 作為佔位符，數量對應音節數
-                                han_placeholder = '▣' * len(syllables_input)
+                        words_buc = (lower_proper_nouns(w) for w in extracted_words)
+                        for result in RomanizationConverter.convert_words(words_buc, 'buc', 'input'):
+                            # 轉換失敗，靜默跳過（避免噪音）
+                            if not result.ok:
+                                continue
 
-                                # 計數（使用特殊標記來區分無漢字的詞）
-                                vocab_counter[(han_placeholder, rom_input)] += 1
-                                stats['rom_only_multi_syllable'] += 1
+                            # 使用特殊標記表示無漢字
+                            # 用 ▣ 作為佔位符，數量對應音節數
+                            han_placeholder = '▣' * len(result.result.split())
 
-                            except Exception as e:
-                                # 轉換失敗，靜默跳過（避免噪音）
-                                pass
+                            # 計數（使用特殊標記來區分無漢字的詞）
+                            vocab_counter[(han_placeholder, result.result)] += 1
+                            stats['rom_only_multi_syllable'] += 1
 
         stats['unique_entries'] = len(vocab_counter)
 
@@ -228,11 +204,10 @@ def generate_vocab_list(input_file: Path, output_file: Path):
         if error_log:
             error_log_file = output_file.parent / "bible_conversion_errors.log"
             print(f"\n寫入錯誤日誌：{error_log_file}")
-            with open(error_log_file, 'w', encoding='utf-8') as f:
-                f.write("# 聖經詞彙轉換錯誤日誌\n")
-                f.write(f"# 總錯誤數：{len(error_log)}\n\n")
-                for i, err in enumerate(error_log[:50], 1):  # 只記錄前50個
-                    f.write(f"{i}. {err['han']} | {err['rom_buc']} | {err['error']}\n")
+            lines = ["# 聖經詞彙轉換錯誤日誌\n", f"# 總錯誤數：{len(error_log)}\n\n"]
+            for i, err in enumerate(error_log[:50], 1):  # 只記錄前50個
+                lines.append(f"{i}. {err['han']} | {err['rom_buc']} | {err['error']}\n")
+            write_text_if_changed(error_log_file, "".join(lines))
 
         print(f"\n[OK] 完成！")
         return 0
@@ -262,30 +237,21 @@ def write_yaml_dict(output_file: Path, vocab_counter: Counter):
     - 頻次 11-20 次：權重 200
     - 頻次 21+ 次：權重 250-300
     """
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # 寫入標頭
-        f.write("# Rime dictionary\n")
-        f.write("# encoding: utf-8\n")
-        f.write("#\n")
-        f.write("# 從興化平話字聖經提取的詞彙\n")
-        f.write("# Vocabulary extracted from Hinghwa Bible\n")
-        f.write("#\n")
-        f.write("# 來源：data/bible_data.json (平話字格式)\n")
-        f.write("# 格式：漢字 + 輸入式平話字 (Input-form，保留鼻化韻 nn)\n")
-        f.write("# 權重上限：300（聖經術語相對少見）\n")
-        f.write("#\n")
-        f.write("# 注意：本詞表保留輸入式格式而非莆拼，以保留鼻化韻資訊\n")
-        f.write("#       供 bannuaci 輸入法直接使用，需用於 pouseng_pinging 時再轉換\n")
-        f.write("#\n")
-        f.write("---\n")
-        f.write("name: vocab_from_bible\n")
-        f.write('version: "0.2.0"\n')
-        f.write("use_preset_vocabulary: false\n")
-        f.write("sort: by_weight\n")
-        f.write("...\n\n")
-
-        # 按頻次排序
-        sorted_vocab = vocab_counter.most_common()
+    comments = [
+        "從興化平話字聖經提取的詞彙",
+        "Vocabulary extracted from Hinghwa Bible",
+        "",
+        "來源：data/bible_data.json (平話字格式)",
+        "格式：漢字 + 輸入式平話字 (Input-form，保留鼻化韻 nn)",
+        "權重上限：300（聖經術語相對少見）",
+        "",
+        "注意：本詞表保留輸入式格式而非莆拼，以保留鼻化韻資訊",
+        "      供 bannuaci 輸入法直接使用，需用於 pouseng_pinging 時再轉換",
+        "",
+    ]
+    with DictWriter(output_file, "vocab_from_bible", "0.2.0", comments) as writer:
+        # 按頻次排序（同頻次依首次出現的順序）
+        sorted_vocab = sort_by_weight(vocab_counter.items(), lambda item: item[1])
 
         for (han, rom_input), count in sorted_vocab:
             # 根據頻次計算權重
@@ -302,7 +268,8 @@ def write_yaml_dict(output_file: Path, vocab_counter: Counter):
             else:
                 weight = 300  # 上限
 
-            f.write(f"{han}\t{rom_input}\t{weight}\n")
+            writer.write_entry(han, rom_input, weight)
+    print(f"[OK] {writer.report()}")
 
 
 def main():